@@ -1,5 +1,6 @@
 from django.contrib import admin
-from .models import Service, CartItem, Booking
+from .models import Service, CartItem, Booking, Vehicle
+from common.signals import bookings_updated
 from django.utils.html import format_html
 from django.urls import reverse
 from django.db.models import Count, Sum
@@ -185,10 +186,25 @@ class BookingAdmin(admin.ModelAdmin):
     
     @admin.action(description='Mark selected bookings as paid')
     def mark_as_paid(self, request, queryset):
+        bookings = list(queryset)  # the filtered changelist may no longer match afterwards
         updated = queryset.update(payment_completed=True)
+        bookings_updated.send(sender=Booking, bookings=bookings)
         self.message_user(request, f'{updated} bookings marked as paid.')
     
     @admin.action(description='Mark selected bookings as cancelled')
     def mark_as_cancelled(self, request, queryset):
         updated = queryset.update(status='cancelled')
         self.message_user(request, f'{updated} bookings marked as cancelled.')
+
+
+@admin.register(Vehicle)
+class VehicleAdmin(admin.ModelAdmin):
+    list_display = (
+        'registration', 'make', 'colour', 'year_of_manufacture',
+        'mot_status', 'mot_expiry_date', 'tax_status', 'tax_due_date', 'fetched_at'
+    )
+    list_filter = ('mot_status', 'tax_status', 'fuel_type', 'make')
+    search_fields = ('registration', 'make')
+    readonly_fields = ('data', 'fetched_at', 'created_at')
+    date_hierarchy = 'mot_expiry_date'
+    list_per_page = 25
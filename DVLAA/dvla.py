@@ -0,0 +1,399 @@
+"""
+DVLA vehicle enquiry client with a lookup cache.
+
+Lookups are keyed by the normalized registration ("ab12 cde" and "AB12CDE"
+are the same vehicle). Found vehicles are cached for DVLA_CACHE_TTL seconds
+and unknown registrations for DVLA_NOT_FOUND_TTL, in process memory and,
+when a shared cache backend is configured, in the Django cache. Concurrent
+lookups of the same registration share one upstream request, and upstream
+requests are spaced to at most DVLA_MAX_RATE per second per process.
+
+Behind the cache sits the Vehicle registry table: every DVLA answer is
+stored there, and a registration already in the registry is served (and
+cached) from it without going upstream. Rows older than
+DVLA_REGISTRY_MAX_AGE are still served, but not cached, and refreshed from
+DVLA in the background.
+"""
+import logging
+import re
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import timedelta
+
+import requests
+from django.conf import settings
+from django.core.cache import cache
+from django.db import DatabaseError, connection
+from django.utils import timezone
+from django.utils.dateparse import parse_date
+
+from common.ratelimit import RateLimiter
+
+from .models import Vehicle
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_DVLA_API_URL = "https://driver-vehicle-licensing.api.gov.uk/vehicle-enquiry/v1/vehicles"
+
+
+class VehicleNotFound(Exception):
+    """DVLA has no vehicle with this registration"""
+
+
+class DVLAError(Exception):
+    """DVLA answered with an unexpected status"""
+
+    def __init__(self, status_code):
+        self.status_code = status_code
+        super().__init__(f"DVLA API returned {status_code}")
+
+
+def normalize_registration(registration):
+    """Upper case without spaces or punctuation, as DVLA expects"""
+    return re.sub(r'[^A-Z0-9]', '', str(registration or '').upper())
+
+
+_limiter = RateLimiter(getattr(settings, 'DVLA_MAX_RATE', 10))
+_local = threading.local()
+
+
+def _session():
+    """Keep-alive session per thread"""
+    session = getattr(_local, 'session', None)
+    if session is None:
+        session = _local.session = requests.Session()
+    return session
+
+
+def fetch_vehicle(registration):
+    """One vehicle enquiry call. Raises VehicleNotFound, DVLAError or requests.RequestException."""
+    _limiter.wait()
+    response = _session().post(
+        getattr(settings, 'DVLA_LOOKUP_URL', None) or DEFAULT_DVLA_API_URL,
+        json={"registrationNumber": registration},
+        headers={
+            "x-api-key": settings.DVLA_API_KEY,
+            "Content-Type": "application/json",
+        },
+        timeout=getattr(settings, 'DVLA_TIMEOUT', 10),
+    )
+    if response.status_code == 200:
+        return response.json()
+    if response.status_code == 404:
+        raise VehicleNotFound(registration)
+    raise DVLAError(response.status_code)
+
+
+def _parse_date(value):
+    try:
+        return parse_date(value or '')
+    except ValueError:
+        return None
+
+
+def save_vehicle(registration, data):
+    """Store a DVLA response in the registry; returns the Vehicle row"""
+    vehicle, _ = Vehicle.objects.update_or_create(
+        registration=registration,
+        defaults={
+            'make': data.get('make') or '',
+            'colour': data.get('colour') or '',
+            'year_of_manufacture': data.get('yearOfManufacture'),
+            'fuel_type': data.get('fuelType') or '',
+            'tax_status': data.get('taxStatus') or '',
+            'tax_due_date': _parse_date(data.get('taxDueDate')),
+            'mot_status': data.get('motStatus') or '',
+            'mot_expiry_date': _parse_date(data.get('motExpiryDate')),
+            'data': data,
+            'fetched_at': timezone.now(),
+        },
+    )
+    return vehicle
+
+
+def _is_stale(vehicle):
+    max_age = timedelta(seconds=getattr(settings, 'DVLA_REGISTRY_MAX_AGE', 86400))
+    return vehicle.fetched_at < timezone.now() - max_age
+
+
+_refresher = ThreadPoolExecutor(max_workers=1)
+_refreshing = set()
+_refreshing_lock = threading.Lock()
+
+
+def refresh_vehicle(registration):
+    """Fetch ``registration`` from DVLA into the registry and the lookup cache"""
+    data = fetch_vehicle(registration)
+    save_vehicle(registration, data)
+    vehicle_cache.invalidate(registration)
+    return data
+
+
+def _background_refresh(registration):
+    try:
+        refresh_vehicle(registration)
+    except Exception as e:
+        logger.warning(f"Background refresh of vehicle {registration} failed: {e}")
+    finally:
+        with _refreshing_lock:
+            _refreshing.discard(registration)
+        connection.close()
+
+
+def schedule_refresh(registration):
+    """Refresh a registry row in the background, once at a time per registration"""
+    with _refreshing_lock:
+        if registration in _refreshing:
+            return
+        _refreshing.add(registration)
+    _refresher.submit(_background_refresh, registration)
+
+
+def _registered(vehicle):
+    """Registry row's data, refreshing it in the background if stale"""
+    if _is_stale(vehicle):
+        schedule_refresh(vehicle.registration)
+    return vehicle.data
+
+
+def lookup_vehicle(registration):
+    """Registry first, then DVLA; DVLA answers are saved to the registry"""
+    vehicle = Vehicle.objects.filter(registration=registration).first()
+    if vehicle is not None:
+        return _registered(vehicle)
+
+    data = fetch_vehicle(registration)
+    try:
+        save_vehicle(registration, data)
+    except DatabaseError as e:
+        logger.error(f"Could not save vehicle {registration} to the registry: {e}")
+    return data
+
+
+class _Call:
+    """An upstream lookup that other threads can wait on"""
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class VehicleLookupCache:
+    """TTL cache in front of fetch_vehicle, with negative caching and request coalescing"""
+
+    def __init__(self, fetch=fetch_vehicle, ttl=None, not_found_ttl=None, max_entries=None):
+        self._fetch = fetch
+        self.ttl = ttl if ttl is not None else getattr(settings, 'DVLA_CACHE_TTL', 21600)
+        self.not_found_ttl = not_found_ttl if not_found_ttl is not None else getattr(settings, 'DVLA_NOT_FOUND_TTL', 900)
+        self.max_entries = max_entries or getattr(settings, 'DVLA_CACHE_MAX_ENTRIES', 10000)
+        self._entries = OrderedDict()  # registration -> (expires_at, found, data)
+        self._in_flight = {}
+        self._lock = threading.Lock()
+        self._stats = {'hits': 0, 'misses': 0, 'coalesced': 0, 'upstream_calls': 0}
+
+    def _cache_key(self, registration):
+        return f"dvla:vehicle:{registration}"
+
+    def _cached(self, registration):
+        """(found, data) from memory or the shared cache, or None"""
+        with self._lock:
+            entry = self._entries.get(registration)
+            if entry and entry[0] > time.time():
+                self._entries.move_to_end(registration)
+                return entry[1], entry[2]
+
+        try:
+            shared = cache.get(self._cache_key(registration))
+        except Exception as e:
+            logger.warning(f"Could not read shared DVLA cache: {e}")
+            shared = None
+        if shared:
+            self._remember(registration, shared['found'], shared['data'], shared['expires_at'], share=False)
+            return shared['found'], shared['data']
+        return None
+
+    def _remember(self, registration, found, data, expires_at=None, share=True):
+        ttl = self.ttl if found else self.not_found_ttl
+        expires_at = expires_at or time.time() + ttl
+        with self._lock:
+            self._entries[registration] = (expires_at, found, data)
+            self._entries.move_to_end(registration)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        if share:
+            try:
+                cache.set(self._cache_key(registration), {
+                    'found': found,
+                    'data': data,
+                    'expires_at': expires_at,
+                }, ttl)
+            except Exception as e:
+                logger.warning(f"Could not write shared DVLA cache: {e}")
+
+    def _count(self, name):
+        with self._lock:
+            self._stats[name] += 1
+
+    def peek(self, registration):
+        """
+        Cached vehicle data without going upstream: the data, None on a
+        miss, or VehicleNotFound for a cached 404.
+        """
+        cached = self._cached(normalize_registration(registration))
+        if cached is None:
+            return None
+        found, data = cached
+        if not found:
+            raise VehicleNotFound(registration)
+        return data
+
+    def store(self, registration, data):
+        """Cache ``data`` as the vehicle found for ``registration``"""
+        self._remember(normalize_registration(registration), True, data)
+
+    def get(self, registration):
+        """
+        Vehicle data for ``registration``. Raises VehicleNotFound, DVLAError
+        or requests.RequestException; only found and not-found answers are
+        cached.
+        """
+        registration = normalize_registration(registration)
+        cached = self._cached(registration)
+        if cached is not None:
+            self._count('hits')
+            found, data = cached
+            if not found:
+                raise VehicleNotFound(registration)
+            return data
+
+        with self._lock:
+            call = self._in_flight.get(registration)
+            leader = call is None
+            if leader:
+                call = self._in_flight[registration] = _Call()
+                self._stats['misses'] += 1
+            else:
+                self._stats['coalesced'] += 1
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            # The previous leader may have finished between our cache check
+            # and taking the lead; its answer, found or not, stands
+            cached = self._cached(registration)
+            if cached is None:
+                cached = self._fetch_and_remember(registration)
+            found, call.result = cached
+            if not found:
+                raise VehicleNotFound(registration)
+            return call.result
+        except Exception as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                self._in_flight.pop(registration, None)
+            call.done.set()
+
+    def _fetch_and_remember(self, registration):
+        """(found, data) from upstream, cached"""
+        self._count('upstream_calls')
+        try:
+            data = self._fetch(registration)
+        except VehicleNotFound:
+            self._remember(registration, False, None)
+            return False, None
+        self._remember(registration, True, data)
+        return True, data
+
+    def invalidate(self, registration):
+        registration = normalize_registration(registration)
+        with self._lock:
+            self._entries.pop(registration, None)
+        try:
+            cache.delete(self._cache_key(registration))
+        except Exception as e:
+            logger.warning(f"Could not clear shared DVLA cache: {e}")
+
+    def stats(self):
+        with self._lock:
+            return {**self._stats, 'entries': len(self._entries)}
+
+
+# Shared instance
+vehicle_cache = VehicleLookupCache(fetch=lookup_vehicle)
+
+
+def _lookup_result(registration, lookup):
+    """NDJSON-ready result of one lookup"""
+    try:
+        return {'registration': registration, 'status': 200, 'data': lookup(registration)}
+    except VehicleNotFound:
+        return {'registration': registration, 'status': 404, 'error': 'Vehicle not found'}
+    except DVLAError as e:
+        return {'registration': registration, 'status': e.status_code, 'error': 'DVLA API error'}
+    except requests.RequestException as e:
+        return {'registration': registration, 'status': 503, 'error': str(e)}
+
+
+def _lookup_in_thread(registration, lookup):
+    try:
+        return _lookup_result(registration, lookup)
+    finally:
+        connection.close()
+
+
+def lookup_many(registrations, concurrency=None, lookup_cache=None):
+    """
+    Yield a result dict per distinct registration as soon as it is known.
+
+    Cached and registered vehicles come first, without waiting; the rest are
+    fetched with at most ``concurrency`` (default DVLA_BATCH_CONCURRENCY)
+    requests in flight. Closing the generator cancels lookups that have not
+    started.
+    """
+    lookup_cache = lookup_cache or vehicle_cache
+    concurrency = concurrency or getattr(settings, 'DVLA_BATCH_CONCURRENCY', 4)
+
+    pending = []
+    for registration in dict.fromkeys(normalize_registration(r) for r in registrations):
+        if not registration:
+            yield {'registration': registration, 'status': 400, 'error': 'Invalid registration number'}
+            continue
+        try:
+            data = lookup_cache.peek(registration)
+        except VehicleNotFound:
+            yield {'registration': registration, 'status': 404, 'error': 'Vehicle not found'}
+            continue
+        if data is not None:
+            yield {'registration': registration, 'status': 200, 'data': data}
+        else:
+            pending.append(registration)
+
+    if not pending:
+        return
+    registered = Vehicle.objects.in_bulk(pending, field_name='registration')
+    for registration, vehicle in registered.items():
+        data = _registered(vehicle)
+        if not _is_stale(vehicle):
+            # Stale rows are not cached, so the next lookup sees the refreshed row
+            lookup_cache.store(registration, data)
+        yield {'registration': registration, 'status': 200, 'data': data}
+    pending = [registration for registration in pending if registration not in registered]
+
+    if not pending:
+        return
+    executor = ThreadPoolExecutor(max_workers=min(concurrency, len(pending)))
+    try:
+        futures = [executor.submit(_lookup_in_thread, registration, lookup_cache.get) for registration in pending]
+        for future in as_completed(futures):
+            yield future.result()
+    finally:
+        executor.shutdown(wait=False, cancel_futures=True)
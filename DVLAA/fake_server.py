@@ -0,0 +1,205 @@
+"""
+Stand-in for the DVLA Vehicle Enquiry API, for load and integration testing.
+
+Answers POST /vehicle-enquiry/v1/vehicles like DVLA does: vehicle details,
+404 for unknown registrations, 400 for malformed ones and 403 without an
+x-api-key. Vehicles come from a dataset (e.g. a JSON file of DVLA responses
+keyed by registration) or, without one, are made up deterministically from
+the registration. Latency, server errors and 429s can be injected, and
+``max_rate`` enforces a per-second quota like the real API's.
+Point DVLA_LOOKUP_URL at ``lookup_url``, e.g. via ``manage.py run_fake_dvla``.
+"""
+import hashlib
+import json
+import logging
+import random
+import re
+import threading
+import time
+from collections import Counter
+from datetime import date, timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+logger = logging.getLogger(__name__)
+
+LOOKUP_PATH = '/vehicle-enquiry/v1/vehicles'
+VALID_REGISTRATION = re.compile(r'^[A-Z0-9]{1,7}$')
+
+MAKES = ['FORD', 'VAUXHALL', 'VOLKSWAGEN', 'TOYOTA', 'BMW', 'AUDI', 'NISSAN', 'PEUGEOT', 'HONDA', 'KIA']
+COLOURS = ['BLACK', 'WHITE', 'SILVER', 'BLUE', 'RED', 'GREY']
+FUEL_TYPES = ['PETROL', 'DIESEL', 'HYBRID ELECTRIC', 'ELECTRICITY']
+
+
+def synthetic_vehicle(registration):
+    """A plausible DVLA response that is always the same for ``registration``"""
+    seed = int(hashlib.sha256(registration.encode()).hexdigest(), 16)
+    rng = random.Random(seed)
+    year = rng.randint(2005, 2023)
+    mot_expiry = date.today() + timedelta(days=rng.randint(-60, 365))
+    tax_due = date.today() + timedelta(days=rng.randint(-30, 365))
+    return {
+        'registrationNumber': registration,
+        'taxStatus': 'Taxed' if tax_due >= date.today() else 'Untaxed',
+        'taxDueDate': tax_due.isoformat(),
+        'motStatus': 'Valid' if mot_expiry >= date.today() else 'Not valid',
+        'motExpiryDate': mot_expiry.isoformat(),
+        'make': rng.choice(MAKES),
+        'yearOfManufacture': year,
+        'monthOfFirstRegistration': f"{year}-{rng.randint(1, 12):02d}",
+        'engineCapacity': rng.choice([998, 1198, 1398, 1598, 1995, 2993]),
+        'co2Emissions': rng.randint(90, 220),
+        'fuelType': rng.choice(FUEL_TYPES),
+        'markedForExport': False,
+        'colour': rng.choice(COLOURS),
+        'typeApproval': 'M1',
+        'wheelplan': '2 AXLE RIGID BODY',
+    }
+
+
+def _error(status, title, detail):
+    return {'errors': [{'status': str(status), 'code': str(status), 'title': title, 'detail': detail}]}
+
+
+class FakeDVLAState:
+    """Dataset and call counters held by a FakeDVLAServer"""
+
+    def __init__(self, dataset=None, not_found_rate=0.0):
+        self.dataset = dataset  # registration -> response; None: synthesize
+        self.not_found_rate = not_found_rate
+        self.calls = Counter()
+        self.lock = threading.Lock()
+
+    def find(self, registration):
+        """Response for ``registration``, or None if DVLA would not know it"""
+        if self.dataset is not None:
+            return self.dataset.get(registration)
+        # Deterministic, so a registration is either always found or never
+        fraction = int(hashlib.md5(registration.encode()).hexdigest()[:8], 16) / 0xFFFFFFFF
+        if fraction < self.not_found_rate:
+            return None
+        return synthetic_vehicle(registration)
+
+
+class FakeDVLAHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def log_message(self, format, *args):
+        logger.debug(f"fake DVLA: {format % args}")
+
+    def do_POST(self):
+        server = self.server
+        state = server.state
+        length = int(self.headers.get('Content-Length') or 0)
+        raw_body = self.rfile.read(length) if length else b''
+
+        if self.path.rstrip('/') != LOOKUP_PATH:
+            return self._send(404, _error(404, 'Not Found', f'No route for POST {self.path}'))
+
+        delay = server.latency + random.uniform(0, server.jitter)
+        if delay:
+            time.sleep(delay)
+
+        if not self.headers.get('x-api-key'):
+            return self._count_and_send('forbidden', 403, {'message': 'Forbidden'})
+        if not server.allow_request() or (server.rate_limit_rate and random.random() < server.rate_limit_rate):
+            return self._count_and_send('rate_limited', 429, _error(429, 'Too Many Requests', 'Rate limit exceeded'),
+                                        headers={'Retry-After': str(server.retry_after)})
+        if server.error_rate and random.random() < server.error_rate:
+            return self._count_and_send('error', 500, _error(500, 'Internal Server Error', 'Injected failure'))
+
+        try:
+            registration = str(json.loads(raw_body).get('registrationNumber') or '')
+        except (ValueError, AttributeError):
+            return self._count_and_send('bad_request', 400, _error(400, 'Bad Request', 'Invalid JSON body'))
+        if not VALID_REGISTRATION.match(registration):
+            return self._count_and_send('bad_request', 400, _error(400, 'Bad Request', 'Invalid format for field - vehicle registration number'))
+
+        vehicle = state.find(registration)
+        if vehicle is None:
+            return self._count_and_send('not_found', 404, _error(404, 'Vehicle Not Found', 'Record for vehicle not found'))
+        return self._count_and_send('found', 200, vehicle)
+
+    def _count_and_send(self, outcome, status, payload, headers=None):
+        with self.server.state.lock:
+            self.server.state.calls[outcome] += 1
+        self._send(status, payload, headers)
+
+    def _send(self, status, payload, headers=None):
+        data = json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(data)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(data)
+
+
+class FakeDVLAServer(ThreadingHTTPServer):
+    """
+    Threaded fake DVLA Vehicle Enquiry API.
+
+    ``latency`` (+ up to ``jitter``) seconds is added to every request;
+    ``error_rate`` and ``rate_limit_rate`` are the fractions of requests
+    answered with a 500 or a 429. With ``max_rate`` set, requests beyond
+    that many per second also get a 429, as when over the DVLA quota.
+    """
+    daemon_threads = True
+
+    def __init__(self, host='127.0.0.1', port=8082, dataset=None, not_found_rate=0.0, latency=0.0,
+                 jitter=0.0, error_rate=0.0, rate_limit_rate=0.0, max_rate=0.0, retry_after=1):
+        super().__init__((host, port), FakeDVLAHandler)
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.rate_limit_rate = rate_limit_rate
+        self.max_rate = max_rate
+        self.retry_after = retry_after
+        self.state = FakeDVLAState(dataset=dataset, not_found_rate=not_found_rate)
+        self._window_start = 0
+        self._window_count = 0
+        self._quota_lock = threading.Lock()
+        self._thread = None
+
+    def allow_request(self):
+        """Fixed one-second window quota"""
+        if not self.max_rate:
+            return True
+        with self._quota_lock:
+            now = time.monotonic()
+            if now - self._window_start >= 1:
+                self._window_start = now
+                self._window_count = 0
+            self._window_count += 1
+            return self._window_count <= self.max_rate
+
+    @property
+    def url(self):
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+    @property
+    def lookup_url(self):
+        return self.url + LOOKUP_PATH
+
+    def start(self):
+        """Serve from a background thread (for tests and benchmarks)"""
+        self._thread = threading.Thread(target=self.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.shutdown()
+        self.server_close()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+
+def load_dataset(path):
+    """Dataset from a JSON file: either {registration: response} or a list of responses"""
+    with open(path) as f:
+        data = json.load(f)
+    if isinstance(data, list):
+        data = {vehicle['registrationNumber']: vehicle for vehicle in data}
+    return {re.sub(r'[^A-Z0-9]', '', registration.upper()): vehicle for registration, vehicle in data.items()}
@@ -0,0 +1,139 @@
+import random
+import statistics
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlparse
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.test.utils import override_settings
+
+from DVLAA import dvla
+from DVLAA.fake_server import FakeDVLAServer
+
+LIVE_DVLA_HOST = urlparse(dvla.DEFAULT_DVLA_API_URL).hostname
+
+
+def _percentile(values, pct):
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def _workload(lookups, distinct, seed):
+    """Registrations as customers would send them: a few plates looked up over and over"""
+    rng = random.Random(seed)
+    plates = [f"BM{i:02d}{chr(65 + i % 26)}{chr(65 + i // 26 % 26)}{chr(65 + i // 676 % 26)}" for i in range(distinct)]
+    weights = [1 / (rank + 1) for rank in range(distinct)]
+    return rng.choices(plates, weights=weights, k=lookups)
+
+
+class Command(BaseCommand):
+    help = 'Measure DVLA lookup throughput and tail latency with and without the lookup cache and rate limit'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--lookups', type=int, default=500, help='Lookups per scenario')
+        parser.add_argument('--distinct', type=int, default=100, help='Distinct registrations in the workload')
+        parser.add_argument('--concurrency', type=int, default=20, help='Lookups in flight at once (simulated customers)')
+        parser.add_argument('--dvla-rate', type=float, default=None,
+                            help='Upstream requests/second for the rate-limited scenarios (default DVLA_MAX_RATE)')
+        parser.add_argument('--seed', type=int, default=1, help='Workload random seed')
+        parser.add_argument(
+            '--fake',
+            action='store_true',
+            help='Start an in-process fake DVLA server instead of using DVLA_LOOKUP_URL'
+        )
+        parser.add_argument('--latency', type=float, default=0.15, help='Fake server: seconds added to every response')
+        parser.add_argument('--jitter', type=float, default=0.1, help='Fake server: extra random latency')
+        parser.add_argument('--error-rate', type=float, default=0.0, help='Fake server: fraction of 500 responses')
+        parser.add_argument('--not-found-rate', type=float, default=0.05, help='Fake server: fraction of unknown registrations')
+        parser.add_argument('--max-rate', type=float, default=0.0, help='Fake server: quota in requests/second (0: none)')
+
+    def _run(self, lookup, registrations, concurrency, server):
+        calls_before = sum(server.state.calls.values()) if server else 0
+
+        def one(registration):
+            started = time.perf_counter()
+            try:
+                lookup(registration)
+                outcome = 200
+            except dvla.VehicleNotFound:
+                outcome = 404
+            except dvla.DVLAError as e:
+                outcome = e.status_code
+            except Exception as e:
+                outcome = type(e).__name__
+            return time.perf_counter() - started, outcome
+
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=concurrency) as executor:
+            results = list(executor.map(one, registrations))
+        elapsed = time.perf_counter() - started
+
+        durations = [duration for duration, _ in results]
+        upstream = sum(server.state.calls.values()) - calls_before if server else None
+        return {
+            'elapsed': elapsed,
+            'outcomes': Counter(outcome for _, outcome in results),
+            'throughput': len(results) / elapsed,
+            'p50': statistics.median(durations) * 1000,
+            'p95': _percentile(durations, 95) * 1000,
+            'p99': _percentile(durations, 99) * 1000,
+            'max': max(durations) * 1000,
+            'upstream': upstream,
+        }
+
+    def handle(self, *args, **options):
+        server = None
+        overrides = {}
+        if options['fake']:
+            server = FakeDVLAServer(
+                port=0,
+                latency=options['latency'],
+                jitter=options['jitter'],
+                error_rate=options['error_rate'],
+                not_found_rate=options['not_found_rate'],
+                max_rate=options['max_rate'],
+            ).start()
+            overrides = {'DVLA_LOOKUP_URL': server.lookup_url, 'DVLA_API_KEY': 'benchmark'}
+        else:
+            url = getattr(settings, 'DVLA_LOOKUP_URL', None) or dvla.DEFAULT_DVLA_API_URL
+            if urlparse(url).hostname == LIVE_DVLA_HOST:
+                raise CommandError('Refusing to benchmark against the live DVLA API; use --fake or a local DVLA_LOOKUP_URL')
+
+        dvla_rate = options['dvla_rate'] if options['dvla_rate'] is not None else getattr(settings, 'DVLA_MAX_RATE', 10)
+        registrations = _workload(options['lookups'], options['distinct'], options['seed'])
+        scenarios = [
+            ('no cache, no rate limit', False, 0),
+            (f'no cache, {dvla_rate:g}/s limit', False, dvla_rate),
+            ('cache, no rate limit', True, 0),
+            (f'cache, {dvla_rate:g}/s limit', True, dvla_rate),
+        ]
+
+        self.stdout.write(f"{options['lookups']} lookups of {options['distinct']} registrations, "
+                          f"concurrency {options['concurrency']}"
+                          + (f", against fake DVLA at {server.url}" if server else ""))
+        self.stdout.write(f"{'scenario':<28} {'lookups/s':>9} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} "
+                          f"{'max ms':>8} {'upstream':>8}  outcomes")
+
+        original_limiter = dvla._limiter
+        try:
+            with override_settings(**overrides):
+                for name, cached, rate in scenarios:
+                    dvla._limiter = dvla.RateLimiter(rate)
+                    lookup = dvla.VehicleLookupCache(fetch=dvla.fetch_vehicle).get if cached else dvla.fetch_vehicle
+                    result = self._run(lookup, registrations, options['concurrency'], server)
+                    upstream = '-' if result['upstream'] is None else result['upstream']
+                    outcomes = ', '.join(f"{outcome}: {count}" for outcome, count in sorted(result['outcomes'].items(), key=str))
+                    self.stdout.write(
+                        f"{name:<28} {result['throughput']:>9.1f} {result['p50']:>8.1f} {result['p95']:>8.1f} "
+                        f"{result['p99']:>8.1f} {result['max']:>8.1f} {upstream:>8}  {outcomes}"
+                    )
+        finally:
+            dvla._limiter = original_limiter
+            if server is not None:
+                server.stop()
+
+        if server is not None:
+            self.stdout.write(f"Fake server responses: {dict(server.state.calls)}")
@@ -0,0 +1,46 @@
+from django.core.management.base import BaseCommand
+
+from DVLAA.fake_server import FakeDVLAServer, load_dataset
+
+
+class Command(BaseCommand):
+    help = 'Run a local stand-in for the DVLA Vehicle Enquiry API (set DVLA_LOOKUP_URL to its lookup URL)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--host', default='127.0.0.1', help='Interface to listen on')
+        parser.add_argument('--port', type=int, default=8082, help='Port to listen on')
+        parser.add_argument(
+            '--dataset',
+            help='JSON file of DVLA responses keyed by registration; without it vehicles are made up'
+        )
+        parser.add_argument('--not-found-rate', type=float, default=0.0, help='Fraction of made-up registrations answered with a 404')
+        parser.add_argument('--latency', type=float, default=0.0, help='Seconds added to every response')
+        parser.add_argument('--jitter', type=float, default=0.0, help='Extra random latency, up to this many seconds')
+        parser.add_argument('--error-rate', type=float, default=0.0, help='Fraction of requests answered with a 500')
+        parser.add_argument('--rate-limit-rate', type=float, default=0.0, help='Fraction of requests answered with a 429')
+        parser.add_argument('--max-rate', type=float, default=0.0, help='Requests per second before answering 429 (0: no quota)')
+        parser.add_argument('--retry-after', type=int, default=1, help='Retry-After seconds sent with 429 responses')
+
+    def handle(self, *args, **options):
+        server = FakeDVLAServer(
+            host=options['host'],
+            port=options['port'],
+            dataset=load_dataset(options['dataset']) if options['dataset'] else None,
+            not_found_rate=options['not_found_rate'],
+            latency=options['latency'],
+            jitter=options['jitter'],
+            error_rate=options['error_rate'],
+            rate_limit_rate=options['rate_limit_rate'],
+            max_rate=options['max_rate'],
+            retry_after=options['retry_after'],
+        )
+
+        self.stdout.write(self.style.SUCCESS(f'Fake DVLA API listening on {server.url}'))
+        self.stdout.write(f'Start Django with DVLA_LOOKUP_URL={server.lookup_url} and any DVLA_API_KEY to use it')
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            server.server_close()
+            self.stdout.write(f"Requests served: {dict(server.state.calls)}")
@@ -0,0 +1,34 @@
+# Generated by Django 4.2.30 on 2026-10-18 02:43
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('DVLAA', '0005_booking_customer_address_booking_customer_email_and_more'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Vehicle',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('registration', models.CharField(max_length=16, unique=True)),
+                ('make', models.CharField(blank=True, max_length=64)),
+                ('colour', models.CharField(blank=True, max_length=32)),
+                ('year_of_manufacture', models.PositiveIntegerField(blank=True, null=True)),
+                ('fuel_type', models.CharField(blank=True, max_length=32)),
+                ('tax_status', models.CharField(blank=True, max_length=32)),
+                ('tax_due_date', models.DateField(blank=True, null=True)),
+                ('mot_status', models.CharField(blank=True, max_length=32)),
+                ('mot_expiry_date', models.DateField(blank=True, null=True)),
+                ('data', models.JSONField()),
+                ('fetched_at', models.DateTimeField()),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['mot_expiry_date'], name='vehicle_mot_expiry_idx')],
+            },
+        ),
+    ]
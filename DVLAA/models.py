@@ -51,3 +51,27 @@ class Booking(models.Model):
     def __str__(self):
         user_info = self.user.username if self.user else "Anonymous"
         return f"Booking #{self.id} - {self.service.name} for {user_info}"
+
+
+class Vehicle(models.Model):
+    """Vehicle details from the DVLA enquiry API, one row per registration"""
+    registration = models.CharField(max_length=16, unique=True)  # Normalized, e.g. "AB12CDE"
+    make = models.CharField(max_length=64, blank=True)
+    colour = models.CharField(max_length=32, blank=True)
+    year_of_manufacture = models.PositiveIntegerField(null=True, blank=True)
+    fuel_type = models.CharField(max_length=32, blank=True)
+    tax_status = models.CharField(max_length=32, blank=True)
+    tax_due_date = models.DateField(null=True, blank=True)
+    mot_status = models.CharField(max_length=32, blank=True)
+    mot_expiry_date = models.DateField(null=True, blank=True)
+    data = models.JSONField()  # Full DVLA response
+    fetched_at = models.DateTimeField()
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['mot_expiry_date'], name='vehicle_mot_expiry_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.registration} ({self.make or 'unknown make'})"
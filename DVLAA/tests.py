@@ -0,0 +1,130 @@
+import threading
+import time
+from datetime import timedelta
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TestCase
+from django.utils import timezone
+from rest_framework.test import APITestCase
+
+from DVLAA.dvla import VehicleLookupCache, VehicleNotFound, lookup_many, save_vehicle
+from DVLAA.models import Vehicle
+
+User = get_user_model()
+
+
+class VehicleInfoBatchTests(APITestCase):
+    url = '/api/dvla/vehicle-info/batch/'
+
+    def setUp(self):
+        cache.clear()
+
+    def test_requires_authentication(self):
+        response = self.client.post(self.url, {'registrations': ['AB12CDE']}, format='json', secure=True)
+        self.assertEqual(response.status_code, 401)
+
+    @mock.patch('DVLAA.views.lookup_many', side_effect=lambda registrations: [{'registration': r} for r in registrations])
+    def test_throttled_per_user(self, lookup_many):
+        self.client.force_authenticate(User.objects.create_user(email='user@example.com'))
+        rates = {'dvla_batch': '2/hour'}
+        with mock.patch('rest_framework.throttling.ScopedRateThrottle.THROTTLE_RATES', rates):
+            statuses = [
+                self.client.post(self.url, {'registrations': ['AB12CDE']}, format='json', secure=True).status_code
+                for _ in range(3)
+            ]
+        self.assertEqual(statuses, [200, 200, 429])
+
+
+class VehicleLookupCacheTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.calls = []
+
+    def _fetch(self, registration):
+        self.calls.append(registration)
+        if registration == 'NOTFOUND':
+            raise VehicleNotFound(registration)
+        return {'registrationNumber': registration, 'make': 'FORD'}
+
+    def test_concurrent_lookups_share_one_call(self):
+        lookups = 5
+        lookup_cache = VehicleLookupCache(fetch=self._fetch)
+
+        def slow_fetch(registration):
+            # Hold the call open until every other lookup is waiting on it
+            deadline = time.time() + 5
+            while lookup_cache.stats()['coalesced'] < lookups - 1 and time.time() < deadline:
+                time.sleep(0.01)
+            return self._fetch(registration)
+
+        lookup_cache._fetch = slow_fetch
+        results = []
+        threads = [threading.Thread(target=lambda: results.append(lookup_cache.get('ab12 cde')))
+                   for _ in range(lookups)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(self.calls, ['AB12CDE'])
+        self.assertEqual(len(results), lookups)
+        self.assertEqual(lookup_cache.stats()['coalesced'], lookups - 1)
+
+    def test_not_found_is_cached(self):
+        lookup_cache = VehicleLookupCache(fetch=self._fetch)
+        for _ in range(3):
+            with self.assertRaises(VehicleNotFound):
+                lookup_cache.get('NOTFOUND')
+        self.assertEqual(self.calls, ['NOTFOUND'])
+
+    def test_leader_uses_a_404_cached_while_it_took_the_lead(self):
+        lookup_cache = VehicleLookupCache(fetch=self._fetch)
+        with mock.patch.object(lookup_cache, '_cached', side_effect=[None, (False, None)]):
+            with self.assertRaises(VehicleNotFound):
+                lookup_cache.get('AB12CDE')
+        self.assertEqual(self.calls, [])
+
+    def test_entries_expire_after_their_ttl(self):
+        lookup_cache = VehicleLookupCache(fetch=self._fetch, ttl=60, not_found_ttl=10)
+        now = time.time()
+        with mock.patch('DVLAA.dvla.time.time', return_value=now):
+            lookup_cache.get('AB12CDE')
+            with self.assertRaises(VehicleNotFound):
+                lookup_cache.get('NOTFOUND')
+        with mock.patch('DVLAA.dvla.time.time', return_value=now + 30):
+            lookup_cache.get('AB12CDE')
+            with self.assertRaises(VehicleNotFound):
+                lookup_cache.get('NOTFOUND')
+        self.assertEqual(self.calls, ['AB12CDE', 'NOTFOUND', 'NOTFOUND'])
+        with mock.patch('DVLAA.dvla.time.time', return_value=now + 61):
+            lookup_cache.get('AB12CDE')
+        self.assertEqual(self.calls, ['AB12CDE', 'NOTFOUND', 'NOTFOUND', 'AB12CDE'])
+
+
+class LookupManyRegistryTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.fetch = mock.Mock(side_effect=AssertionError('no upstream call expected'))
+        self.lookup_cache = VehicleLookupCache(fetch=self.fetch)
+        save_vehicle('AB12CDE', {'registrationNumber': 'AB12CDE', 'make': 'FORD'})
+
+    def _lookup(self):
+        return list(lookup_many(['ab12 cde'], lookup_cache=self.lookup_cache))
+
+    @mock.patch('DVLAA.dvla.schedule_refresh')
+    def test_fresh_row_is_cached_without_going_upstream(self, schedule_refresh):
+        self.assertEqual(self._lookup()[0]['data']['make'], 'FORD')
+        with self.assertNumQueries(0):
+            self.assertEqual(self._lookup()[0]['data']['make'], 'FORD')
+        self.fetch.assert_not_called()
+        schedule_refresh.assert_not_called()
+
+    @mock.patch('DVLAA.dvla.schedule_refresh')
+    def test_stale_row_is_refreshed(self, schedule_refresh):
+        Vehicle.objects.update(fetched_at=timezone.now() - timedelta(days=2))
+        self.assertEqual(self._lookup()[0]['data']['make'], 'FORD')
+        schedule_refresh.assert_called_once_with('AB12CDE')
+        self.assertIsNone(self.lookup_cache.peek('AB12CDE'))
+        self.fetch.assert_not_called()
@@ -1,6 +1,7 @@
 from django.urls import path
 from .views import (
     VehicleInfoAPIView,
+    VehicleInfoBatchAPIView,
     ServiceListAPIView,
     CartListCreateAPIView,
     CartItemDestroyAPIView,
@@ -10,6 +11,7 @@ from .views import (
 
 urlpatterns = [
     path('vehicle-info/', VehicleInfoAPIView.as_view(), name='vehicle-info'),
+    path('vehicle-info/batch/', VehicleInfoBatchAPIView.as_view(), name='vehicle-info-batch'),
     path('services/', ServiceListAPIView.as_view(), name='service-list'),
     path('cart/', CartListCreateAPIView.as_view(), name='cart-list-create'),
     path('cart/item/<int:item_id>/', CartItemDestroyAPIView.as_view(), name='cart-item-destroy'),
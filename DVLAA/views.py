@@ -1,9 +1,13 @@
 from rest_framework import generics, permissions, status
+from rest_framework.throttling import ScopedRateThrottle
 from rest_framework.views import APIView
 from rest_framework.response import Response
+import json
 import requests
 from django.conf import settings
+from django.http import StreamingHttpResponse
 
+from .dvla import DVLAError, VehicleNotFound, lookup_many, normalize_registration, vehicle_cache
 from .models import Service, CartItem, Booking
 from .serializers import ServiceSerializer, CartItemSerializer, BookingSerializer
 
@@ -16,29 +20,41 @@ class VehicleInfoAPIView(APIView):
         if not reg_number:
             return Response({"error": "Registration number is required"}, status=status.HTTP_400_BAD_REQUEST)
 
-        DVLA_API_URL = "https://driver-vehicle-licensing.api.gov.uk/vehicle-enquiry/v1/vehicles"
-        headers = {
-            "x-api-key": settings.DVLA_API_KEY,
-            "Content-Type": "application/json",
-        }
+        registration = normalize_registration(reg_number)
+        if not registration:
+            return Response({"error": "Registration number is required"}, status=status.HTTP_400_BAD_REQUEST)
 
         try:
-            response = requests.post(
-                DVLA_API_URL,
-                json={"registrationNumber": reg_number},
-                headers=headers,
-                timeout=10,
-            )
-            if response.status_code == 200:
-                return Response(response.json())
-            elif response.status_code == 404:
-                return Response({"error": "Vehicle not found"}, status=status.HTTP_404_NOT_FOUND)
-            else:
-                return Response({"error": "DVLA API error"}, status=response.status_code)
+            return Response(vehicle_cache.get(registration))
+        except VehicleNotFound:
+            return Response({"error": "Vehicle not found"}, status=status.HTTP_404_NOT_FOUND)
+        except DVLAError as e:
+            return Response({"error": "DVLA API error"}, status=e.status_code)
         except requests.RequestException as e:
             return Response({"error": str(e)}, status=status.HTTP_503_SERVICE_UNAVAILABLE)
 
 
+# 1b. Batch vehicle lookup - results stream back as NDJSON, one line per registration as it completes
+class VehicleInfoBatchAPIView(APIView):
+    permission_classes = [permissions.IsAuthenticated]
+    throttle_classes = [ScopedRateThrottle]
+    throttle_scope = 'dvla_batch'  # each request may cost DVLA_BATCH_MAX_SIZE lookups
+
+    def post(self, request):
+        registrations = request.data.get('registrations')
+        if not isinstance(registrations, list) or not registrations:
+            return Response({"error": "registrations must be a non-empty list"}, status=status.HTTP_400_BAD_REQUEST)
+
+        max_size = getattr(settings, 'DVLA_BATCH_MAX_SIZE', 50)
+        if len(registrations) > max_size:
+            return Response({"error": f"At most {max_size} registrations per request"}, status=status.HTTP_400_BAD_REQUEST)
+
+        lines = (json.dumps(result) + "\n" for result in lookup_many(registrations))
+        response = StreamingHttpResponse(lines, content_type='application/x-ndjson')
+        response['X-Accel-Buffering'] = 'no'  # Let nginx pass lines through as they are written
+        return response
+
+
 # 2. List all available services
 class ServiceListAPIView(generics.ListAPIView):
     queryset = Service.objects.all()
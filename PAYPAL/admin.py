@@ -1,5 +1,6 @@
 from django.contrib import admin
-from .models import Booking, Service
+from .models import Booking, Service, PaymentOperation, Payout, PayoutBatch, WebhookEvent, ReconciliationRun
+from common.signals import bookings_updated
 from datetime import datetime
 from django.utils.html import format_html
 from django.urls import reverse
@@ -76,6 +77,7 @@ class BookingAdmin(admin.ModelAdmin):
         'service__name', 'paypal_transaction_id'
     ]
     readonly_fields = ['created', 'updated', 'verification_token', 'paypal_transaction_id']
+    raw_id_fields = ['vehicle']
     date_hierarchy = 'date'
     list_per_page = 25
     actions = ['mark_as_paid', 'mark_as_verified', 'send_confirmation_email']
@@ -95,7 +97,7 @@ class BookingAdmin(admin.ModelAdmin):
         ('Vehicle Information', {
             'fields': (
                 'vehicle_make', 'vehicle_model', 'vehicle_year',
-                'vehicle_registration', 'vehicle_mileage'
+                'vehicle_registration', 'vehicle_mileage', 'vehicle'
             ),
             'classes': ('collapse',)
         }),
@@ -186,7 +188,9 @@ class BookingAdmin(admin.ModelAdmin):
     
     @admin.action(description='Mark selected bookings as paid')
     def mark_as_paid(self, request, queryset):
+        bookings = list(queryset)  # the filtered changelist may no longer match afterwards
         updated = queryset.update(is_paid=True, payment_status='completed')
+        bookings_updated.send(sender=Booking, bookings=bookings)
         self.message_user(request, f'{updated} bookings marked as paid.')
     
     @admin.action(description='Mark selected bookings as verified')
@@ -205,3 +209,55 @@ admin.site.site_header = "Access Auto Services Admin"
 admin.site.site_title = "Access Auto Services Admin Portal"
 admin.site.index_title = "Welcome to Access Auto Services Administration"
 
+
+@admin.register(PaymentOperation)
+class PaymentOperationAdmin(admin.ModelAdmin):
+    list_display = ['id', 'operation', 'idempotency_key', 'booking', 'status', 'attempts', 'created', 'updated']
+    list_filter = ['operation', 'status', 'created']
+    search_fields = ['idempotency_key', 'request_id']
+    readonly_fields = ['idempotency_key', 'request_id', 'response', 'error', 'created', 'updated']
+    list_per_page = 25
+
+
+class PayoutInline(admin.TabularInline):
+    model = Payout
+    extra = 0
+    fields = ('recipient_email', 'amount', 'currency', 'status', 'payout_item_id', 'error')
+    readonly_fields = ('recipient_email', 'amount', 'currency', 'status', 'payout_item_id', 'error')
+    can_delete = False
+
+
+@admin.register(PayoutBatch)
+class PayoutBatchAdmin(admin.ModelAdmin):
+    list_display = ['id', 'sender_batch_id', 'payout_batch_id', 'status', 'item_count', 'submitted_at', 'last_polled_at']
+    list_filter = ['status', 'created']
+    search_fields = ['sender_batch_id', 'payout_batch_id']
+    readonly_fields = ['sender_batch_id', 'payout_batch_id', 'item_count', 'error', 'submitted_at', 'last_polled_at', 'created', 'updated']
+    inlines = [PayoutInline]
+    list_per_page = 25
+
+
+@admin.register(Payout)
+class PayoutAdmin(admin.ModelAdmin):
+    list_display = ['id', 'recipient_email', 'amount', 'currency', 'status', 'batch', 'created']
+    list_filter = ['status', 'currency', 'created']
+    search_fields = ['recipient_email', 'sender_item_id', 'payout_item_id']
+    readonly_fields = ['sender_item_id', 'payout_item_id', 'batch', 'error', 'created', 'updated']
+    list_per_page = 25
+
+
+@admin.register(WebhookEvent)
+class WebhookEventAdmin(admin.ModelAdmin):
+    list_display = ['id', 'event_type', 'resource_id', 'status', 'received_at', 'processed_at']
+    list_filter = ['status', 'event_type', 'received_at']
+    search_fields = ['event_id', 'resource_id']
+    readonly_fields = ['event_id', 'event_type', 'resource_id', 'payload', 'headers', 'error', 'received_at', 'processed_at']
+    list_per_page = 25
+
+
+@admin.register(ReconciliationRun)
+class ReconciliationRunAdmin(admin.ModelAdmin):
+    list_display = ['id', 'status', 'checked', 'updated', 'errors', 'started_at', 'finished_at']
+    list_filter = ['status', 'started_at']
+    readonly_fields = ['status', 'last_booking_id', 'checked', 'updated', 'errors', 'summary', 'started_at', 'finished_at']
+    list_per_page = 25
@@ -0,0 +1,311 @@
+import json
+import logging
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.contrib.auth.models import AnonymousUser
+from django.db import transaction
+from django.http import JsonResponse
+from django.utils.decorators import method_decorator
+from django.views import View
+from django.views.decorators.csrf import csrf_exempt
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.authentication import JWTAuthentication
+
+from .models import Booking
+from .paypal_async import async_paypal_api
+from .paypal_utils import PayPalUnavailable
+from .idempotency import (
+    run_idempotent_async,
+    create_order_key,
+    capture_order_key,
+    order_replay_window,
+    OperationInProgress,
+)
+from .views import PaymentCaptureAPIView
+
+logger = logging.getLogger(__name__)
+
+
+def _authenticate(request):
+    """Resolve the JWT user the same way the DRF views do"""
+    result = JWTAuthentication().authenticate(request)
+    return result[0] if result else AnonymousUser()
+
+
+def _parse_body(request):
+    if not request.body:
+        return {}
+    if request.content_type == 'application/json':
+        return json.loads(request.body)
+    return request.POST.dict()
+
+
+async def _get_booking(user, booking_id, customer_email):
+    bookings = Booking.objects.select_related('service')
+    if user.is_authenticated:
+        return await bookings.aget(id=booking_id, user=user)
+    return await bookings.aget(id=booking_id, customer_email=customer_email)
+
+
+def _save_with_confirmation(booking):
+    """Save a captured booking and queue its confirmation email in one transaction"""
+    with transaction.atomic():
+        booking.save()
+        PaymentCaptureAPIView()._send_booking_confirmation_email(booking, payment_type='paypal')
+
+
+def _missing_params_response(missing_params, log_prefix, data):
+    error_msg = f"Missing required parameters: {', '.join(missing_params)}"
+    logger.error(f"{log_prefix} failed: {error_msg}. Request data: {data}")
+    return JsonResponse({
+        "error": f"Missing {missing_params[0]}" if len(missing_params) == 1 else error_msg,
+        "missing_parameters": missing_params
+    }, status=400)
+
+
+def _paypal_unavailable_response(exc):
+    response = JsonResponse({
+        "error": "PayPal is temporarily unavailable. Please try again shortly.",
+        "retry_after": exc.retry_after
+    }, status=503)
+    if exc.retry_after:
+        response['Retry-After'] = str(exc.retry_after)
+    return response
+
+
+def _operation_in_progress_response():
+    return JsonResponse({
+        "error": "This payment is already being processed. Please wait a moment."
+    }, status=409)
+
+
+@method_decorator(csrf_exempt, name='dispatch')
+class PayPalCreateOrderAsyncView(View):
+    """Async variant of PayPalCreateOrderAPIView, used when running under ASGI"""
+
+    async def post(self, request):
+        try:
+            user = await sync_to_async(_authenticate)(request)
+            data = _parse_body(request)
+        except AuthenticationFailed as e:
+            return JsonResponse({"detail": str(e.detail)}, status=401)
+        except ValueError:
+            return JsonResponse({"error": "Invalid JSON body"}, status=400)
+
+        booking_id = data.get('booking_id')
+        customer_email = data.get('customer_email')  # For anonymous users
+
+        logger.info(f"PayPal create order request - booking_id: {booking_id}, customer_email: {customer_email}")
+
+        missing_params = []
+        if not booking_id:
+            missing_params.append('booking_id')
+        if not user.is_authenticated and not customer_email:
+            missing_params.append('customer_email')
+        if missing_params:
+            return _missing_params_response(missing_params, "PayPal create order", data)
+
+        try:
+            booking = await _get_booking(user, booking_id, customer_email)
+        except Booking.DoesNotExist:
+            logger.error(f"PayPal create order failed: Booking {booking_id} not found")
+            return JsonResponse({"error": "Booking not found"}, status=404)
+
+        if booking.is_paid:
+            logger.warning(f"PayPal create order failed: Booking {booking_id} is already paid")
+            return JsonResponse({"error": "Booking is already paid"}, status=400)
+
+        try:
+            amount = float(booking.payment_amount) if booking.payment_amount else float(booking.service.price)
+            if amount <= 0:
+                logger.error(f"PayPal create order failed: Invalid amount {amount} for booking {booking_id}")
+                return JsonResponse({"error": "Invalid payment amount"}, status=400)
+
+            description = f"Booking for {booking.service.name} on {booking.date}"
+
+            order, _ = await run_idempotent_async(
+                create_order_key(booking, amount, booking.payment_currency),
+                'create_order',
+                lambda request_id: async_paypal_api.create_order(
+                    amount=amount,
+                    currency=booking.payment_currency,
+                    description=description,
+                    custom_id=booking.id,
+                    request_id=request_id
+                ),
+                booking=booking,
+                replay_window=order_replay_window(),
+            )
+
+            booking.payment_method = 'paypal'
+            booking.paypal_order_id = order.get('id')
+            booking.payment_status = 'created'
+            await booking.asave()
+
+            logger.info(f"PayPal order created successfully for booking {booking_id}: {order.get('id')}")
+
+            return JsonResponse({
+                "order_id": order.get('id'),
+                "booking_id": booking.id,
+                "amount": amount,
+                "currency": booking.payment_currency,
+                "status": "created"
+            }, status=201)
+
+        except OperationInProgress:
+            return _operation_in_progress_response()
+        except PayPalUnavailable as e:
+            logger.warning(f"PayPal unavailable, order not created for booking {booking_id}")
+            return _paypal_unavailable_response(e)
+        except Exception as e:
+            logger.error(f"Failed to create PayPal order for booking {booking_id}: {str(e)}")
+            return JsonResponse({
+                "error": "Failed to create payment order. Please try again.",
+                "details": str(e) if settings.DEBUG else None
+            }, status=500)
+
+
+@method_decorator(csrf_exempt, name='dispatch')
+class PaymentCaptureAsyncView(View):
+    """
+    Async variant of PaymentCaptureAPIView, used when running under ASGI.
+
+    PayPal create/capture run on the event loop; cash and card payments
+    involve no outbound calls and are handed to the blocking view.
+    """
+
+    async def post(self, request):
+        try:
+            user = await sync_to_async(_authenticate)(request)
+            data = _parse_body(request)
+        except AuthenticationFailed as e:
+            return JsonResponse({"detail": str(e.detail)}, status=401)
+        except ValueError:
+            return JsonResponse({"error": "Invalid JSON body"}, status=400)
+
+        payment_method = data.get('payment_method', 'paypal')
+        if payment_method != 'paypal':
+            return await sync_to_async(PaymentCaptureAPIView.as_view())(request)
+
+        booking_id = data.get('booking_id')
+        paypal_order_id = data.get('paypal_order_id')
+        customer_email = data.get('customer_email')
+        action = data.get('action', 'capture')
+
+        logger.info(f"Payment capture request - booking_id: {booking_id}, action: {action}, payment_method: {payment_method}, customer_email: {customer_email}")
+
+        missing_params = []
+        if not booking_id:
+            missing_params.append('booking_id')
+        if not user.is_authenticated and not customer_email:
+            missing_params.append('customer_email')
+        if action == 'capture' and not paypal_order_id:
+            missing_params.append('paypal_order_id')
+        if missing_params:
+            return _missing_params_response(missing_params, "Payment capture", data)
+
+        try:
+            booking = await _get_booking(user, booking_id, customer_email)
+        except Booking.DoesNotExist:
+            logger.error(f"Payment capture failed: Booking {booking_id} not found")
+            return JsonResponse({"error": "Booking not found"}, status=404)
+
+        if action == 'create':
+            return await self._create_order(booking)
+        return await self._capture_order(booking, paypal_order_id)
+
+    async def _create_order(self, booking):
+        if booking.is_paid:
+            return JsonResponse({"error": "Booking is already paid"}, status=400)
+
+        try:
+            amount = float(booking.payment_amount) if booking.payment_amount else 0
+            description = f"Booking for {booking.service.name} on {booking.date}"
+
+            order, _ = await run_idempotent_async(
+                create_order_key(booking, amount, booking.payment_currency),
+                'create_order',
+                lambda request_id: async_paypal_api.create_order(
+                    amount=amount,
+                    currency=booking.payment_currency,
+                    description=description,
+                    custom_id=booking.id,
+                    request_id=request_id
+                ),
+                booking=booking,
+                replay_window=order_replay_window(),
+            )
+
+            booking.payment_method = 'paypal'
+            booking.paypal_order_id = order.get('id')
+            booking.payment_status = 'created'
+            await booking.asave()
+
+            logger.info(f"PayPal order created for booking {booking.id}: {order.get('id')}")
+
+            return JsonResponse({
+                "order_id": order.get('id'),
+                "booking_id": booking.id,
+                "amount": amount,
+                "currency": booking.payment_currency,
+                "payment_method": "paypal"
+            }, status=201)
+
+        except OperationInProgress:
+            return _operation_in_progress_response()
+        except PayPalUnavailable as e:
+            logger.warning(f"PayPal unavailable, order not created for booking {booking.id}")
+            return _paypal_unavailable_response(e)
+        except Exception as e:
+            logger.error(f"Failed to create PayPal order for booking {booking.id}: {e}")
+            return JsonResponse({
+                "error": "Failed to create payment order. Please try again."
+            }, status=500)
+
+    async def _capture_order(self, booking, paypal_order_id):
+        try:
+            capture_result, replayed = await run_idempotent_async(
+                capture_order_key(booking, paypal_order_id),
+                'capture_order',
+                lambda request_id: async_paypal_api.capture_order(paypal_order_id, request_id=request_id),
+                booking=booking,
+            )
+
+            capture_id = None
+            if capture_result.get('purchase_units'):
+                payments = capture_result['purchase_units'][0].get('payments', {})
+                captures = payments.get('captures', [])
+                if captures:
+                    capture_id = captures[0].get('id')
+
+            already_recorded = replayed and booking.is_paid and booking.paypal_order_id == paypal_order_id
+            if not already_recorded:
+                booking.payment_method = 'paypal'
+                booking.payment_status = 'completed'
+                booking.is_paid = True
+                booking.paypal_order_id = paypal_order_id
+                booking.paypal_transaction_id = capture_id or paypal_order_id
+                await sync_to_async(_save_with_confirmation)(booking)
+
+                logger.info(f"Payment captured for booking {booking.id}: {capture_id}")
+
+            return JsonResponse({
+                "message": "Payment captured successfully!",
+                "transaction_id": booking.paypal_transaction_id,
+                "booking_id": booking.id,
+                "booking_status": "confirmed",
+                "payment_status": "completed",
+                "payment_method": "paypal"
+            }, status=200)
+
+        except OperationInProgress:
+            return _operation_in_progress_response()
+        except PayPalUnavailable as e:
+            logger.warning(f"PayPal unavailable, capture skipped for order {paypal_order_id}")
+            return _paypal_unavailable_response(e)
+        except Exception as e:
+            logger.error(f"PayPal capture failed for order {paypal_order_id}: {e}")
+            return JsonResponse({
+                "error": "Payment capture failed. Please try again."
+            }, status=400)
@@ -0,0 +1,301 @@
+"""
+Stand-in for the PayPal REST API, for load and integration testing.
+
+Implements the endpoints PayPalAPI uses (OAuth token, orders, payouts and
+webhook verification) with in-memory state. Latency, server errors and
+429 rate limiting can be injected to reproduce production behaviour.
+Point PAYPAL_API_BASE at it, e.g. via ``manage.py run_fake_paypal``.
+"""
+import json
+import logging
+import random
+import re
+import threading
+import time
+import uuid
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs
+
+logger = logging.getLogger(__name__)
+
+ROUTES = [
+    ('POST', re.compile(r'^/v1/oauth2/token$'), 'token'),
+    ('POST', re.compile(r'^/v2/checkout/orders$'), 'create_order'),
+    ('POST', re.compile(r'^/v2/checkout/orders/(?P<order_id>[^/]+)/capture$'), 'capture_order'),
+    ('GET', re.compile(r'^/v2/checkout/orders/(?P<order_id>[^/]+)$'), 'get_order'),
+    ('POST', re.compile(r'^/v1/payments/payouts$'), 'create_payout'),
+    ('GET', re.compile(r'^/v1/payments/payouts/(?P<batch_id>[^/]+)$'), 'get_payout'),
+    ('POST', re.compile(r'^/v1/notifications/verify-webhook-signature$'), 'verify_webhook'),
+]
+
+
+class FakePayPalState:
+    """Orders, payout batches and tokens held by a FakePayPalServer"""
+
+    def __init__(self, token_ttl=32400, auto_approve=True):
+        self.token_ttl = token_ttl
+        self.auto_approve = auto_approve
+        self.tokens = {}
+        self.orders = {}
+        self.payouts = {}
+        self.request_ids = {}  # PayPal-Request-Id -> stored (status, body)
+        self.calls = Counter()
+        self.lock = threading.Lock()
+
+    def reset(self):
+        with self.lock:
+            self.tokens.clear()
+            self.orders.clear()
+            self.payouts.clear()
+            self.request_ids.clear()
+            self.calls.clear()
+
+
+def _new_id(prefix=''):
+    return prefix + uuid.uuid4().hex[:17].upper()
+
+
+class FakePayPalHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'  # keep-alive, like PayPal
+
+    def log_message(self, format, *args):
+        logger.debug(f"fake PayPal: {format % args}")
+
+    def do_GET(self):
+        self._dispatch('GET')
+
+    def do_POST(self):
+        self._dispatch('POST')
+
+    def _dispatch(self, method):
+        server = self.server
+        url = urlparse(self.path)
+        length = int(self.headers.get('Content-Length') or 0)
+        raw_body = self.rfile.read(length) if length else b''
+
+        for route_method, pattern, name in ROUTES:
+            match = pattern.match(url.path)
+            if route_method == method and match:
+                break
+        else:
+            return self._send(404, {'name': 'RESOURCE_NOT_FOUND', 'message': f'No route for {method} {url.path}'})
+
+        with server.state.lock:
+            server.state.calls[name] += 1
+
+        delay = server.latency + random.uniform(0, server.jitter)
+        if delay:
+            time.sleep(delay)
+
+        if server.rate_limit_rate and random.random() < server.rate_limit_rate:
+            return self._send(429, {'name': 'RATE_LIMIT_REACHED', 'message': 'Too many requests'},
+                              headers={'Retry-After': str(server.retry_after)})
+        if server.error_rate and random.random() < server.error_rate:
+            return self._send(500, {'name': 'INTERNAL_SERVER_ERROR', 'message': 'Injected failure'})
+
+        if name != 'token' and not self._authorized():
+            return self._send(401, {'error': 'invalid_token', 'error_description': 'Token signature verification failed'})
+
+        try:
+            body = json.loads(raw_body) if raw_body and name != 'token' else {}
+        except ValueError:
+            return self._send(400, {'name': 'INVALID_REQUEST', 'message': 'Request is not well-formed'})
+
+        request_id = self.headers.get('PayPal-Request-Id')
+        if request_id and method == 'POST':
+            with server.state.lock:
+                stored = server.state.request_ids.get((name, request_id))
+            if stored:
+                return self._send(*stored)
+
+        status, payload = getattr(self, f'_{name}')(body, query=parse_qs(url.query), **match.groupdict())
+
+        if request_id and method == 'POST' and status < 300:
+            with server.state.lock:
+                server.state.request_ids[(name, request_id)] = (status, payload)
+        return self._send(status, payload)
+
+    def _authorized(self):
+        auth = self.headers.get('Authorization', '')
+        if not auth.startswith('Bearer '):
+            return False
+        with self.server.state.lock:
+            expires_at = self.server.state.tokens.get(auth[len('Bearer '):])
+        return expires_at is not None and expires_at > time.time()
+
+    def _send(self, status, payload, headers=None):
+        data = json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(data)))
+        self.send_header('Paypal-Debug-Id', uuid.uuid4().hex[:13])
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _base_url(self):
+        host, port = self.server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    # Endpoints
+
+    def _token(self, body, query):
+        state = self.server.state
+        token = f"A21AA{uuid.uuid4().hex}"
+        with state.lock:
+            state.tokens[token] = time.time() + state.token_ttl
+        return 200, {
+            'scope': 'https://uri.paypal.com/services/payments/payment',
+            'access_token': token,
+            'token_type': 'Bearer',
+            'app_id': 'APP-FAKE',
+            'expires_in': state.token_ttl,
+            'nonce': uuid.uuid4().hex,
+        }
+
+    def _create_order(self, body, query):
+        units = body.get('purchase_units') or []
+        if body.get('intent') != 'CAPTURE' or not units:
+            return 422, {'name': 'UNPROCESSABLE_ENTITY', 'message': 'intent and purchase_units are required'}
+
+        order_id = _new_id()
+        order = {
+            'id': order_id,
+            'intent': 'CAPTURE',
+            'status': 'APPROVED' if self.server.state.auto_approve else 'CREATED',
+            'purchase_units': units,
+            'create_time': time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime()),
+            'links': [
+                {'href': f"{self._base_url()}/v2/checkout/orders/{order_id}", 'rel': 'self', 'method': 'GET'},
+                {'href': f"https://www.sandbox.paypal.com/checkoutnow?token={order_id}", 'rel': 'approve', 'method': 'GET'},
+                {'href': f"{self._base_url()}/v2/checkout/orders/{order_id}/capture", 'rel': 'capture', 'method': 'POST'},
+            ],
+        }
+        with self.server.state.lock:
+            self.server.state.orders[order_id] = order
+        return 201, {'id': order_id, 'status': 'CREATED', 'links': order['links']}
+
+    def _capture_order(self, body, query, order_id):
+        state = self.server.state
+        with state.lock:
+            order = state.orders.get(order_id)
+            if order is None:
+                return 404, {'name': 'RESOURCE_NOT_FOUND', 'message': f'Order {order_id} does not exist'}
+            if order['status'] == 'COMPLETED':
+                return 422, {'name': 'UNPROCESSABLE_ENTITY', 'details': [{'issue': 'ORDER_ALREADY_CAPTURED'}]}
+            if order['status'] != 'APPROVED':
+                return 422, {'name': 'UNPROCESSABLE_ENTITY', 'details': [{'issue': 'ORDER_NOT_APPROVED'}]}
+
+            unit = order['purchase_units'][0]
+            capture_id = _new_id()
+            unit['payments'] = {'captures': [{
+                'id': capture_id,
+                'status': 'COMPLETED',
+                'amount': unit.get('amount'),
+                'custom_id': unit.get('custom_id'),
+                'final_capture': True,
+                'links': [
+                    {'href': f"{self._base_url()}/v2/payments/captures/{capture_id}", 'rel': 'self', 'method': 'GET'},
+                    {'href': f"{self._base_url()}/v2/checkout/orders/{order_id}", 'rel': 'up', 'method': 'GET'},
+                ],
+            }]}
+            order['status'] = 'COMPLETED'
+            order['payer'] = {'email_address': 'buyer@example.com', 'payer_id': 'FAKEPAYER'}
+            return 201, json.loads(json.dumps(order))
+
+    def _get_order(self, body, query, order_id):
+        with self.server.state.lock:
+            order = self.server.state.orders.get(order_id)
+            if order is None:
+                return 404, {'name': 'RESOURCE_NOT_FOUND', 'message': f'Order {order_id} does not exist'}
+            return 200, json.loads(json.dumps(order))
+
+    def _create_payout(self, body, query):
+        header = body.get('sender_batch_header') or {}
+        items = body.get('items') or []
+        if not header.get('sender_batch_id') or not items:
+            return 422, {'name': 'VALIDATION_ERROR', 'message': 'sender_batch_id and items are required'}
+
+        batch_id = _new_id()
+        batch = {
+            'batch_header': {
+                'payout_batch_id': batch_id,
+                'batch_status': 'SUCCESS',
+                'sender_batch_header': header,
+            },
+            'items': [{
+                'payout_item_id': _new_id(),
+                'transaction_status': 'SUCCESS',
+                'payout_batch_id': batch_id,
+                'payout_item': item,
+            } for item in items],
+        }
+        with self.server.state.lock:
+            self.server.state.payouts[batch_id] = batch
+        return 201, {'batch_header': {
+            'payout_batch_id': batch_id,
+            'batch_status': 'PENDING',
+            'sender_batch_header': header,
+        }}
+
+    def _get_payout(self, body, query, batch_id):
+        with self.server.state.lock:
+            batch = self.server.state.payouts.get(batch_id)
+        if batch is None:
+            return 404, {'name': 'RESOURCE_NOT_FOUND', 'message': f'Batch {batch_id} does not exist'}
+
+        page = int(query.get('page', ['1'])[0])
+        page_size = int(query.get('page_size', ['1000'])[0])
+        items = batch['items']
+        total_pages = max(1, -(-len(items) // page_size))
+        return 200, {
+            'batch_header': batch['batch_header'],
+            'items': items[(page - 1) * page_size:page * page_size],
+            'total_pages': total_pages,
+        }
+
+    def _verify_webhook(self, body, query):
+        missing = [field for field in ('transmission_id', 'transmission_sig', 'webhook_id', 'webhook_event') if not body.get(field)]
+        return 200, {'verification_status': 'FAILURE' if missing else 'SUCCESS'}
+
+
+class FakePayPalServer(ThreadingHTTPServer):
+    """
+    Threaded fake PayPal API.
+
+    ``latency`` (+ up to ``jitter``) seconds is added to every request;
+    ``error_rate`` and ``rate_limit_rate`` are the fractions of requests
+    answered with a 500 or a 429 carrying ``Retry-After: retry_after``.
+    """
+    daemon_threads = True
+
+    def __init__(self, host='127.0.0.1', port=8081, latency=0.0, jitter=0.0, error_rate=0.0,
+                 rate_limit_rate=0.0, retry_after=1, token_ttl=32400, auto_approve=True):
+        super().__init__((host, port), FakePayPalHandler)
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.rate_limit_rate = rate_limit_rate
+        self.retry_after = retry_after
+        self.state = FakePayPalState(token_ttl=token_ttl, auto_approve=auto_approve)
+        self._thread = None
+
+    @property
+    def url(self):
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self):
+        """Serve from a background thread (for tests and benchmarks)"""
+        self._thread = threading.Thread(target=self.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.shutdown()
+        self.server_close()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
@@ -0,0 +1,126 @@
+import logging
+from datetime import timedelta
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+
+from .models import PaymentOperation
+
+logger = logging.getLogger(__name__)
+
+
+class OperationInProgress(Exception):
+    """Another request is currently running the same payment operation"""
+
+
+def create_order_key(booking, amount, currency):
+    """One PayPal order per booking and price"""
+    return f"booking-{booking.id}-create-order-{amount}-{currency}"
+
+
+def capture_order_key(booking, order_id):
+    """One capture per booking and PayPal order"""
+    return f"booking-{booking.id}-capture-{order_id}"
+
+
+def _claim(key, operation, booking_id, replay_window):
+    """
+    Claim the ledger row for ``key``.
+
+    Returns (operation_row, stored_response). ``stored_response`` is set when
+    an earlier call already succeeded and can be replayed.
+    """
+    pending_timeout = timedelta(seconds=getattr(settings, 'PAYPAL_IDEMPOTENCY_PENDING_TIMEOUT', 60))
+    now = timezone.now()
+
+    with transaction.atomic():
+        try:
+            with transaction.atomic():
+                op = PaymentOperation.objects.create(
+                    idempotency_key=key,
+                    operation=operation,
+                    booking_id=booking_id,
+                    request_id=key,
+                    attempts=1,
+                )
+            return op, None
+        except IntegrityError:
+            pass
+
+        op = PaymentOperation.objects.select_for_update().get(idempotency_key=key)
+
+        if op.status == 'succeeded':
+            if replay_window is None or now - op.updated <= replay_window:
+                return op, op.response
+            # Result is too old to reuse (e.g. an unapproved PayPal order has
+            # expired), so start a new generation with a fresh request id.
+            op.request_id = f"{key}-{op.attempts + 1}"
+        elif op.status == 'pending' and now - op.updated < pending_timeout:
+            raise OperationInProgress(f"{operation} already in progress for {key}")
+
+        # Failed, stale pending or expired: try again. A retried failure keeps
+        # its request id so PayPal can deduplicate the call on its side.
+        op.status = 'pending'
+        op.attempts += 1
+        op.error = ''
+        op.save(update_fields=['status', 'attempts', 'error', 'request_id', 'updated'])
+        return op, None
+
+
+def _complete(op, response):
+    op.status = 'succeeded'
+    op.response = response
+    op.save(update_fields=['status', 'response', 'updated'])
+
+
+def _fail(op, error):
+    op.status = 'failed'
+    op.error = str(error)
+    op.save(update_fields=['status', 'error', 'updated'])
+
+
+def run_idempotent(key, operation, call, booking=None, replay_window=None):
+    """
+    Run ``call(request_id)`` at most once per idempotency key.
+
+    Returns (response, replayed). A retried request whose earlier call
+    succeeded gets the stored response back without contacting PayPal.
+    Raises OperationInProgress while the same operation is still running.
+    """
+    op, stored = _claim(key, operation, booking.id if booking else None, replay_window)
+    if stored is not None:
+        logger.info(f"Replaying stored {operation} result for {key}")
+        return stored, True
+
+    try:
+        response = call(op.request_id)
+    except Exception as e:
+        _fail(op, e)
+        raise
+
+    _complete(op, response)
+    return response, False
+
+
+async def run_idempotent_async(key, operation, call, booking=None, replay_window=None):
+    """Async version of run_idempotent; ``call`` is a coroutine function"""
+    op, stored = await sync_to_async(_claim)(key, operation, booking.id if booking else None, replay_window)
+    if stored is not None:
+        logger.info(f"Replaying stored {operation} result for {key}")
+        return stored, True
+
+    try:
+        response = await call(op.request_id)
+    except Exception as e:
+        await sync_to_async(_fail)(op, e)
+        raise
+
+    await sync_to_async(_complete)(op, response)
+    return response, False
+
+
+def order_replay_window():
+    """How long a created PayPal order is handed out again on retry"""
+    return timedelta(seconds=getattr(settings, 'PAYPAL_ORDER_REPLAY_WINDOW', 3 * 60 * 60))
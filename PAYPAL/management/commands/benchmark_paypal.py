@@ -0,0 +1,90 @@
+import statistics
+import time
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlparse
+
+from django.core.management.base import BaseCommand, CommandError
+
+from PAYPAL.fake_server import FakePayPalServer
+from PAYPAL.paypal_utils import PayPalAPI
+
+
+def _percentile(values, pct):
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+class Command(BaseCommand):
+    help = 'Measure PayPal create-order + capture latency and throughput'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--checkouts', type=int, default=200, help='Number of create + capture round trips')
+        parser.add_argument('--concurrency', type=int, default=10, help='Checkouts in flight at once')
+        parser.add_argument(
+            '--fake',
+            action='store_true',
+            help='Start an in-process fake PayPal server instead of using PAYPAL_API_BASE'
+        )
+        parser.add_argument('--latency', type=float, default=0.05, help='Fake server: seconds added to every response')
+        parser.add_argument('--jitter', type=float, default=0.0, help='Fake server: extra random latency')
+        parser.add_argument('--error-rate', type=float, default=0.0, help='Fake server: fraction of 500 responses')
+        parser.add_argument('--rate-limit-rate', type=float, default=0.0, help='Fake server: fraction of 429 responses')
+
+    def handle(self, *args, **options):
+        server = None
+        api = PayPalAPI()
+
+        if options['fake']:
+            server = FakePayPalServer(
+                port=0,
+                latency=options['latency'],
+                jitter=options['jitter'],
+                error_rate=options['error_rate'],
+                rate_limit_rate=options['rate_limit_rate'],
+            ).start()
+            api.api_base = server.url
+        else:
+            host = urlparse(api.api_base).hostname or ''
+            if host == 'api-m.paypal.com' or host == 'api.paypal.com':
+                raise CommandError('Refusing to benchmark against live PayPal; use --fake or a sandbox/local PAYPAL_API_BASE')
+
+        self.stdout.write(f"Benchmarking {options['checkouts']} checkouts against {api.api_base} "
+                          f"with concurrency {options['concurrency']}")
+
+        def checkout(i):
+            started = time.perf_counter()
+            try:
+                order = api.create_order(amount='54.85', custom_id=i)
+                api.capture_order(order['id'])
+                return time.perf_counter() - started, None
+            except Exception as e:
+                return time.perf_counter() - started, e
+
+        started = time.perf_counter()
+        try:
+            with ThreadPoolExecutor(max_workers=options['concurrency']) as executor:
+                results = list(executor.map(checkout, range(options['checkouts'])))
+        finally:
+            if server is not None:
+                server.stop()
+        elapsed = time.perf_counter() - started
+
+        durations = [duration for duration, error in results if error is None]
+        errors = [error for _, error in results if error is not None]
+
+        self.stdout.write(f"  Completed:  {len(durations)}")
+        self.stdout.write(f"  Failed:     {len(errors)}")
+        self.stdout.write(f"  Wall time:  {elapsed:.2f}s")
+        self.stdout.write(f"  Throughput: {len(durations) / elapsed:.1f} checkouts/s")
+        if durations:
+            self.stdout.write(f"  Latency p50: {statistics.median(durations) * 1000:.1f}ms  "
+                              f"p95: {_percentile(durations, 95) * 1000:.1f}ms  "
+                              f"p99: {_percentile(durations, 99) * 1000:.1f}ms  "
+                              f"max: {max(durations) * 1000:.1f}ms")
+        self.stdout.write(f"  Connections: {api.connection_stats()}")
+        self.stdout.write(f"  Circuit breaker: {api.circuit_breaker.status()}")
+        if server is not None:
+            self.stdout.write(f"  Fake server calls: {dict(server.state.calls)}")
+        if errors:
+            self.stdout.write(self.style.WARNING(f"  First error: {errors[0]}"))
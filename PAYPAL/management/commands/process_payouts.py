@@ -0,0 +1,28 @@
+from django.core.management.base import BaseCommand
+
+from PAYPAL.payouts import dispatch_payouts, poll_payout_batches
+
+
+class Command(BaseCommand):
+    help = 'Send queued PayPal payouts in batches and refresh the status of submitted batches'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=None,
+            help='Maximum number of payouts per PayPal batch'
+        )
+        parser.add_argument(
+            '--poll-only',
+            action='store_true',
+            help='Only refresh submitted batches, do not send new ones'
+        )
+
+    def handle(self, *args, **options):
+        if not options['poll_only']:
+            sent = dispatch_payouts(batch_size=options['batch_size'])
+            self.stdout.write(self.style.SUCCESS(f'Sent {sent} payout batch(es)'))
+
+        updated = poll_payout_batches()
+        self.stdout.write(self.style.SUCCESS(f'Updated {updated} payout item(s)'))
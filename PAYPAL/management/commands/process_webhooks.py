@@ -0,0 +1,19 @@
+from django.core.management.base import BaseCommand
+
+from PAYPAL.webhooks import process_webhook_events
+
+
+class Command(BaseCommand):
+    help = 'Verify stored PayPal webhook events and apply them to bookings'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--limit',
+            type=int,
+            default=500,
+            help='Maximum number of events to process'
+        )
+
+    def handle(self, *args, **options):
+        updated = process_webhook_events(limit=options['limit'])
+        self.stdout.write(self.style.SUCCESS(f'Updated {updated} booking(s)'))
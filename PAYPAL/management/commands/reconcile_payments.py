@@ -0,0 +1,63 @@
+from django.core.management.base import BaseCommand
+
+from PAYPAL.reconciliation import reconcile_payments
+
+
+class Command(BaseCommand):
+    help = 'Check unpaid PayPal bookings against their PayPal orders and update their payment status'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--concurrency',
+            type=int,
+            default=None,
+            help='Number of PayPal order lookups in flight at once'
+        )
+        parser.add_argument(
+            '--rate',
+            type=float,
+            default=None,
+            help='Maximum PayPal order lookups per second'
+        )
+        parser.add_argument(
+            '--chunk-size',
+            type=int,
+            default=100,
+            help='Bookings saved (and checkpointed) together'
+        )
+        parser.add_argument(
+            '--limit',
+            type=int,
+            default=None,
+            help='Stop after this many bookings; the next run resumes from there'
+        )
+        parser.add_argument(
+            '--capture-approved',
+            action='store_true',
+            help='Capture orders the buyer approved but that were never captured'
+        )
+        parser.add_argument(
+            '--restart',
+            action='store_true',
+            help='Start from the first booking instead of resuming an unfinished run'
+        )
+
+    def handle(self, *args, **options):
+        run = reconcile_payments(
+            chunk_size=options['chunk_size'],
+            concurrency=options['concurrency'],
+            rate=options['rate'],
+            capture_approved=options['capture_approved'],
+            limit=options['limit'],
+            resume=not options['restart'],
+        )
+
+        self.stdout.write(f"Reconciliation {run.id}: {run.status}")
+        self.stdout.write(f"  Checked: {run.checked}")
+        self.stdout.write(f"  Updated: {run.updated}")
+        self.stdout.write(f"  Errors:  {run.errors}")
+        for outcome, count in sorted(run.summary.items()):
+            self.stdout.write(f"  {outcome}: {count}")
+
+        style = self.style.SUCCESS if run.status == 'completed' else self.style.WARNING
+        self.stdout.write(style(f"Checkpoint at booking {run.last_booking_id}"))
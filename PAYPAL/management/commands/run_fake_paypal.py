@@ -0,0 +1,45 @@
+from django.core.management.base import BaseCommand
+
+from PAYPAL.fake_server import FakePayPalServer
+
+
+class Command(BaseCommand):
+    help = 'Run a local stand-in for the PayPal API (set PAYPAL_API_BASE to its URL)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--host', default='127.0.0.1', help='Interface to listen on')
+        parser.add_argument('--port', type=int, default=8081, help='Port to listen on')
+        parser.add_argument('--latency', type=float, default=0.0, help='Seconds added to every response')
+        parser.add_argument('--jitter', type=float, default=0.0, help='Extra random latency, up to this many seconds')
+        parser.add_argument('--error-rate', type=float, default=0.0, help='Fraction of requests answered with a 500')
+        parser.add_argument('--rate-limit-rate', type=float, default=0.0, help='Fraction of requests answered with a 429')
+        parser.add_argument('--retry-after', type=int, default=1, help='Retry-After seconds sent with 429 responses')
+        parser.add_argument('--token-ttl', type=int, default=32400, help='Lifetime of issued access tokens in seconds')
+        parser.add_argument(
+            '--require-approval',
+            action='store_true',
+            help='Leave new orders as CREATED so captures fail like unapproved PayPal orders'
+        )
+
+    def handle(self, *args, **options):
+        server = FakePayPalServer(
+            host=options['host'],
+            port=options['port'],
+            latency=options['latency'],
+            jitter=options['jitter'],
+            error_rate=options['error_rate'],
+            rate_limit_rate=options['rate_limit_rate'],
+            retry_after=options['retry_after'],
+            token_ttl=options['token_ttl'],
+            auto_approve=not options['require_approval'],
+        )
+
+        self.stdout.write(self.style.SUCCESS(f'Fake PayPal API listening on {server.url}'))
+        self.stdout.write(f'Start Django with PAYPAL_API_BASE={server.url} to use it')
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            server.server_close()
+            self.stdout.write(f"Requests served: {dict(server.state.calls)}")
@@ -0,0 +1,47 @@
+# Generated by Django 4.2.30 on 2026-10-18 02:26
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('PAYPAL', '0010_paymentoperation'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PayoutBatch',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('sender_batch_id', models.CharField(max_length=64, unique=True)),
+                ('payout_batch_id', models.CharField(blank=True, db_index=True, max_length=64)),
+                ('status', models.CharField(db_index=True, default='NEW', max_length=32)),
+                ('item_count', models.PositiveIntegerField(default=0)),
+                ('error', models.TextField(blank=True)),
+                ('submitted_at', models.DateTimeField(blank=True, null=True)),
+                ('last_polled_at', models.DateTimeField(blank=True, null=True)),
+                ('created', models.DateTimeField(auto_now_add=True)),
+                ('updated', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='Payout',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('recipient_email', models.EmailField(max_length=254)),
+                ('amount', models.DecimalField(decimal_places=2, max_digits=10)),
+                ('currency', models.CharField(default='GBP', max_length=3)),
+                ('note', models.CharField(blank=True, max_length=255)),
+                ('sender_item_id', models.CharField(max_length=64, unique=True)),
+                ('payout_item_id', models.CharField(blank=True, max_length=64)),
+                ('status', models.CharField(db_index=True, default='QUEUED', max_length=32)),
+                ('error', models.TextField(blank=True)),
+                ('created', models.DateTimeField(auto_now_add=True)),
+                ('updated', models.DateTimeField(auto_now=True)),
+                ('batch', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='items', to='PAYPAL.payoutbatch')),
+                ('booking', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='payouts', to='PAYPAL.booking')),
+            ],
+        ),
+    ]
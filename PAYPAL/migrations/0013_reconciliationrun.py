@@ -0,0 +1,27 @@
+# Generated by Django 4.2.30 on 2026-10-18 02:30
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('PAYPAL', '0012_webhookevent'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ReconciliationRun',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('status', models.CharField(choices=[('running', 'Running'), ('completed', 'Completed'), ('interrupted', 'Interrupted')], default='running', max_length=16)),
+                ('last_booking_id', models.IntegerField(default=0)),
+                ('checked', models.IntegerField(default=0)),
+                ('updated', models.IntegerField(default=0)),
+                ('errors', models.IntegerField(default=0)),
+                ('summary', models.JSONField(default=dict)),
+                ('started_at', models.DateTimeField(auto_now_add=True)),
+                ('finished_at', models.DateTimeField(blank=True, null=True)),
+            ],
+        ),
+    ]
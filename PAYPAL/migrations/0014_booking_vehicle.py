@@ -0,0 +1,20 @@
+# Generated by Django 4.2.30 on 2026-10-18 02:43
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('DVLAA', '0006_vehicle'),
+        ('PAYPAL', '0013_reconciliationrun'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='booking',
+            name='vehicle',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='bookings', to='DVLAA.vehicle'),
+        ),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 4.2.30 on 2026-10-18 02:47
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('PAYPAL', '0014_booking_vehicle'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='booking',
+            index=models.Index(fields=['-created', '-id'], name='booking_created_id_idx'),
+        ),
+    ]
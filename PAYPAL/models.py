@@ -24,6 +24,7 @@ class Booking(models.Model):
     vehicle_year = models.CharField(max_length=8, blank=True)
     vehicle_registration = models.CharField(max_length=32, blank=True)
     vehicle_mileage = models.CharField(max_length=32, blank=True)
+    vehicle = models.ForeignKey('DVLAA.Vehicle', on_delete=models.SET_NULL, null=True, blank=True, related_name='bookings')
 
     # Customer info
     customer_first_name = models.CharField(max_length=64, blank=True)
@@ -55,6 +56,124 @@ class Booking(models.Model):
     created = models.DateTimeField(auto_now_add=True)
     updated = models.DateTimeField(auto_now=True)
 
+    class Meta:
+        indexes = [
+            # Admin bookings list: newest first, keyset-paginated
+            models.Index(fields=['-created', '-id'], name='booking_created_id_idx'),
+        ]
+
     def __str__(self):
         user_info = self.user.username if self.user else "Anonymous"
         return f"Booking: {self.service.name} on {self.date} for {user_info}"
+
+
+class PaymentOperation(models.Model):
+    """Ledger of outbound PayPal operations, used to replay retried requests"""
+    STATUS_CHOICES = [
+        ('pending', 'Pending'),
+        ('succeeded', 'Succeeded'),
+        ('failed', 'Failed'),
+    ]
+
+    idempotency_key = models.CharField(max_length=191, unique=True)
+    operation = models.CharField(max_length=32)
+    booking = models.ForeignKey(Booking, on_delete=models.SET_NULL, related_name='payment_operations', null=True, blank=True)
+    request_id = models.CharField(max_length=108)  # PayPal-Request-Id sent with the call
+    status = models.CharField(max_length=16, choices=STATUS_CHOICES, default='pending')
+    attempts = models.PositiveIntegerField(default=0)
+    response = models.JSONField(null=True, blank=True)
+    error = models.TextField(blank=True)
+
+    created = models.DateTimeField(auto_now_add=True)
+    updated = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.operation} {self.idempotency_key} ({self.status})"
+
+
+class PayoutBatch(models.Model):
+    """A multi-item PayPal payout batch"""
+    # Batch statuses reported by PayPal after which nothing changes
+    FINAL_STATUSES = ('SUCCESS', 'DENIED', 'CANCELED', 'FAILED')
+
+    sender_batch_id = models.CharField(max_length=64, unique=True)
+    payout_batch_id = models.CharField(max_length=64, blank=True, db_index=True)
+    # 'NEW' until PayPal accepts the batch, then PayPal's batch_status
+    status = models.CharField(max_length=32, default='NEW', db_index=True)
+    item_count = models.PositiveIntegerField(default=0)
+    error = models.TextField(blank=True)
+    submitted_at = models.DateTimeField(null=True, blank=True)
+    last_polled_at = models.DateTimeField(null=True, blank=True)
+
+    created = models.DateTimeField(auto_now_add=True)
+    updated = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"Payout batch {self.sender_batch_id} ({self.status})"
+
+
+class Payout(models.Model):
+    """A single payout (refund, partner share, ...) waiting for or sent in a batch"""
+    recipient_email = models.EmailField()
+    amount = models.DecimalField(max_digits=10, decimal_places=2)
+    currency = models.CharField(max_length=3, default='GBP')
+    note = models.CharField(max_length=255, blank=True)
+    booking = models.ForeignKey(Booking, on_delete=models.SET_NULL, related_name='payouts', null=True, blank=True)
+    batch = models.ForeignKey(PayoutBatch, on_delete=models.SET_NULL, related_name='items', null=True, blank=True)
+
+    sender_item_id = models.CharField(max_length=64, unique=True)
+    payout_item_id = models.CharField(max_length=64, blank=True)
+    # 'QUEUED' until batched, then PayPal's transaction_status
+    status = models.CharField(max_length=32, default='QUEUED', db_index=True)
+    error = models.TextField(blank=True)
+
+    created = models.DateTimeField(auto_now_add=True)
+    updated = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"Payout {self.amount} {self.currency} to {self.recipient_email} ({self.status})"
+
+
+class WebhookEvent(models.Model):
+    """A PayPal webhook delivery, stored on receipt and processed by a worker"""
+    STATUS_CHOICES = [
+        ('received', 'Received'),
+        ('processed', 'Processed'),
+        ('ignored', 'Ignored'),
+        ('rejected', 'Rejected'),
+        ('failed', 'Failed'),
+    ]
+
+    event_id = models.CharField(max_length=64, unique=True)
+    event_type = models.CharField(max_length=64, db_index=True)
+    resource_id = models.CharField(max_length=64, blank=True)
+    payload = models.JSONField()
+    headers = models.JSONField(default=dict)  # PayPal transmission headers, needed for verification
+    status = models.CharField(max_length=16, choices=STATUS_CHOICES, default='received', db_index=True)
+    error = models.TextField(blank=True)
+    received_at = models.DateTimeField(auto_now_add=True)
+    processed_at = models.DateTimeField(null=True, blank=True)
+
+    def __str__(self):
+        return f"{self.event_type} {self.event_id} ({self.status})"
+
+
+class ReconciliationRun(models.Model):
+    """Progress and results of one reconciliation pass over unpaid PayPal bookings"""
+    STATUS_CHOICES = [
+        ('running', 'Running'),
+        ('completed', 'Completed'),
+        ('interrupted', 'Interrupted'),
+    ]
+
+    status = models.CharField(max_length=16, choices=STATUS_CHOICES, default='running')
+    last_booking_id = models.IntegerField(default=0)  # Checkpoint: bookings up to here are done
+    checked = models.IntegerField(default=0)
+    updated = models.IntegerField(default=0)
+    errors = models.IntegerField(default=0)
+    summary = models.JSONField(default=dict)  # Count of bookings per outcome
+    started_at = models.DateTimeField(auto_now_add=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    def __str__(self):
+        return f"Reconciliation {self.id} ({self.status}, {self.checked} checked)"
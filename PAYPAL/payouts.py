@@ -0,0 +1,184 @@
+import logging
+import uuid
+
+import requests
+from django.conf import settings
+from django.db import connection, transaction
+from django.utils import timezone
+
+from .models import Payout, PayoutBatch
+from .paypal_utils import paypal_api, build_payout_item, PayPalUnavailable, PAYOUT_BATCH_MAX_ITEMS
+
+logger = logging.getLogger(__name__)
+
+# Rate limited (429), timed out (408) or still processing an earlier request
+# with the same PayPal-Request-Id (409): resend later, as for 5xx
+TRANSIENT_STATUS_CODES = {408, 409, 429}
+
+
+def queue_payout(recipient_email, amount, currency='GBP', note='Payment from Access Auto Services', booking=None):
+    """Queue a payout; it is sent with the next batch"""
+    payout = Payout.objects.create(
+        recipient_email=recipient_email,
+        amount=amount,
+        currency=currency,
+        note=note,
+        booking=booking,
+        sender_item_id=f"item-{uuid.uuid4().hex}",
+    )
+    logger.info(f"Payout {payout.id} of {amount} {currency} queued for {recipient_email}")
+    return payout
+
+
+def _batch_size():
+    size = getattr(settings, 'PAYPAL_PAYOUT_BATCH_SIZE', PAYOUT_BATCH_MAX_ITEMS)
+    return max(1, min(size, PAYOUT_BATCH_MAX_ITEMS))
+
+
+def _form_batch(batch_size):
+    """Move up to ``batch_size`` queued payouts into a new batch"""
+    with transaction.atomic():
+        queued = Payout.objects.filter(status='QUEUED', batch__isnull=True).order_by('id')
+        if connection.features.has_select_for_update_skip_locked:
+            # Lets several workers form batches without picking the same rows
+            queued = queued.select_for_update(skip_locked=True)
+        ids = list(queued.values_list('id', flat=True)[:batch_size])
+        if not ids:
+            return None
+
+        batch = PayoutBatch.objects.create(
+            sender_batch_id=f"batch-{uuid.uuid4().hex}",
+            item_count=len(ids),
+        )
+        Payout.objects.filter(id__in=ids).update(batch=batch, status='BATCHED', updated=timezone.now())
+        return batch
+
+
+def _submit_batch(batch):
+    """
+    Send a batch to PayPal. Network failures, 5xx and TRANSIENT_STATUS_CODES
+    leave it as NEW so the next run resends it under the same
+    sender_batch_id/PayPal-Request-Id, which PayPal deduplicates; a batch
+    rejected with any other 4xx (e.g. validation) fails together with its
+    items.
+    """
+    items = list(batch.items.order_by('id'))
+    payload_items = [
+        build_payout_item(item.recipient_email, item.amount, item.currency, item.note, item.sender_item_id)
+        for item in items
+    ]
+
+    try:
+        result = paypal_api.send_payout_batch(payload_items, batch.sender_batch_id)
+    except (PayPalUnavailable, requests.exceptions.ConnectionError, requests.exceptions.Timeout) as e:
+        batch.error = str(e)
+        batch.save(update_fields=['error', 'updated'])
+        logger.warning(f"Payout batch {batch.sender_batch_id} not sent yet, will retry: {e}")
+        return False
+    except requests.exceptions.HTTPError as e:
+        status_code = e.response.status_code if e.response is not None else None
+        if status_code is not None and (status_code >= 500 or status_code in TRANSIENT_STATUS_CODES):
+            batch.error = str(e)
+            batch.save(update_fields=['error', 'updated'])
+            logger.warning(f"Payout batch {batch.sender_batch_id} not accepted yet ({status_code}), will retry")
+            return False
+        error = e.response.text if e.response is not None else str(e)
+        with transaction.atomic():
+            batch.status = 'FAILED'
+            batch.error = error
+            batch.save(update_fields=['status', 'error', 'updated'])
+            batch.items.update(status='FAILED', error=error, updated=timezone.now())
+        logger.error(f"Payout batch {batch.sender_batch_id} rejected by PayPal: {error}")
+        return False
+
+    header = result.get('batch_header', {})
+    batch.payout_batch_id = header.get('payout_batch_id', '')
+    batch.status = header.get('batch_status', 'PENDING')
+    batch.error = ''
+    batch.submitted_at = timezone.now()
+    batch.save(update_fields=['payout_batch_id', 'status', 'error', 'submitted_at', 'updated'])
+    batch.items.update(status='PENDING', updated=timezone.now())
+    return True
+
+
+def dispatch_payouts(batch_size=None):
+    """
+    Send queued payouts to PayPal as multi-item batches.
+
+    Batches that could not be sent earlier are resent first. Returns the
+    number of batches PayPal accepted.
+    """
+    batch_size = batch_size or _batch_size()
+    sent = 0
+
+    for batch in PayoutBatch.objects.filter(status='NEW').order_by('id'):
+        if _submit_batch(batch):
+            sent += 1
+        else:
+            # PayPal is not accepting batches right now; try again next run
+            return sent
+
+    while True:
+        batch = _form_batch(batch_size)
+        if batch is None:
+            break
+        if _submit_batch(batch):
+            sent += 1
+        elif batch.status == 'NEW':
+            break
+
+    return sent
+
+
+def poll_payout_batch(batch):
+    """Refresh a submitted batch and the status of each of its items"""
+    items_by_sender_id = {item.sender_item_id: item for item in batch.items.all()}
+    changed = []
+    page = 1
+
+    while True:
+        result = paypal_api.get_payout_batch(batch.payout_batch_id, page=page)
+        for entry in result.get('items', []):
+            item = items_by_sender_id.get(entry.get('payout_item', {}).get('sender_item_id'))
+            if item is None:
+                continue
+            new_status = entry.get('transaction_status', item.status)
+            errors = entry.get('errors') or {}
+            if new_status != item.status or entry.get('payout_item_id', '') != item.payout_item_id:
+                item.status = new_status
+                item.payout_item_id = entry.get('payout_item_id', '')
+                item.error = errors.get('message', '') if isinstance(errors, dict) else str(errors)
+                changed.append(item)
+
+        total_pages = result.get('total_pages') or 1
+        if page >= total_pages:
+            break
+        page += 1
+
+    now = timezone.now()
+    for item in changed:
+        item.updated = now
+    Payout.objects.bulk_update(changed, ['status', 'payout_item_id', 'error', 'updated'], batch_size=500)
+
+    batch.status = result.get('batch_header', {}).get('batch_status', batch.status)
+    batch.last_polled_at = now
+    batch.save(update_fields=['status', 'last_polled_at', 'updated'])
+    return len(changed)
+
+
+def poll_payout_batches():
+    """Poll every submitted batch that has not reached a final status"""
+    batches = PayoutBatch.objects.exclude(status='NEW').exclude(
+        status__in=PayoutBatch.FINAL_STATUSES
+    ).exclude(payout_batch_id='')
+
+    updated = 0
+    for batch in batches:
+        try:
+            updated += poll_payout_batch(batch)
+        except PayPalUnavailable:
+            logger.warning("PayPal unavailable, stopping payout polling for this run")
+            break
+        except Exception as e:
+            logger.error(f"Failed to poll payout batch {batch.sender_batch_id}: {e}")
+    return updated
@@ -0,0 +1,335 @@
+import asyncio
+import logging
+import time
+import uuid
+import weakref
+from django.conf import settings
+from django.core.cache import cache
+
+try:
+    import httpx
+    HTTPX_AVAILABLE = True
+except ImportError:
+    HTTPX_AVAILABLE = False
+
+from .paypal_utils import (
+    paypal_api,
+    token_request_headers,
+    build_order_payload,
+    build_payout_payload,
+    parse_retry_after,
+    retry_delay,
+    RETRYABLE_STATUS_CODES,
+)
+
+logger = logging.getLogger(__name__)
+
+
+class AsyncPayPalTokenManager:
+    """
+    Asyncio counterpart of PayPalTokenManager.
+
+    Uses the same cache key as the blocking client, so sync and async code
+    in the same deployment share one PayPal token.
+    """
+
+    def __init__(self, fetch_token, cache_key='paypal:access_token', refresh_margin=300):
+        # fetch_token() must be a coroutine returning (token, expires_in_seconds)
+        self._fetch_token = fetch_token
+        self.cache_key = cache_key
+        self.refresh_margin = refresh_margin
+        self._token = None
+        self._expires_at = 0
+        self._locks = weakref.WeakKeyDictionary()
+
+    def _lock(self):
+        # asyncio.Lock is bound to the loop it is first used on
+        loop = asyncio.get_running_loop()
+        lock = self._locks.get(loop)
+        if lock is None:
+            lock = self._locks[loop] = asyncio.Lock()
+        return lock
+
+    def _needs_refresh(self, expires_at):
+        return time.time() >= expires_at - self.refresh_margin
+
+    async def get_token(self, force_refresh=False):
+        """Return a valid access token, refreshing it if needed"""
+        token, expires_at = self._token, self._expires_at
+
+        if token and not force_refresh:
+            if not self._needs_refresh(expires_at):
+                return token
+            lock = self._lock()
+            if time.time() < expires_at and lock.locked():
+                # Another task is already refreshing; keep using this token
+                return token
+
+        async with self._lock():
+            if not force_refresh:
+                if self._token and not self._needs_refresh(self._expires_at):
+                    return self._token
+
+                shared = await self._read_shared()
+                if shared and not self._needs_refresh(shared['expires_at']):
+                    self._token = shared['access_token']
+                    self._expires_at = shared['expires_at']
+                    return self._token
+
+            try:
+                new_token, expires_in = await self._fetch_token()
+            except Exception as e:
+                if force_refresh or not self._token or time.time() >= self._expires_at:
+                    raise
+                logger.warning(f"Early PayPal token refresh failed, using current token: {e}")
+                return self._token
+            self._token = new_token
+            self._expires_at = time.time() + int(expires_in)
+            await self._write_shared(int(expires_in))
+            return new_token
+
+    async def invalidate(self, token=None):
+        """Drop the cached token if it is still ``token`` (or unconditionally)"""
+        if token is not None and token != self._token:
+            return
+        self._token = None
+        self._expires_at = 0
+        try:
+            shared = await cache.aget(self.cache_key)
+            if shared and (token is None or shared.get('access_token') == token):
+                await cache.adelete(self.cache_key)
+        except Exception as e:
+            logger.warning(f"Could not clear shared PayPal token: {e}")
+
+    async def _read_shared(self):
+        try:
+            return await cache.aget(self.cache_key)
+        except Exception as e:
+            logger.warning(f"Could not read shared PayPal token: {e}")
+            return None
+
+    async def _write_shared(self, expires_in):
+        timeout = max(expires_in - self.refresh_margin, 1)
+        try:
+            await cache.aset(self.cache_key, {
+                'access_token': self._token,
+                'expires_at': self._expires_at,
+            }, timeout=timeout)
+        except Exception as e:
+            logger.warning(f"Could not share PayPal token: {e}")
+
+
+class AsyncPayPalAPI:
+    """
+    Non-blocking PayPal API client for async views running under ASGI.
+
+    Offers the same operations as PayPalAPI as coroutines. Each event loop
+    gets one pooled httpx.AsyncClient, so a single process can keep many
+    PayPal calls in flight over a small number of keep-alive connections.
+    """
+
+    def __init__(self, circuit_breaker=None):
+        self.client_id = getattr(settings, 'PAYPAL_CLIENT_ID', None)
+        self.client_secret = getattr(settings, 'PAYPAL_SECRET', None)
+        self.api_base = getattr(settings, 'PAYPAL_API_BASE', 'https://api-m.paypal.com')
+        self.max_connections = getattr(settings, 'PAYPAL_ASYNC_MAX_CONNECTIONS', 100)
+        self.max_keepalive_connections = getattr(settings, 'PAYPAL_HTTP_POOL_MAXSIZE', 10)
+        self.connect_timeout = getattr(settings, 'PAYPAL_HTTP_CONNECT_TIMEOUT', 5)
+        self.read_timeout = getattr(settings, 'PAYPAL_HTTP_READ_TIMEOUT', 30)
+        self.token_manager = AsyncPayPalTokenManager(
+            self._fetch_access_token,
+            cache_key=getattr(settings, 'PAYPAL_TOKEN_CACHE_KEY', 'paypal:access_token'),
+            refresh_margin=getattr(settings, 'PAYPAL_TOKEN_REFRESH_MARGIN', 300),
+        )
+        # Shares the blocking client's breaker so both see PayPal's health
+        self.circuit_breaker = circuit_breaker or paypal_api.circuit_breaker
+        self.max_attempts = getattr(settings, 'PAYPAL_RETRY_MAX_ATTEMPTS', 3)
+        self.backoff_base = getattr(settings, 'PAYPAL_RETRY_BACKOFF_BASE', 0.5)
+        self.backoff_max = getattr(settings, 'PAYPAL_RETRY_BACKOFF_MAX', 8)
+        self._clients = weakref.WeakKeyDictionary()
+
+    def _get_client(self):
+        if not HTTPX_AVAILABLE:
+            raise RuntimeError("httpx is required for the async PayPal client. Install it with 'pip install httpx'.")
+
+        loop = asyncio.get_running_loop()
+        client = self._clients.get(loop)
+        if client is None or client.is_closed:
+            client = httpx.AsyncClient(
+                limits=httpx.Limits(
+                    max_connections=self.max_connections,
+                    max_keepalive_connections=self.max_keepalive_connections,
+                ),
+                timeout=httpx.Timeout(self.read_timeout, connect=self.connect_timeout),
+            )
+            self._clients[loop] = client
+        return client
+
+    async def aclose(self):
+        """Close the connection pool of the running event loop"""
+        client = self._clients.pop(asyncio.get_running_loop(), None)
+        if client is not None:
+            await client.aclose()
+
+    async def get_access_token(self, force_refresh=False):
+        """Get PayPal access token, reusing the cached one while it is valid"""
+        return await self.token_manager.get_token(force_refresh=force_refresh)
+
+    async def _fetch_access_token(self):
+        """Request a new access token from PayPal. Returns (token, expires_in)."""
+        client = self._get_client()
+        try:
+            response = await client.post(
+                f"{self.api_base}/v1/oauth2/token",
+                headers=token_request_headers(self.client_id, self.client_secret),
+                content="grant_type=client_credentials",
+            )
+            response.raise_for_status()
+
+            token_data = response.json()
+            access_token = token_data.get('access_token')
+            expires_in = int(token_data.get('expires_in', 0))
+
+            logger.info(f"PayPal access token obtained successfully (expires in {expires_in}s)")
+            return access_token, expires_in
+
+        except httpx.HTTPStatusError as e:
+            logger.error(f"PayPal API error: {e.response.status_code} - {e.response.text}")
+            if e.response.status_code == 401:
+                logger.error("PayPal authentication failed. Please check your PAYPAL_CLIENT_ID and PAYPAL_SECRET.")
+            raise
+        except httpx.HTTPError as e:
+            logger.error(f"PayPal network error: {e}")
+            raise
+
+    async def _request(self, method, path, headers=None, **kwargs):
+        """
+        Send an authenticated request, retrying once after a 401.
+
+        Retries and circuit breaking follow PayPalAPI._request.
+        """
+        url = f"{self.api_base}{path}"
+        headers = dict(headers or {})
+        client = self._get_client()
+        idempotent = method == "GET" or "PayPal-Request-Id" in headers
+        token_refreshed = False
+        attempt = 0
+
+        while True:
+            attempt += 1
+            self.circuit_breaker.before_call()
+
+            try:
+                token = await self.get_access_token()
+                headers["Authorization"] = f"Bearer {token}"
+                response = await client.request(method, url, headers=headers, **kwargs)
+            except httpx.TransportError as e:
+                self.circuit_breaker.record_failure()
+                can_retry = idempotent or isinstance(e, httpx.ConnectTimeout)
+                delay = retry_delay(attempt, base=self.backoff_base, cap=self.backoff_max)
+                if not can_retry or attempt >= self.max_attempts:
+                    raise
+                logger.warning(f"PayPal {method} {path} failed ({e}), retrying in {delay:.2f}s")
+                await asyncio.sleep(delay)
+                continue
+
+            if response.status_code == 401 and not token_refreshed:
+                logger.warning(f"PayPal rejected access token for {method} {path}, refreshing and retrying")
+                self.circuit_breaker.record_success()
+                await self.token_manager.invalidate(token)
+                token_refreshed = True
+                attempt -= 1
+                continue
+
+            if response.status_code in RETRYABLE_STATUS_CODES:
+                self.circuit_breaker.record_failure()
+                if idempotent and attempt < self.max_attempts:
+                    retry_after = parse_retry_after(response.headers.get("Retry-After"))
+                    delay = retry_delay(attempt, retry_after, base=self.backoff_base, cap=self.backoff_max)
+                    if delay is not None:
+                        logger.warning(f"PayPal {method} {path} returned {response.status_code}, retrying in {delay:.2f}s")
+                        await asyncio.sleep(delay)
+                        continue
+            else:
+                self.circuit_breaker.record_success()
+
+            response.raise_for_status()
+            return response
+
+    async def create_order(self, amount, currency="GBP", description="Booking Payment", custom_id=None, request_id=None):
+        """
+        Create a PayPal order.
+
+        ``request_id`` is sent as PayPal-Request-Id so PayPal returns the same
+        order when the call is repeated; callers should derive it from the
+        booking (see PAYPAL.idempotency). Without one, a random id is used.
+        """
+        try:
+            headers = {
+                "Content-Type": "application/json",
+                "PayPal-Request-Id": request_id or f"order-{uuid.uuid4().hex}"
+            }
+            order_data = build_order_payload(amount, currency, description, custom_id)
+
+            response = await self._request("POST", "/v2/checkout/orders", headers=headers, json=order_data)
+
+            order = response.json()
+            logger.info(f"PayPal order created: {order.get('id')}")
+            return order
+
+        except Exception as e:
+            logger.error(f"Failed to create PayPal order: {e}")
+            raise
+
+    async def capture_order(self, order_id, request_id=None):
+        """Capture a PayPal order (idempotent per order unless request_id is given)"""
+        try:
+            headers = {
+                "Content-Type": "application/json",
+                "PayPal-Request-Id": request_id or f"capture-{order_id}"
+            }
+
+            response = await self._request("POST", f"/v2/checkout/orders/{order_id}/capture", headers=headers)
+
+            capture_data = response.json()
+            logger.info(f"PayPal order captured: {order_id}")
+            return capture_data
+
+        except Exception as e:
+            logger.error(f"Failed to capture PayPal order {order_id}: {e}")
+            raise
+
+    async def get_order_details(self, order_id):
+        """Get PayPal order details"""
+        try:
+            response = await self._request("GET", f"/v2/checkout/orders/{order_id}")
+
+            order_details = response.json()
+            logger.info(f"PayPal order details retrieved: {order_id}")
+            return order_details
+
+        except Exception as e:
+            logger.error(f"Failed to get PayPal order details {order_id}: {e}")
+            raise
+
+    async def send_payout(self, recipient_email, amount, currency="GBP", note="Payment from Access Auto Services"):
+        """Send payout to recipient"""
+        try:
+            payout_data = build_payout_payload(recipient_email, amount, currency, note)
+            headers = {
+                "Content-Type": "application/json"
+            }
+
+            response = await self._request("POST", "/v1/payments/payouts", headers=headers, json=payout_data)
+
+            payout = response.json()
+            logger.info(f"Payout sent: {payout.get('batch_header', {}).get('payout_batch_id')}")
+            return payout
+
+        except Exception as e:
+            logger.error(f"Failed to send payout: {e}")
+            raise
+
+
+# Singleton instance
+async_paypal_api = AsyncPayPalAPI()
@@ -1,20 +1,416 @@
 import requests
 import base64
 import logging
+import os
+import random
+import threading
 import time
+import uuid
+from email.utils import parsedate_to_datetime
 from django.conf import settings
+from django.core.cache import cache
+from requests.adapters import HTTPAdapter
 
 logger = logging.getLogger(__name__)
 
+
+class PayPalHTTPTransport:
+    """
+    Pooled keep-alive HTTP transport for outbound PayPal calls.
+
+    Holds one requests.Session per process (a new one is created after a
+    fork, so gunicorn workers never share sockets with the master) and
+    applies default connect/read timeouts to every request.
+    """
+
+    def __init__(self, pool_connections=4, pool_maxsize=10, connect_timeout=5, read_timeout=30):
+        self.pool_connections = pool_connections
+        self.pool_maxsize = pool_maxsize
+        self.timeout = (connect_timeout, read_timeout)
+        self._session = None
+        self._pid = None
+        self._lock = threading.Lock()
+
+    @property
+    def session(self):
+        if self._session is None or self._pid != os.getpid():
+            with self._lock:
+                if self._session is None or self._pid != os.getpid():
+                    self._session = self._build_session()
+                    self._pid = os.getpid()
+        return self._session
+
+    def _build_session(self):
+        session = requests.Session()
+        adapter = HTTPAdapter(
+            pool_connections=self.pool_connections,
+            pool_maxsize=self.pool_maxsize,
+        )
+        session.mount('https://', adapter)
+        session.mount('http://', adapter)
+        return session
+
+    def request(self, method, url, **kwargs):
+        kwargs.setdefault('timeout', self.timeout)
+        return self.session.request(method, url, **kwargs)
+
+    def stats(self):
+        """Connection reuse counters for the current process"""
+        opened = 0
+        sent = 0
+        if self._session is not None and self._pid == os.getpid():
+            for adapter in set(self._session.adapters.values()):
+                pools = getattr(adapter, 'poolmanager', None)
+                if pools is None:
+                    continue
+                for key in list(pools.pools.keys()):
+                    pool = pools.pools.get(key)
+                    if pool is None:
+                        continue
+                    opened += pool.num_connections
+                    sent += pool.num_requests
+        return {
+            'requests': sent,
+            'connections_opened': opened,
+            'connections_reused': max(sent - opened, 0),
+            'reuse_ratio': round((sent - opened) / sent, 3) if sent else 0.0,
+        }
+
+    def close(self):
+        with self._lock:
+            if self._session is not None:
+                self._session.close()
+            self._session = None
+            self._pid = None
+
+
+def token_request_headers(client_id, client_secret):
+    """Headers for the OAuth client-credentials token request"""
+    credentials = f"{client_id}:{client_secret}"
+    encoded_credentials = base64.b64encode(credentials.encode()).decode()
+    return {
+        "Accept": "application/json",
+        "Accept-Language": "en_US",
+        "Authorization": f"Basic {encoded_credentials}",
+        "Content-Type": "application/x-www-form-urlencoded"
+    }
+
+
+def build_order_payload(amount, currency="GBP", description="Booking Payment", custom_id=None):
+    """Request body for creating a PayPal checkout order"""
+    purchase_unit = {
+        "amount": {
+            "currency_code": currency,
+            "value": str(amount)
+        },
+        "description": description
+    }
+    if custom_id:
+        purchase_unit["custom_id"] = str(custom_id)
+
+    order_data = {
+        "intent": "CAPTURE",
+        "purchase_units": [purchase_unit],
+        "application_context": {
+            "return_url": "https://www.access-auto-services.co.uk/booking/payment-success",
+            "cancel_url": "https://www.access-auto-services.co.uk/booking/payment-cancel",
+            "brand_name": "Access Auto Services",
+            "landing_page": "BILLING",
+            "user_action": "PAY_NOW",
+            "payment_method": {
+                "payer_selected": "PAYPAL",
+                "payee_preferred": "IMMEDIATE_PAYMENT_REQUIRED"
+            }
+        }
+    }
+    return order_data
+
+
+# PayPal accepts at most this many items in one payout batch
+PAYOUT_BATCH_MAX_ITEMS = 15000
+
+
+def build_payout_item(recipient_email, amount, currency="GBP", note="", sender_item_id=None):
+    """One entry of a payout batch's ``items`` list"""
+    return {
+        "recipient_type": "EMAIL",
+        "amount": {
+            "value": str(amount),
+            "currency": currency
+        },
+        "receiver": recipient_email,
+        "note": note,
+        "sender_item_id": sender_item_id or f"item-{uuid.uuid4().hex}"
+    }
+
+
+def build_payout_batch_payload(items, sender_batch_id=None, email_subject="You have a payment from Access Auto Services",
+                               email_message="Payment from Access Auto Services"):
+    """Request body for a PayPal payout batch of already built items"""
+    return {
+        "sender_batch_header": {
+            "sender_batch_id": sender_batch_id or f"batch-{uuid.uuid4().hex}",
+            "email_subject": email_subject,
+            "email_message": email_message
+        },
+        "items": list(items)
+    }
+
+
+def build_payout_payload(recipient_email, amount, currency="GBP", note="Payment from Access Auto Services"):
+    """Request body for a single-item PayPal payout batch"""
+    return build_payout_batch_payload(
+        [build_payout_item(recipient_email, amount, currency, note)],
+        email_message=note,
+    )
+
+
+class PayPalUnavailable(Exception):
+    """Raised instead of calling PayPal while the circuit breaker is open"""
+
+    def __init__(self, message="PayPal is temporarily unavailable", retry_after=None):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+RETRYABLE_STATUS_CODES = {429, 500, 502, 503, 504}
+
+
+def parse_retry_after(value):
+    """Seconds to wait from a Retry-After header (delta-seconds or HTTP date)"""
+    if not value:
+        return None
+    try:
+        return max(float(value), 0)
+    except ValueError:
+        pass
+    try:
+        return max(parsedate_to_datetime(value).timestamp() - time.time(), 0)
+    except (TypeError, ValueError):
+        return None
+
+
+def retry_delay(attempt, retry_after=None, base=0.5, cap=8.0):
+    """
+    Delay before retry number ``attempt`` (1-based): full-jitter exponential
+    backoff, or the server's Retry-After when it sent one. Returns None if
+    the server asks us to wait longer than ``cap``.
+    """
+    if retry_after is not None:
+        return retry_after if retry_after <= cap else None
+    return random.uniform(0, min(cap, base * (2 ** (attempt - 1))))
+
+
+class CircuitBreaker:
+    """
+    Per-process circuit breaker for PayPal calls.
+
+    After ``failure_threshold`` consecutive failures (network errors, 429s
+    and 5xx responses) the circuit opens and calls fail fast with
+    PayPalUnavailable. After ``recovery_timeout`` seconds a single trial
+    call is let through; its outcome closes or re-opens the circuit.
+    """
+
+    CLOSED = 'closed'
+    OPEN = 'open'
+    HALF_OPEN = 'half_open'
+
+    def __init__(self, failure_threshold=5, recovery_timeout=30):
+        self.failure_threshold = failure_threshold
+        self.recovery_timeout = recovery_timeout
+        self._state = self.CLOSED
+        self._failures = 0
+        self._opened_at = None
+        self._trial_in_flight = False
+        self._total_failures = 0
+        self._total_rejected = 0
+        self._lock = threading.Lock()
+
+    def before_call(self):
+        """Raise PayPalUnavailable if the call must not be attempted"""
+        with self._lock:
+            if self._state == self.CLOSED:
+                return
+            remaining = self._opened_at + self.recovery_timeout - time.time()
+            if self._state == self.OPEN and remaining <= 0:
+                self._state = self.HALF_OPEN
+                self._trial_in_flight = False
+            if self._state == self.HALF_OPEN and not self._trial_in_flight:
+                self._trial_in_flight = True
+                return
+            self._total_rejected += 1
+            raise PayPalUnavailable(retry_after=max(int(remaining), 1))
+
+    def record_success(self):
+        with self._lock:
+            if self._state != self.CLOSED:
+                logger.info("PayPal circuit breaker closed")
+            self._state = self.CLOSED
+            self._failures = 0
+            self._opened_at = None
+            self._trial_in_flight = False
+
+    def record_failure(self):
+        with self._lock:
+            self._failures += 1
+            self._total_failures += 1
+            if self._state == self.HALF_OPEN or self._failures >= self.failure_threshold:
+                if self._state != self.OPEN:
+                    logger.error(f"PayPal circuit breaker opened after {self._failures} consecutive failures")
+                self._state = self.OPEN
+                self._opened_at = time.time()
+                self._trial_in_flight = False
+
+    def status(self):
+        """Snapshot of the breaker for monitoring"""
+        with self._lock:
+            retry_in = None
+            if self._state == self.OPEN:
+                retry_in = max(round(self._opened_at + self.recovery_timeout - time.time(), 1), 0)
+            return {
+                'state': self._state,
+                'consecutive_failures': self._failures,
+                'failure_threshold': self.failure_threshold,
+                'recovery_timeout': self.recovery_timeout,
+                'retry_in': retry_in,
+                'total_failures': self._total_failures,
+                'total_rejected': self._total_rejected,
+            }
+
+
+class PayPalTokenManager:
+    """
+    Caches the PayPal OAuth access token and refreshes it before it expires.
+
+    The token lives in process memory and, when a shared cache backend is
+    configured, in the Django cache so every worker process can reuse it.
+    Only one thread per process performs a refresh at a time; while a token
+    that is about to expire is being refreshed, other threads keep using it.
+    """
+
+    def __init__(self, fetch_token, cache_key='paypal:access_token', refresh_margin=300):
+        # fetch_token() must return a (token, expires_in_seconds) tuple
+        self._fetch_token = fetch_token
+        self.cache_key = cache_key
+        self.refresh_margin = refresh_margin
+        self._token = None
+        self._expires_at = 0
+        self._lock = threading.Lock()
+
+    @property
+    def token(self):
+        """Current token, or None if no valid token is held"""
+        if self._token and time.time() < self._expires_at:
+            return self._token
+        return None
+
+    def _needs_refresh(self, expires_at):
+        return time.time() >= expires_at - self.refresh_margin
+
+    def get_token(self, force_refresh=False):
+        """Return a valid access token, refreshing it if needed"""
+        token, expires_at = self._token, self._expires_at
+
+        if token and not force_refresh:
+            if not self._needs_refresh(expires_at):
+                return token
+            if time.time() < expires_at:
+                # Still valid but close to expiry: one thread refreshes while
+                # the others keep using the current token.
+                if not self._lock.acquire(blocking=False):
+                    return token
+                try:
+                    return self._refresh()
+                except Exception as e:
+                    logger.warning(f"Early PayPal token refresh failed, using current token: {e}")
+                    return token
+                finally:
+                    self._lock.release()
+
+        with self._lock:
+            return self._refresh(force_refresh=force_refresh)
+
+    def _refresh(self, force_refresh=False):
+        """Fetch a new token. Must be called with the lock held."""
+        if not force_refresh:
+            # Another thread may have refreshed while we waited for the lock
+            if self._token and not self._needs_refresh(self._expires_at):
+                return self._token
+
+            shared = self._read_shared()
+            if shared and not self._needs_refresh(shared['expires_at']):
+                self._token = shared['access_token']
+                self._expires_at = shared['expires_at']
+                return self._token
+
+        token, expires_in = self._fetch_token()
+        self._token = token
+        self._expires_at = time.time() + int(expires_in)
+        self._write_shared(int(expires_in))
+        return token
+
+    def invalidate(self, token=None):
+        """
+        Drop the cached token. When ``token`` is given, only drop it if it is
+        still the current one, so a burst of 401s for the same stale token
+        leads to a single refresh.
+        """
+        with self._lock:
+            if token is not None and token != self._token:
+                return
+            self._token = None
+            self._expires_at = 0
+            try:
+                shared = cache.get(self.cache_key)
+                if shared and (token is None or shared.get('access_token') == token):
+                    cache.delete(self.cache_key)
+            except Exception as e:
+                logger.warning(f"Could not clear shared PayPal token: {e}")
+
+    def _read_shared(self):
+        try:
+            return cache.get(self.cache_key)
+        except Exception as e:
+            logger.warning(f"Could not read shared PayPal token: {e}")
+            return None
+
+    def _write_shared(self, expires_in):
+        timeout = max(expires_in - self.refresh_margin, 1)
+        try:
+            cache.set(self.cache_key, {
+                'access_token': self._token,
+                'expires_at': self._expires_at,
+            }, timeout=timeout)
+        except Exception as e:
+            logger.warning(f"Could not share PayPal token: {e}")
+
+
 class PayPalAPI:
     """PayPal API integration utility"""
 
-    def __init__(self):
+    def __init__(self, circuit_breaker=None):
         # Load credentials from Django settings (which loads from environment)
         self.client_id = getattr(settings, 'PAYPAL_CLIENT_ID', None)
         self.client_secret = getattr(settings, 'PAYPAL_SECRET', None)
         self.api_base = getattr(settings, 'PAYPAL_API_BASE', 'https://api-m.paypal.com')
-        self.access_token = None
+        self.token_manager = PayPalTokenManager(
+            self._fetch_access_token,
+            cache_key=getattr(settings, 'PAYPAL_TOKEN_CACHE_KEY', 'paypal:access_token'),
+            refresh_margin=getattr(settings, 'PAYPAL_TOKEN_REFRESH_MARGIN', 300),
+        )
+        self.transport = PayPalHTTPTransport(
+            pool_connections=getattr(settings, 'PAYPAL_HTTP_POOL_CONNECTIONS', 4),
+            pool_maxsize=getattr(settings, 'PAYPAL_HTTP_POOL_MAXSIZE', 10),
+            connect_timeout=getattr(settings, 'PAYPAL_HTTP_CONNECT_TIMEOUT', 5),
+            read_timeout=getattr(settings, 'PAYPAL_HTTP_READ_TIMEOUT', 30),
+        )
+        self.circuit_breaker = circuit_breaker or CircuitBreaker(
+            failure_threshold=getattr(settings, 'PAYPAL_CIRCUIT_FAILURE_THRESHOLD', 5),
+            recovery_timeout=getattr(settings, 'PAYPAL_CIRCUIT_RECOVERY_TIMEOUT', 30),
+        )
+        self.max_attempts = getattr(settings, 'PAYPAL_RETRY_MAX_ATTEMPTS', 3)
+        self.backoff_base = getattr(settings, 'PAYPAL_RETRY_BACKOFF_BASE', 0.5)
+        self.backoff_max = getattr(settings, 'PAYPAL_RETRY_BACKOFF_MAX', 8)
 
         # Validate PayPal configuration
         if not self.client_id or not self.client_secret:
@@ -49,29 +445,31 @@ class PayPalAPI:
             "placeholder" in self.client_id.lower()
         )
 
-    def get_access_token(self):
-        """Get PayPal access token"""
+    @property
+    def access_token(self):
+        """Currently cached access token (None if there is no valid token)"""
+        return self.token_manager.token
+
+    def get_access_token(self, force_refresh=False):
+        """Get PayPal access token, reusing the cached one while it is valid"""
+        return self.token_manager.get_token(force_refresh=force_refresh)
+
+    def _fetch_access_token(self):
+        """Request a new access token from PayPal. Returns (token, expires_in)."""
         try:
             url = f"{self.api_base}/v1/oauth2/token"
-            credentials = f"{self.client_id}:{self.client_secret}"
-            encoded_credentials = base64.b64encode(credentials.encode()).decode()
-
-            headers = {
-                "Accept": "application/json",
-                "Accept-Language": "en_US",
-                "Authorization": f"Basic {encoded_credentials}",
-                "Content-Type": "application/x-www-form-urlencoded"
-            }
+            headers = token_request_headers(self.client_id, self.client_secret)
             data = "grant_type=client_credentials"
 
-            response = requests.post(url, headers=headers, data=data)
+            response = self.transport.request("POST", url, headers=headers, data=data)
             response.raise_for_status()
 
             token_data = response.json()
-            self.access_token = token_data.get('access_token')
+            access_token = token_data.get('access_token')
+            expires_in = int(token_data.get('expires_in', 0))
 
-            logger.info("PayPal access token obtained successfully")
-            return self.access_token
+            logger.info(f"PayPal access token obtained successfully (expires in {expires_in}s)")
+            return access_token, expires_in
 
         except requests.exceptions.RequestException as e:
             if hasattr(e, 'response') and e.response is not None:
@@ -85,47 +483,94 @@ class PayPalAPI:
             logger.error(f"Failed to get PayPal access token: {e}")
             raise
 
-    def create_order(self, amount, currency="GBP", description="Booking Payment", custom_id=None):
-        """Create a PayPal order"""
-        try:
-            if not self.access_token:
-                self.get_access_token()
+    def _request(self, method, path, headers=None, **kwargs):
+        """
+        Send an authenticated request to the PayPal API.
+
+        If PayPal rejects the token with a 401 (e.g. it was revoked or rolled
+        over early), the token is invalidated and the call is retried once.
+
+        Idempotent calls (GETs and requests carrying a PayPal-Request-Id) are
+        retried on network errors, 429 and 5xx with jittered exponential
+        backoff, honouring Retry-After. Every attempt goes through the
+        circuit breaker, which raises PayPalUnavailable while PayPal is down.
+        """
+        url = f"{self.api_base}{path}"
+        headers = dict(headers or {})
+        idempotent = method == "GET" or "PayPal-Request-Id" in headers
+        token_refreshed = False
+        attempt = 0
+
+        while True:
+            attempt += 1
+            self.circuit_breaker.before_call()
+
+            try:
+                token = self.get_access_token()
+                headers["Authorization"] = f"Bearer {token}"
+                response = self.transport.request(method, url, headers=headers, **kwargs)
+            except requests.exceptions.RequestException as e:
+                self.circuit_breaker.record_failure()
+                # A connect timeout means the request never reached PayPal
+                can_retry = idempotent or isinstance(e, requests.exceptions.ConnectTimeout)
+                delay = retry_delay(attempt, base=self.backoff_base, cap=self.backoff_max)
+                if not can_retry or attempt >= self.max_attempts:
+                    raise
+                logger.warning(f"PayPal {method} {path} failed ({e}), retrying in {delay:.2f}s")
+                time.sleep(delay)
+                continue
+
+            if response.status_code == 401 and not token_refreshed:
+                logger.warning(f"PayPal rejected access token for {method} {path}, refreshing and retrying")
+                self.circuit_breaker.record_success()
+                self.token_manager.invalidate(token)
+                token_refreshed = True
+                attempt -= 1
+                continue
+
+            if response.status_code in RETRYABLE_STATUS_CODES:
+                self.circuit_breaker.record_failure()
+                if idempotent and attempt < self.max_attempts:
+                    retry_after = parse_retry_after(response.headers.get("Retry-After"))
+                    delay = retry_delay(attempt, retry_after, base=self.backoff_base, cap=self.backoff_max)
+                    if delay is not None:
+                        logger.warning(f"PayPal {method} {path} returned {response.status_code}, retrying in {delay:.2f}s")
+                        time.sleep(delay)
+                        continue
+            else:
+                self.circuit_breaker.record_success()
 
-            url = f"{self.api_base}/v2/checkout/orders"
+            response.raise_for_status()
+            return response
+
+    def connection_stats(self):
+        """Connection reuse metrics for this process's PayPal transport"""
+        return self.transport.stats()
+
+    def health(self):
+        """Circuit breaker state and connection metrics for monitoring"""
+        return {
+            'circuit_breaker': self.circuit_breaker.status(),
+            'connections': self.connection_stats(),
+        }
+
+    def create_order(self, amount, currency="GBP", description="Booking Payment", custom_id=None, request_id=None):
+        """
+        Create a PayPal order.
+
+        ``request_id`` is sent as PayPal-Request-Id so PayPal returns the same
+        order when the call is repeated; callers should derive it from the
+        booking (see PAYPAL.idempotency). Without one, a random id is used.
+        """
+        try:
             headers = {
                 "Content-Type": "application/json",
-                "Authorization": f"Bearer {self.access_token}",
-                "PayPal-Request-Id": f"booking-{amount}-{currency}"
+                "PayPal-Request-Id": request_id or f"order-{uuid.uuid4().hex}"
             }
 
-            purchase_unit = {
-                "amount": {
-                    "currency_code": currency,
-                    "value": str(amount)
-                },
-                "description": description
-            }
-            if custom_id:
-                purchase_unit["custom_id"] = str(custom_id)
-
-            order_data = {
-                "intent": "CAPTURE",
-                "purchase_units": [purchase_unit],
-                "application_context": {
-                    "return_url": "https://www.access-auto-services.co.uk/booking/payment-success",
-                    "cancel_url": "https://www.access-auto-services.co.uk/booking/payment-cancel",
-                    "brand_name": "Access Auto Services",
-                    "landing_page": "BILLING",
-                    "user_action": "PAY_NOW",
-                    "payment_method": {
-                        "payer_selected": "PAYPAL",
-                        "payee_preferred": "IMMEDIATE_PAYMENT_REQUIRED"
-                    }
-                }
-            }
+            order_data = build_order_payload(amount, currency, description, custom_id)
 
-            response = requests.post(url, headers=headers, json=order_data)
-            response.raise_for_status()
+            response = self._request("POST", "/v2/checkout/orders", headers=headers, json=order_data)
 
             order = response.json()
             logger.info(f"PayPal order created: {order.get('id')}")
@@ -141,20 +586,15 @@ class PayPalAPI:
             logger.error(f"Failed to create PayPal order: {e}")
             raise
 
-    def capture_order(self, order_id):
-        """Capture a PayPal order"""
+    def capture_order(self, order_id, request_id=None):
+        """Capture a PayPal order (idempotent per order unless request_id is given)"""
         try:
-            if not self.access_token:
-                self.get_access_token()
-
-            url = f"{self.api_base}/v2/checkout/orders/{order_id}/capture"
             headers = {
                 "Content-Type": "application/json",
-                "Authorization": f"Bearer {self.access_token}"
+                "PayPal-Request-Id": request_id or f"capture-{order_id}"
             }
 
-            response = requests.post(url, headers=headers)
-            response.raise_for_status()
+            response = self._request("POST", f"/v2/checkout/orders/{order_id}/capture", headers=headers)
 
             capture_data = response.json()
             logger.info(f"PayPal order captured: {order_id}")
@@ -167,16 +607,7 @@ class PayPalAPI:
     def get_order_details(self, order_id):
         """Get PayPal order details"""
         try:
-            if not self.access_token:
-                self.get_access_token()
-
-            url = f"{self.api_base}/v2/checkout/orders/{order_id}"
-            headers = {
-                "Authorization": f"Bearer {self.access_token}"
-            }
-
-            response = requests.get(url, headers=headers)
-            response.raise_for_status()
+            response = self._request("GET", f"/v2/checkout/orders/{order_id}")
 
             order_details = response.json()
             logger.info(f"PayPal order details retrieved: {order_id}")
@@ -189,35 +620,13 @@ class PayPalAPI:
     def send_payout(self, recipient_email, amount, currency="GBP", note="Payment from Access Auto Services"):
         """Send payout to recipient"""
         try:
-            if not self.access_token:
-                self.get_access_token()
-
-            url = f"{self.api_base}/v1/payments/payouts"
-            payout_data = {
-                "sender_batch_header": {
-                    "sender_batch_id": f"payout-{int(time.time())}",
-                    "email_subject": "You have a payment from Access Auto Services",
-                    "email_message": note
-                },
-                "items": [{
-                    "recipient_type": "EMAIL",
-                    "amount": {
-                        "value": str(amount),
-                        "currency": currency
-                    },
-                    "receiver": recipient_email,
-                    "note": note,
-                    "sender_item_id": f"item-{int(time.time())}"
-                }]
-            }
+            payout_data = build_payout_payload(recipient_email, amount, currency, note)
 
             headers_req = {
-                "Content-Type": "application/json",
-                "Authorization": f"Bearer {self.access_token}"
+                "Content-Type": "application/json"
             }
 
-            response = requests.post(url, headers=headers_req, json=payout_data)
-            response.raise_for_status()
+            response = self._request("POST", "/v1/payments/payouts", headers=headers_req, json=payout_data)
 
             payout = response.json()
             logger.info(f"Payout sent: {payout.get('batch_header', {}).get('payout_batch_id')}")
@@ -227,5 +636,73 @@ class PayPalAPI:
             logger.error(f"Failed to send payout: {e}")
             raise
 
+    def send_payout_batch(self, items, sender_batch_id, email_subject=None, email_message=None):
+        """
+        Send a multi-item payout batch (see build_payout_item). The batch id
+        doubles as PayPal-Request-Id, so resending the same batch is safe.
+        """
+        if len(items) > PAYOUT_BATCH_MAX_ITEMS:
+            raise ValueError(f"A payout batch can hold at most {PAYOUT_BATCH_MAX_ITEMS} items")
+
+        try:
+            payload = build_payout_batch_payload(items, sender_batch_id)
+            if email_subject:
+                payload["sender_batch_header"]["email_subject"] = email_subject
+            if email_message:
+                payload["sender_batch_header"]["email_message"] = email_message
+
+            headers = {
+                "Content-Type": "application/json",
+                "PayPal-Request-Id": sender_batch_id
+            }
+
+            response = self._request("POST", "/v1/payments/payouts", headers=headers, json=payload)
+
+            payout = response.json()
+            logger.info(f"Payout batch {sender_batch_id} sent with {len(items)} items: "
+                        f"{payout.get('batch_header', {}).get('payout_batch_id')}")
+            return payout
+
+        except Exception as e:
+            logger.error(f"Failed to send payout batch {sender_batch_id}: {e}")
+            raise
+
+    def get_payout_batch(self, payout_batch_id, page=1, page_size=1000):
+        """Get a payout batch with one page of its items"""
+        try:
+            response = self._request(
+                "GET",
+                f"/v1/payments/payouts/{payout_batch_id}",
+                params={"page": page, "page_size": page_size, "total_required": "true"},
+            )
+            return response.json()
+
+        except Exception as e:
+            logger.error(f"Failed to get payout batch {payout_batch_id}: {e}")
+            raise
+
+    def verify_webhook_signature(self, transmission_headers, event, webhook_id):
+        """Ask PayPal whether a webhook delivery is genuine. Returns True/False."""
+        try:
+            payload = {
+                "auth_algo": transmission_headers.get("PAYPAL-AUTH-ALGO"),
+                "cert_url": transmission_headers.get("PAYPAL-CERT-URL"),
+                "transmission_id": transmission_headers.get("PAYPAL-TRANSMISSION-ID"),
+                "transmission_sig": transmission_headers.get("PAYPAL-TRANSMISSION-SIG"),
+                "transmission_time": transmission_headers.get("PAYPAL-TRANSMISSION-TIME"),
+                "webhook_id": webhook_id,
+                "webhook_event": event
+            }
+            headers = {
+                "Content-Type": "application/json"
+            }
+
+            response = self._request("POST", "/v1/notifications/verify-webhook-signature", headers=headers, json=payload)
+            return response.json().get("verification_status") == "SUCCESS"
+
+        except Exception as e:
+            logger.error(f"Failed to verify PayPal webhook {event.get('id')}: {e}")
+            raise
+
 # Singleton instance
 paypal_api = PayPalAPI()
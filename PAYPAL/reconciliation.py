@@ -0,0 +1,193 @@
+import logging
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from common.ratelimit import RateLimiter
+from common.signals import bookings_updated
+
+from .idempotency import run_idempotent, capture_order_key, OperationInProgress
+from .models import Booking, ReconciliationRun
+from .paypal_utils import paypal_api, PayPalUnavailable
+
+logger = logging.getLogger(__name__)
+
+# Bookings whose PayPal payment may have moved on without us hearing about it
+UNSETTLED_STATUSES = ('pending', 'created', 'approved')
+
+
+def _fetch_order(order_id, limiter):
+    """Returns (order, error); order is None when PayPal no longer knows the order"""
+    limiter.wait()
+    try:
+        return paypal_api.get_order_details(order_id), None
+    except requests.exceptions.HTTPError as e:
+        if e.response is not None and e.response.status_code == 404:
+            return None, None
+        return None, str(e)
+    except PayPalUnavailable:
+        raise
+    except Exception as e:
+        return None, str(e)
+
+
+def _capture_details(order):
+    """First capture of an order's first purchase unit, or {}"""
+    units = order.get('purchase_units') or [{}]
+    captures = (units[0].get('payments') or {}).get('captures') or [{}]
+    return captures[0]
+
+
+def _capture_approved(booking, order_id):
+    """Capture an order the buyer approved but never returned to the site for"""
+    result, _ = run_idempotent(
+        capture_order_key(booking, order_id),
+        'capture_order',
+        lambda request_id: paypal_api.capture_order(order_id, request_id=request_id),
+        booking=booking,
+    )
+    return result
+
+
+def _reconcile_booking(booking, order, capture_approved):
+    """
+    Bring ``booking`` in line with its PayPal order. Returns the outcome
+    name; the booking is modified in place unless the outcome is 'unchanged'.
+    """
+    if order is None:
+        booking.payment_status = 'expired'
+        return 'expired'
+
+    order_status = order.get('status')
+    if order_status == 'APPROVED' and capture_approved:
+        order = _capture_approved(booking, booking.paypal_order_id)
+        order_status = order.get('status')
+
+    if order_status == 'COMPLETED':
+        capture = _capture_details(order)
+        capture_status = capture.get('status', 'COMPLETED')
+        if capture_status == 'COMPLETED':
+            booking.is_paid = True
+            booking.payment_status = 'completed'
+            booking.paypal_transaction_id = capture.get('id') or booking.paypal_order_id
+            return 'completed'
+        if capture_status in ('REFUNDED', 'PARTIALLY_REFUNDED'):
+            booking.payment_status = 'refunded'
+            return 'refunded'
+        if capture_status in ('DECLINED', 'FAILED'):
+            booking.payment_status = 'failed'
+            return 'failed'
+        if booking.payment_status == 'pending':
+            return 'unchanged'
+        booking.payment_status = 'pending'
+        return 'capture_pending'
+
+    if order_status == 'APPROVED':
+        if booking.payment_status == 'approved':
+            return 'unchanged'
+        booking.payment_status = 'approved'
+        return 'approved'
+
+    if order_status == 'VOIDED':
+        booking.payment_status = 'cancelled'
+        return 'cancelled'
+
+    # CREATED, SAVED, PAYER_ACTION_REQUIRED: the buyer has not finished yet
+    return 'unchanged'
+
+
+def _current_run(resume):
+    if resume:
+        run = ReconciliationRun.objects.filter(status__in=['running', 'interrupted']).order_by('-id').first()
+        if run is not None:
+            logger.info(f"Resuming reconciliation {run.id} after booking {run.last_booking_id}")
+            return run
+    return ReconciliationRun.objects.create()
+
+
+def reconcile_payments(chunk_size=100, concurrency=None, rate=None, capture_approved=False, limit=None, resume=True):
+    """
+    Check unpaid PayPal bookings against PayPal and record what happened.
+
+    Bookings are processed in id order, ``chunk_size`` at a time. Orders in
+    a chunk are fetched in parallel (at most ``concurrency`` in flight and
+    ``rate`` per second), the chunk's bookings are saved in one bulk update
+    and the run's checkpoint moves past them. An interrupted run is picked
+    up where it stopped unless ``resume`` is False. Orders the buyer
+    approved are only captured when ``capture_approved`` is set.
+
+    Returns the ReconciliationRun holding the summary.
+    """
+    concurrency = concurrency or getattr(settings, 'PAYPAL_RECONCILE_CONCURRENCY', 4)
+    rate = rate if rate is not None else getattr(settings, 'PAYPAL_RECONCILE_MAX_RATE', 5)
+    limiter = RateLimiter(rate)
+    run = _current_run(resume)
+    run.status = 'running'
+    run.save(update_fields=['status'])
+    summary = Counter(run.summary)
+    checked = 0
+
+    candidates = Booking.objects.filter(
+        is_paid=False,
+        payment_status__in=UNSETTLED_STATUSES,
+        paypal_order_id__isnull=False,
+    ).exclude(paypal_order_id='').order_by('id')
+
+    try:
+        with ThreadPoolExecutor(max_workers=concurrency) as executor:
+            while limit is None or checked < limit:
+                size = chunk_size if limit is None else min(chunk_size, limit - checked)
+                chunk = list(candidates.filter(id__gt=run.last_booking_id)[:size])
+                if not chunk:
+                    break
+
+                results = list(executor.map(lambda b: _fetch_order(b.paypal_order_id, limiter), chunk))
+
+                now = timezone.now()
+                changed = []
+                for booking, (order, error) in zip(chunk, results):
+                    if error:
+                        logger.warning(f"Could not reconcile booking {booking.id} ({booking.paypal_order_id}): {error}")
+                        outcome = 'error'
+                    else:
+                        try:
+                            outcome = _reconcile_booking(booking, order, capture_approved)
+                        except (OperationInProgress, requests.exceptions.RequestException) as e:
+                            logger.warning(f"Could not capture approved order for booking {booking.id}: {e}")
+                            outcome = 'error'
+                    summary[outcome] += 1
+                    if outcome not in ('unchanged', 'error'):
+                        booking.updated = now
+                        changed.append(booking)
+
+                with transaction.atomic():
+                    Booking.objects.bulk_update(
+                        changed, ['is_paid', 'payment_status', 'paypal_transaction_id', 'updated'], batch_size=500
+                    )
+                    bookings_updated.send(sender=Booking, bookings=changed)
+                    run.last_booking_id = chunk[-1].id
+                    run.checked += len(chunk)
+                    checked += len(chunk)
+                    run.updated += len(changed)
+                    run.errors = summary['error']
+                    run.summary = dict(summary)
+                    run.save(update_fields=['last_booking_id', 'checked', 'updated', 'errors', 'summary'])
+    except PayPalUnavailable:
+        logger.warning(f"PayPal unavailable, reconciliation {run.id} paused after booking {run.last_booking_id}")
+        run.status = 'interrupted'
+        run.save(update_fields=['status'])
+        return run
+    except BaseException:
+        run.status = 'interrupted'
+        run.save(update_fields=['status'])
+        raise
+
+    run.status = 'completed' if limit is None or checked < limit else 'interrupted'
+    run.finished_at = timezone.now() if run.status == 'completed' else None
+    run.save(update_fields=['status', 'finished_at'])
+    logger.info(f"Reconciliation {run.id} {run.status}: {run.checked} checked, {run.updated} updated, {run.errors} errors")
+    return run
@@ -7,9 +7,13 @@ except ImportError:
     def shared_task(func):
         return func
 
-from django.core.mail import send_mail
+from email_service.email_templates import render
+from email_service.outbox import enqueue_email
 from django.conf import settings
 from .models import Booking
+from .payouts import dispatch_payouts, poll_payout_batches
+from .webhooks import process_webhook_events
+from .reconciliation import reconcile_payments
 
 @shared_task
 def send_booking_reminder(booking_id):
@@ -31,17 +35,19 @@ def send_booking_reminder(booking_id):
         if owner_email and owner_email not in recipient_list:
             recipient_list.append(owner_email)
         
-        send_mail(
-            subject='Booking Reminder',
-            message=(
-                f"Hi {recipient_name},\n\n"
-                f"This is a reminder that your booking for {booking.service.name} "
-                f"is scheduled at {booking.date} {booking.time}.\n\n"
-                "See you soon!"
-            ),
-            from_email=settings.DEFAULT_FROM_EMAIL,
+        subject, message, html_message = render('booking_reminder', {
+            'recipient_name': recipient_name,
+            'service_name': booking.service.name,
+            'date': booking.date,
+            'time': booking.time,
+        })
+        enqueue_email(
+            subject=subject,
+            message=message,
             recipient_list=recipient_list,
-            fail_silently=False,
+            html_message=html_message,
+            category='reminder',
+            reference=f"booking:{booking.id}",
         )
     except Booking.DoesNotExist:
         # Booking not found, silently ignore or log if needed
@@ -56,3 +62,28 @@ def send_booking_reminder_sync(booking_id):
     Synchronous version of send_booking_reminder for when Celery is not available
     """
     return send_booking_reminder(booking_id)
+
+
+@shared_task
+def dispatch_payouts_task():
+    """Send queued payouts to PayPal in multi-item batches"""
+    return dispatch_payouts()
+
+
+@shared_task
+def poll_payout_batches_task():
+    """Refresh the status of submitted payout batches and their items"""
+    return poll_payout_batches()
+
+
+@shared_task
+def process_webhook_events_task():
+    """Verify stored PayPal webhook events and apply them to bookings"""
+    return process_webhook_events()
+
+
+@shared_task
+def reconcile_payments_task():
+    """Check unpaid PayPal bookings against PayPal and fix their payment status"""
+    run = reconcile_payments()
+    return run.summary
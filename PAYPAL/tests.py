@@ -1,3 +1,364 @@
-from django.test import TestCase
+import json
+import threading
+import time
+from datetime import date, timedelta
+from decimal import Decimal
+from unittest import mock
 
-# Create your tests here.
+import requests
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from rest_framework.test import APITestCase
+
+from common.signals import bookings_updated
+from PAYPAL.idempotency import OperationInProgress, run_idempotent, run_idempotent_async
+from PAYPAL.models import Booking, PaymentOperation, PayoutBatch, Service, WebhookEvent
+from PAYPAL.paypal_async import AsyncPayPalTokenManager
+from PAYPAL.paypal_utils import CircuitBreaker, PayPalAPI, PayPalTokenManager, PayPalUnavailable, paypal_api
+from PAYPAL.payouts import dispatch_payouts, queue_payout
+from PAYPAL.webhooks import process_webhook_events
+
+User = get_user_model()
+
+
+class PayPalStatusTests(APITestCase):
+    def test_staff_only(self):
+        response = self.client.get('/api/paypal/status/', secure=True)
+        self.assertEqual(response.status_code, 401)
+
+        self.client.force_authenticate(User.objects.create_user(email='user@example.com'))
+        response = self.client.get('/api/paypal/status/', secure=True)
+        self.assertEqual(response.status_code, 403)
+
+        self.client.force_authenticate(User.objects.create_user(email='staff@example.com', is_staff=True))
+        response = self.client.get('/api/paypal/status/', secure=True)
+        self.assertEqual(response.status_code, 200)
+
+
+class IdempotencyTests(TestCase):
+    key = 'booking-1-create-order-50.00-GBP'
+
+    def setUp(self):
+        self.calls = []
+
+    def _call(self, request_id):
+        self.calls.append(request_id)
+        return {'id': f'ORDER-{len(self.calls)}'}
+
+    def _age(self, seconds):
+        PaymentOperation.objects.filter(idempotency_key=self.key).update(
+            updated=timezone.now() - timedelta(seconds=seconds)
+        )
+
+    def test_replays_within_window(self):
+        window = timedelta(hours=1)
+        first = run_idempotent(self.key, 'create_order', self._call, replay_window=window)
+        self._age(60)
+        second = run_idempotent(self.key, 'create_order', self._call, replay_window=window)
+        self.assertEqual(first, ({'id': 'ORDER-1'}, False))
+        self.assertEqual(second, ({'id': 'ORDER-1'}, True))
+        self.assertEqual(self.calls, [self.key])
+
+    def test_runs_again_after_window(self):
+        window = timedelta(hours=1)
+        run_idempotent(self.key, 'create_order', self._call, replay_window=window)
+        self._age(2 * 60 * 60)
+        response, replayed = run_idempotent(self.key, 'create_order', self._call, replay_window=window)
+        self.assertEqual((response, replayed), ({'id': 'ORDER-2'}, False))
+        # A new generation gets a new PayPal request id
+        self.assertEqual(self.calls, [self.key, f'{self.key}-2'])
+        op = PaymentOperation.objects.get(idempotency_key=self.key)
+        self.assertEqual((op.status, op.attempts, op.response), ('succeeded', 2, {'id': 'ORDER-2'}))
+
+    def test_in_flight_claim_conflicts(self):
+        def reenter(request_id):
+            return run_idempotent(self.key, 'create_order', self._call)
+
+        with self.assertRaises(OperationInProgress):
+            run_idempotent(self.key, 'create_order', reenter)
+        self.assertEqual(self.calls, [])
+
+    def test_stale_claim_is_taken_over(self):
+        PaymentOperation.objects.create(idempotency_key=self.key, operation='create_order',
+                                        request_id=self.key, attempts=1)
+        self._age(10 * 60)
+        response, replayed = run_idempotent(self.key, 'create_order', self._call)
+        self.assertEqual((response, replayed), ({'id': 'ORDER-1'}, False))
+
+    def test_failure_is_recorded_and_retried_with_same_request_id(self):
+        def broken(request_id):
+            self.calls.append(request_id)
+            raise ConnectionError('PayPal unavailable')
+
+        with self.assertRaises(ConnectionError):
+            run_idempotent(self.key, 'create_order', broken)
+        op = PaymentOperation.objects.get(idempotency_key=self.key)
+        self.assertEqual((op.status, op.error), ('failed', 'PayPal unavailable'))
+
+        response, replayed = run_idempotent(self.key, 'create_order', self._call)
+        self.assertEqual(replayed, False)
+        self.assertEqual(self.calls, [self.key, self.key])
+        op.refresh_from_db()
+        self.assertEqual((op.status, op.error, op.attempts), ('succeeded', '', 2))
+
+    async def test_async_replay_and_failure(self):
+        async def call(request_id):
+            self.calls.append(request_id)
+            return {'id': 'ORDER-1'}
+
+        async def broken(request_id):
+            raise ConnectionError('PayPal unavailable')
+
+        first = await run_idempotent_async(self.key, 'create_order', call)
+        second = await run_idempotent_async(self.key, 'create_order', call)
+        self.assertEqual((first[1], second), (False, ({'id': 'ORDER-1'}, True)))
+        self.assertEqual(self.calls, [self.key])
+
+        with self.assertRaises(ConnectionError):
+            await run_idempotent_async('other-key', 'capture', broken)
+        op = await PaymentOperation.objects.aget(idempotency_key='other-key')
+        self.assertEqual(op.status, 'failed')
+
+
+def _response(status_code, body=None):
+    response = requests.Response()
+    response.status_code = status_code
+    response._content = json.dumps(body or {}).encode()
+    return response
+
+
+class TokenManagerTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.fetched = []
+
+    def _fetch(self):
+        time.sleep(0.05)  # Long enough for the other threads to queue up
+        self.fetched.append(f'TOKEN-{len(self.fetched) + 1}')
+        return self.fetched[-1], 3600
+
+    def test_concurrent_callers_fetch_once(self):
+        manager = PayPalTokenManager(self._fetch, cache_key='test:token')
+        tokens = []
+        threads = [threading.Thread(target=lambda: tokens.append(manager.get_token())) for _ in range(5)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(self.fetched, ['TOKEN-1'])
+        self.assertEqual(tokens, ['TOKEN-1'] * 5)
+
+    def _api(self, *responses):
+        responses = list(responses)
+        self.sent = []
+
+        def request(method, url, headers, **kwargs):
+            self.sent.append(headers['Authorization'])
+            return responses.pop(0)
+
+        api = PayPalAPI(circuit_breaker=CircuitBreaker())
+        api.token_manager = PayPalTokenManager(self._fetch, cache_key='test:token')
+        api.transport = mock.Mock(**{'request.side_effect': request})
+        return api
+
+    def test_401_invalidates_token_and_retries_once(self):
+        api = self._api(_response(401), _response(200, {'id': 'ORDER-1'}))
+        self.assertEqual(api.get_order_details('ORDER-1'), {'id': 'ORDER-1'})
+        self.assertEqual(self.sent, ['Bearer TOKEN-1', 'Bearer TOKEN-2'])
+
+        api = self._api(_response(401), _response(401), _response(200))
+        with self.assertRaises(requests.exceptions.HTTPError):
+            api._request('GET', '/v2/checkout/orders/ORDER-1')
+        self.assertEqual(len(self.sent), 2)
+
+
+class CircuitBreakerTests(TestCase):
+    def test_opens_after_threshold_and_half_opens_after_cooldown(self):
+        breaker = CircuitBreaker(failure_threshold=3, recovery_timeout=30)
+        now = time.time()
+        with mock.patch('PAYPAL.paypal_utils.time.time', return_value=now):
+            for _ in range(2):
+                breaker.before_call()
+                breaker.record_failure()
+            self.assertEqual(breaker.status()['state'], CircuitBreaker.CLOSED)
+            breaker.before_call()
+            breaker.record_failure()
+            self.assertEqual(breaker.status()['state'], CircuitBreaker.OPEN)
+            with self.assertRaises(PayPalUnavailable):
+                breaker.before_call()
+
+        with mock.patch('PAYPAL.paypal_utils.time.time', return_value=now + 31):
+            breaker.before_call()  # The one trial call
+            self.assertEqual(breaker.status()['state'], CircuitBreaker.HALF_OPEN)
+            with self.assertRaises(PayPalUnavailable):
+                breaker.before_call()
+            # A failed trial opens the circuit again
+            breaker.record_failure()
+            self.assertEqual(breaker.status()['state'], CircuitBreaker.OPEN)
+
+        with mock.patch('PAYPAL.paypal_utils.time.time', return_value=now + 62):
+            breaker.before_call()
+            breaker.record_success()
+            self.assertEqual(breaker.status()['state'], CircuitBreaker.CLOSED)
+            breaker.before_call()
+
+
+class AsyncTokenManagerTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.responses = [('TOKEN-1', 3600)]
+
+    async def _fetch(self):
+        response = self.responses.pop(0) if self.responses else ConnectionError('PayPal unavailable')
+        if isinstance(response, Exception):
+            raise response
+        return response
+
+    async def test_early_refresh_failure_keeps_current_token(self):
+        # Every token is due for an early refresh, but valid for an hour
+        manager = AsyncPayPalTokenManager(self._fetch, cache_key='test:async-token', refresh_margin=3600)
+        self.assertEqual(await manager.get_token(), 'TOKEN-1')
+        with self.assertLogs('PAYPAL.paypal_async', 'WARNING'):
+            self.assertEqual(await manager.get_token(), 'TOKEN-1')
+
+        with self.assertRaises(ConnectionError):
+            await manager.get_token(force_refresh=True)
+
+        manager._expires_at = time.time() - 1
+        with self.assertRaises(ConnectionError):
+            await manager.get_token()
+
+
+def _http_error(status_code, text='error'):
+    response = requests.Response()
+    response.status_code = status_code
+    response._content = text.encode()
+    return requests.exceptions.HTTPError(f'{status_code} Error', response=response)
+
+
+class PayoutSubmitTests(TestCase):
+    def setUp(self):
+        queue_payout('partner@example.com', Decimal('10.00'))
+        queue_payout('other@example.com', Decimal('5.00'))
+
+    def _dispatch(self, **send):
+        with mock.patch.object(paypal_api, 'send_payout_batch', **send) as send_payout_batch:
+            sent = dispatch_payouts()
+        return sent, send_payout_batch
+
+    def test_accepted(self):
+        sent, _ = self._dispatch(return_value={'batch_header': {'payout_batch_id': 'PB-1', 'batch_status': 'PENDING'}})
+        batch = PayoutBatch.objects.get()
+        self.assertEqual((sent, batch.status, batch.payout_batch_id), (1, 'PENDING', 'PB-1'))
+        self.assertEqual(set(batch.items.values_list('status', flat=True)), {'PENDING'})
+
+    def test_transient_errors_are_retried_with_same_batch_id(self):
+        failures = [requests.exceptions.ConnectionError('reset'), requests.exceptions.Timeout('slow'),
+                    PayPalUnavailable('circuit open'), _http_error(500), _http_error(503),
+                    _http_error(408), _http_error(409), _http_error(429)]
+        for error in failures:
+            sent, _ = self._dispatch(side_effect=error)
+            batch = PayoutBatch.objects.get()
+            self.assertEqual((sent, batch.status), (0, 'NEW'), error)
+            self.assertEqual(set(batch.items.values_list('status', flat=True)), {'BATCHED'})
+
+        sent, send_payout_batch = self._dispatch(return_value={'batch_header': {'payout_batch_id': 'PB-1'}})
+        self.assertEqual(sent, 1)
+        self.assertEqual(send_payout_batch.call_args.args[1], PayoutBatch.objects.get().sender_batch_id)
+
+    def test_validation_error_fails_batch_and_items(self):
+        sent, _ = self._dispatch(side_effect=_http_error(422, 'VALIDATION_ERROR'))
+        batch = PayoutBatch.objects.get()
+        self.assertEqual((sent, batch.status, batch.error), (0, 'FAILED', 'VALIDATION_ERROR'))
+        self.assertEqual(set(batch.items.values_list('status', 'error')), {('FAILED', 'VALIDATION_ERROR')})
+
+        # Failed batches are not resent
+        _, send_payout_batch = self._dispatch(return_value={})
+        send_payout_batch.assert_not_called()
+
+
+SIGNED_HEADERS = {
+    'PAYPAL-AUTH-ALGO': 'SHA256withRSA',
+    'PAYPAL-CERT-URL': 'https://api.paypal.com/cert',
+    'PAYPAL-TRANSMISSION-ID': 'transmission',
+    'PAYPAL-TRANSMISSION-SIG': 'signature',
+    'PAYPAL-TRANSMISSION-TIME': '2026-01-01T10:00:00Z',
+}
+
+
+def _capture_event(event_id, event_type, booking, capture_id='CAP-1'):
+    resource = {'id': capture_id, 'custom_id': str(booking.id)}
+    if event_type == 'PAYMENT.CAPTURE.REFUNDED':
+        resource = {'id': f'REF-{capture_id}',
+                    'links': [{'rel': 'up', 'href': f'https://api.paypal.com/v2/payments/captures/{capture_id}'}]}
+    return {'id': event_id, 'event_type': event_type, 'resource': resource}
+
+
+@override_settings(PAYPAL_WEBHOOK_ID='WH-1')
+class WebhookTests(APITestCase):
+    url = '/api/paypal/webhooks/'
+
+    def setUp(self):
+        service = Service.objects.create(code='mot', name='MOT', price='50.00')
+        self.first, self.second = [
+            Booking.objects.create(service=service, date=date(2026, 1, 1), time='10:00') for _ in range(2)
+        ]
+
+    def _post(self, event, headers=SIGNED_HEADERS):
+        return self.client.post(self.url, event, format='json', secure=True,
+                                headers={name.lower(): value for name, value in headers.items()})
+
+    def _process(self, genuine=True):
+        updated = []
+        receiver = lambda sender, bookings, **kwargs: updated.append(sorted(b.id for b in bookings))
+        bookings_updated.connect(receiver)
+        try:
+            with mock.patch.object(paypal_api, 'verify_webhook_signature', return_value=genuine):
+                count = process_webhook_events()
+        finally:
+            bookings_updated.disconnect(receiver)
+        return count, updated
+
+    def test_duplicate_event_ids_are_stored_once(self):
+        event = _capture_event('WH-EVT-1', 'PAYMENT.CAPTURE.COMPLETED', self.first)
+        self.assertEqual(self._post(event).status_code, 200)
+        self.assertEqual(self._post(event).status_code, 200)
+        self.assertEqual(WebhookEvent.objects.count(), 1)
+
+        self.assertEqual(self._process()[0], 1)
+        self.assertEqual(self._post(event).status_code, 200)
+        self.assertEqual(self._process()[0], 0)
+        self.assertEqual(WebhookEvent.objects.get().status, 'processed')
+
+    def test_unsigned_delivery_is_refused(self):
+        event = _capture_event('WH-EVT-1', 'PAYMENT.CAPTURE.COMPLETED', self.first)
+        self.assertEqual(self._post(event, headers={}).status_code, 400)
+        self.assertFalse(WebhookEvent.objects.exists())
+
+    def test_bad_signature_is_rejected(self):
+        self._post(_capture_event('WH-EVT-1', 'PAYMENT.CAPTURE.COMPLETED', self.first))
+        count, updated = self._process(genuine=False)
+        self.assertEqual((count, updated), (0, [[]]))
+        event = WebhookEvent.objects.get()
+        self.assertEqual((event.status, event.error), ('rejected', 'Signature verification failed'))
+        self.first.refresh_from_db()
+        self.assertFalse(self.first.is_paid)
+
+    def test_bulk_update_and_signal(self):
+        self._post(_capture_event('WH-EVT-1', 'PAYMENT.CAPTURE.COMPLETED', self.first, 'CAP-1'))
+        self._post(_capture_event('WH-EVT-2', 'PAYMENT.CAPTURE.COMPLETED', self.second, 'CAP-2'))
+        # Knows the booking only by the capture id the first event sets
+        self._post(_capture_event('WH-EVT-3', 'PAYMENT.CAPTURE.REFUNDED', self.first, 'CAP-1'))
+
+        count, updated = self._process()
+        self.assertEqual(count, 2)
+        self.assertEqual(updated, [sorted([self.first.id, self.second.id])])
+        self.first.refresh_from_db()
+        self.second.refresh_from_db()
+        self.assertEqual((self.first.is_paid, self.first.payment_status, self.first.paypal_transaction_id),
+                         (False, 'refunded', 'CAP-1'))
+        self.assertEqual((self.second.is_paid, self.second.payment_status), (True, 'completed'))
+        self.assertEqual(set(WebhookEvent.objects.values_list('status', flat=True)), {'processed'})
@@ -1,3 +1,4 @@
+from django.conf import settings
 from django.urls import path
 from .views import (
     ServiceListAPIView, 
@@ -6,15 +7,29 @@ from .views import (
     BookingVerifyAPIView, 
     PaymentCaptureAPIView,
     PayPalCreateOrderAPIView,
-    BookingDebugAPIView
+    BookingDebugAPIView,
+    PayPalStatusAPIView,
+    PayPalWebhookAPIView
 )
 
+# Under ASGI the PayPal checkout endpoints run on the event loop with the
+# async PayPal client; under WSGI the blocking views are used.
+if getattr(settings, 'PAYPAL_ASYNC_VIEWS', False):
+    from .async_views import PayPalCreateOrderAsyncView, PaymentCaptureAsyncView
+    create_order_view = PayPalCreateOrderAsyncView.as_view()
+    capture_payment_view = PaymentCaptureAsyncView.as_view()
+else:
+    create_order_view = PayPalCreateOrderAPIView.as_view()
+    capture_payment_view = PaymentCaptureAPIView.as_view()
+
 urlpatterns = [
     path('services/', ServiceListAPIView.as_view(), name='services-list'),
     path('bookings/', BookingListCreateAPIView.as_view(), name='booking-list-create'),
     path('bookings/<int:booking_id>/', BookingDetailAPIView.as_view(), name='booking-detail'),
     path('bookings/debug/', BookingDebugAPIView.as_view(), name='booking-debug'),
     path('bookings/verify/<str:token>/', BookingVerifyAPIView.as_view(), name='booking-verify'),
-    path('create-order/', PayPalCreateOrderAPIView.as_view(), name='paypal-create-order'),
-    path('capture-payment/', PaymentCaptureAPIView.as_view(), name='paypal-capture-payment'),
+    path('create-order/', create_order_view, name='paypal-create-order'),
+    path('capture-payment/', capture_payment_view, name='paypal-capture-payment'),
+    path('status/', PayPalStatusAPIView.as_view(), name='paypal-status'),
+    path('webhooks/', PayPalWebhookAPIView.as_view(), name='paypal-webhooks'),
 ]
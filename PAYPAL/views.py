@@ -5,27 +5,47 @@ import logging
 from rest_framework import generics, permissions, status
 from rest_framework.response import Response
 from rest_framework.views import APIView
-from django.core.mail import send_mail
 from django.conf import settings
+from django.db import DatabaseError, transaction
 from django.utils import timezone
 
 from .models import Service, Booking
 from .serializers import ServiceSerializer, BookingSerializer
-from .paypal_utils import paypal_api
+from .paypal_utils import paypal_api, PayPalUnavailable
+from .webhooks import store_event, transmission_headers
+from DVLAA.dvla import normalize_registration
+from DVLAA.models import Vehicle
+from email_service.email_templates import render
+from email_service.outbox import enqueue_email
+from email_service.reminders import create_reminder
+from .idempotency import (
+    run_idempotent,
+    create_order_key,
+    capture_order_key,
+    order_replay_window,
+    OperationInProgress,
+)
 
 # Set up logging
 logger = logging.getLogger(__name__)
 
-# Import tasks with error handling
-try:
-    from .tasks import send_booking_reminder
-    CELERY_AVAILABLE = True
-except ImportError:
-    # If Celery is not available, create a dummy function
-    CELERY_AVAILABLE = False
-    def send_booking_reminder(booking_id):
-        logger.warning(f"Celery not available, skipping reminder for booking {booking_id}")
-        pass
+
+def paypal_unavailable_response(exc):
+    """503 returned while the PayPal circuit breaker is open"""
+    response = Response({
+        "error": "PayPal is temporarily unavailable. Please try again shortly.",
+        "retry_after": exc.retry_after
+    }, status=status.HTTP_503_SERVICE_UNAVAILABLE)
+    if exc.retry_after:
+        response['Retry-After'] = str(exc.retry_after)
+    return response
+
+
+def operation_in_progress_response():
+    """409 returned when the same payment operation is already running"""
+    return Response({
+        "error": "This payment is already being processed. Please wait a moment."
+    }, status=status.HTTP_409_CONFLICT)
 
 
 class ServiceListAPIView(generics.ListAPIView):
@@ -98,6 +118,7 @@ class BookingListCreateAPIView(generics.ListCreateAPIView):
                 status=status.HTTP_500_INTERNAL_SERVER_ERROR
             )
 
+    @transaction.atomic
     def perform_create(self, serializer):
         try:
             data = self.request.data
@@ -160,6 +181,11 @@ class BookingListCreateAPIView(generics.ListCreateAPIView):
                 'payment_currency': 'GBP'
             }
 
+            # Link the booking to the vehicle registry when DVLA has been asked about this registration
+            registration = normalize_registration(booking_data['vehicle_registration'])
+            if registration:
+                booking_data['vehicle'] = Vehicle.objects.filter(registration=registration).first()
+
             # Only add card details if payment method is card
             if payment_method == 'card':
                 booking_data.update({
@@ -217,39 +243,12 @@ class BookingListCreateAPIView(generics.ListCreateAPIView):
                         else:
                             vehicle_info = "Not specified"
                         
-                        # Build MOT class information
-                        mot_info = ""
-                        if booking.mot_class:
-                            mot_info = f"MOT Class: {booking.mot_class}\n"
-                        
-                        # Build customer information section
-                        customer_info = ""
+                        # Customer name for the details section
+                        customer_full_name = ""
                         if booking.customer_first_name or booking.customer_last_name:
-                            full_name = f"{booking.customer_first_name or ''} {booking.customer_last_name or ''}".strip()
-                            if full_name:
-                                customer_info += f"Customer: {full_name}\n"
+                            customer_full_name = f"{booking.customer_first_name or ''} {booking.customer_last_name or ''}".strip()
                         elif booking.user:
-                            user_name = f"{booking.user.first_name or ''} {booking.user.last_name or ''}".strip()
-                            if user_name:
-                                customer_info += f"Customer: {user_name}\n"
-                            else:
-                                customer_info += f"Customer: {booking.user.username}\n"
-                        
-                        if booking.customer_phone:
-                            customer_info += f"Phone: {booking.customer_phone}\n"
-                        
-                        if booking.customer_address:
-                            customer_info += f"Address: {booking.customer_address}\n"
-                        
-                        # Build payment information
-                        payment_info = ""
-                        if booking.payment_amount:
-                            payment_info = f"Amount: £{booking.payment_amount}"
-                            if booking.payment_currency and booking.payment_currency != 'GBP':
-                                payment_info = f"Amount: {booking.payment_amount} {booking.payment_currency}"
-                        else:
-                            # Fallback to service price
-                            payment_info = f"Amount: £{booking.service.price}"
+                            customer_full_name = f"{booking.user.first_name or ''} {booking.user.last_name or ''}".strip() or booking.user.username
                         
                         # Send to both customer and owner
                         recipient_list = [customer_email]
@@ -257,96 +256,73 @@ class BookingListCreateAPIView(generics.ListCreateAPIView):
                         if owner_email and owner_email not in recipient_list:
                             recipient_list.append(owner_email)
                         
-                        # Send email with timeout and error handling
-                        import threading
-                        import signal
-                        
-                        def send_email_with_timeout():
-                            try:
-                                email_result = send_mail(
-                                    subject='Booking Confirmation - Access Auto Services',
-                                    message=(
-                                        f"Dear {customer_name},\n\n"
-                                        f"Your booking has been successfully created!\n\n"
-                                        f"BOOKING DETAILS:\n"
-                                        f"{'='*50}\n"
-                                        f"Service: {booking.service.name}\n"
-                                        f"{mot_info}"
-                                        f"Date: {booking.date.strftime('%A, %B %d, %Y')}\n"
-                                        f"Time: {booking.time}\n"
-                                        f"Vehicle: {vehicle_info}\n"
-                                        f"{payment_info}\n\n"
-                                        f"CUSTOMER INFORMATION:\n"
-                                        f"{'='*50}\n"
-                                        f"{customer_info}"
-                                        f"Email: {customer_email}\n\n"
-                                        f"NEXT STEPS:\n"
-                                        f"{'='*50}\n"
-                                       
-                                        f"• You will receive a reminder email 24 hours before your appointment\n"
-                                        f"• If you need to reschedule or cancel, please contact us as soon as possible\n\n"
-                                        f"CONTACT INFORMATION:\n"
-                                        f"{'='*50}\n"
-                                        f"Access Auto Services\n"
-                                        f"Email: {settings.DEFAULT_FROM_EMAIL}\n"
-                                        f"Website: https://www.access-auto-services.co.uk\n\n"
-                                        f"Thank you for choosing Access Auto Services!\n\n"
-                                        f"Best regards,\n"
-                                        f"The Access Auto Services Team"
-                                    ),
-                                    from_email=settings.DEFAULT_FROM_EMAIL,
-                                    recipient_list=recipient_list,
-                                    fail_silently=True,  # Changed to True to prevent blocking
-                                )
-                                
-                                if email_result:
-                                    logger.info(f"✅ Booking confirmation email sent successfully to {customer_email}")
-                                else:
-                                    logger.warning(f"⚠️ Email sending returned False for {customer_email}")
-                                    
-                                return email_result
-                                
-                            except Exception as e:
-                                logger.error(f"❌ Failed to send booking confirmation email: {e}")
-                                return False
-                        
-                        # Run email sending in a separate thread with timeout
-                        email_thread = threading.Thread(target=send_email_with_timeout)
-                        email_thread.daemon = True
-                        email_thread.start()
-                        email_thread.join(timeout=10)  # 10 second timeout
-                        
-                        if email_thread.is_alive():
-                            logger.warning(f"⚠️ Email sending timed out for booking {booking.id}")
+                        # Stored in the booking's transaction; the outbox dispatcher sends it
+                        subject, message, html_message = render('booking_created', {
+                            'customer_name': customer_name,
+                            'service_name': booking.service.name,
+                            'mot_class': booking.mot_class,
+                            'date_display': booking.date.strftime('%A, %B %d, %Y'),
+                            'time': booking.time,
+                            'vehicle_info': vehicle_info,
+                            # Fall back to the service price
+                            'amount': booking.payment_amount or booking.service.price,
+                            'currency': (booking.payment_currency or 'GBP') if booking.payment_amount else 'GBP',
+                            'customer_full_name': customer_full_name,
+                            'customer_phone': booking.customer_phone,
+                            'customer_address': booking.customer_address,
+                            'customer_email': customer_email,
+                        })
+                        enqueue_email(
+                            subject=subject,
+                            message=message,
+                            html_message=html_message,
+                            recipient_list=recipient_list,
+                            category='booking_confirmation',
+                            reference=f"booking:{booking.id}",
+                        )
+                        logger.info(f"Booking confirmation email queued for {customer_email}")
                         
+                    except DatabaseError:
+                        # The email is saved with the booking or not at all
+                        raise
                     except Exception as e:
                         logger.error(f"❌ Error in email preparation for booking {booking.id}: {e}")
                         
                 else:
                     logger.warning(f"⚠️ No customer email provided for booking {booking.id}")
                     
+            except DatabaseError:
+                raise
             except Exception as e:
                 logger.error(f"❌ Unexpected error in email handling for booking {booking.id}: {e}")
 
-            # Schedule reminder email (24 hours before appointment)
+            # Schedule reminder email (24 hours before appointment); the
+            # reminder sweep sends it when due
             try:
-                if CELERY_AVAILABLE:
-                    # Calculate when to send reminder (24 hours before appointment)
-                    appointment_datetime = datetime.combine(booking.date, datetime.strptime(booking.time, '%H:%M').time())
-                    reminder_datetime = appointment_datetime - timedelta(hours=24)
-                    
-                    # Only schedule if reminder time is in the future
-                    if reminder_datetime > datetime.now():
-                        send_booking_reminder.apply_async(
-                            args=[booking.id],
-                            eta=reminder_datetime
-                        )
-                        logger.info(f"📅 Reminder scheduled for booking {booking.id} at {reminder_datetime}")
+                reminder_email = booking.user.email if booking.user and booking.user.email else booking.customer_email
+                if reminder_email:
+                    appointment_datetime = timezone.make_aware(
+                        datetime.combine(booking.date, datetime.strptime(booking.time, '%H:%M').time())
+                    )
+                    reminder = create_reminder(
+                        email=reminder_email,
+                        booking_details={
+                            'service_name': booking.service.name,
+                            'mot_class': booking.mot_class,
+                            'date': booking.date.isoformat(),
+                            'time': booking.time,
+                            'vehicle_registration': booking.vehicle_registration,
+                            'price': str(booking.payment_amount or booking.service.price),
+                        },
+                        appointment_datetime=appointment_datetime,
+                    )
+                    if reminder:
+                        logger.info(f"📅 Reminder scheduled for booking {booking.id} at {reminder.scheduled_for}")
                     else:
                         logger.info(f"⏰ Appointment too soon for reminder - booking {booking.id}")
-                else:
-                    logger.info(f"📧 Celery not available - no reminder scheduled for booking {booking.id}")
-                    
+
+            except DatabaseError:
+                raise
             except Exception as e:
                 logger.error(f"❌ Failed to schedule reminder for booking {booking.id}: {e}")
 
@@ -468,12 +444,13 @@ class PaymentCaptureAPIView(APIView):
             booking.payment_method = 'cash'
             booking.payment_status = 'pending'  # Will be paid on arrival
             booking.is_paid = False  # Not paid yet
-            booking.save()
+            with transaction.atomic():
+                booking.save()
 
-            logger.info(f"Cash payment selected for booking {booking.id}")
+                logger.info(f"Cash payment selected for booking {booking.id}")
 
-            # Send booking confirmation email
-            self._send_booking_confirmation_email(booking, payment_type='cash')
+                # Send booking confirmation email
+                self._send_booking_confirmation_email(booking, payment_type='cash')
 
             return Response({
                 "message": "Booking confirmed! Payment will be collected on arrival.",
@@ -498,12 +475,13 @@ class PaymentCaptureAPIView(APIView):
             booking.name_on_card = data.get('name_on_card', '')
             booking.payment_status = 'pending'  # Would be processed through payment gateway
             booking.is_paid = False  # Would be true after successful processing
-            booking.save()
+            with transaction.atomic():
+                booking.save()
 
-            logger.info(f"Card payment details stored for booking {booking.id}")
+                logger.info(f"Card payment details stored for booking {booking.id}")
 
-            # Send booking confirmation email
-            self._send_booking_confirmation_email(booking, payment_type='card')
+                # Send booking confirmation email
+                self._send_booking_confirmation_email(booking, payment_type='card')
 
             return Response({
                 "message": "Booking confirmed! Card payment will be processed.",
@@ -532,11 +510,18 @@ class PaymentCaptureAPIView(APIView):
                 amount = float(booking.payment_amount) if booking.payment_amount else 0
                 description = f"Booking for {booking.service.name} on {booking.date}"
                 
-                order = paypal_api.create_order(
-                    amount=amount,
-                    currency=booking.payment_currency,
-                    description=description,
-                    custom_id=booking.id
+                order, _ = run_idempotent(
+                    create_order_key(booking, amount, booking.payment_currency),
+                    'create_order',
+                    lambda request_id: paypal_api.create_order(
+                        amount=amount,
+                        currency=booking.payment_currency,
+                        description=description,
+                        custom_id=booking.id,
+                        request_id=request_id
+                    ),
+                    booking=booking,
+                    replay_window=order_replay_window(),
                 )
                 
                 # Store PayPal order ID in booking
@@ -555,6 +540,11 @@ class PaymentCaptureAPIView(APIView):
                     "payment_method": "paypal"
                 }, status=201)
 
+            except OperationInProgress:
+                return operation_in_progress_response()
+            except PayPalUnavailable as e:
+                logger.warning(f"PayPal unavailable, order not created for booking {booking.id}")
+                return paypal_unavailable_response(e)
             except Exception as e:
                 logger.error(f"Failed to create PayPal order for booking {booking.id}: {e}")
                 return Response({
@@ -564,8 +554,14 @@ class PaymentCaptureAPIView(APIView):
         # Handle payment capture (default action)
         else:
             try:
-                # Capture payment through PayPal API
-                capture_result = paypal_api.capture_order(paypal_order_id)
+                # Capture payment through PayPal API. A repeated request (e.g. a
+                # double click) gets the stored result instead of a second call.
+                capture_result, replayed = run_idempotent(
+                    capture_order_key(booking, paypal_order_id),
+                    'capture_order',
+                    lambda request_id: paypal_api.capture_order(paypal_order_id, request_id=request_id),
+                    booking=booking,
+                )
                 
                 # Extract transaction details
                 capture_id = None
@@ -575,18 +571,21 @@ class PaymentCaptureAPIView(APIView):
                     if captures:
                         capture_id = captures[0].get('id')
                 
-                # Update booking with payment information
-                booking.payment_method = 'paypal'
-                booking.payment_status = 'completed'
-                booking.is_paid = True
-                booking.paypal_order_id = paypal_order_id
-                booking.paypal_transaction_id = capture_id or paypal_order_id
-                booking.save()
-
-                logger.info(f"Payment captured for booking {booking.id}: {capture_id}")
-
-                # Send payment confirmation email
-                self._send_booking_confirmation_email(booking, payment_type='paypal')
+                already_recorded = replayed and booking.is_paid and booking.paypal_order_id == paypal_order_id
+                if not already_recorded:
+                    # Update booking with payment information
+                    booking.payment_method = 'paypal'
+                    booking.payment_status = 'completed'
+                    booking.is_paid = True
+                    booking.paypal_order_id = paypal_order_id
+                    booking.paypal_transaction_id = capture_id or paypal_order_id
+                    with transaction.atomic():
+                        booking.save()
+
+                        logger.info(f"Payment captured for booking {booking.id}: {capture_id}")
+
+                        # Send payment confirmation email
+                        self._send_booking_confirmation_email(booking, payment_type='paypal')
 
                 return Response({
                     "message": "Payment captured successfully!",
@@ -597,6 +596,11 @@ class PaymentCaptureAPIView(APIView):
                     "payment_method": "paypal"
                 }, status=200)
 
+            except OperationInProgress:
+                return operation_in_progress_response()
+            except PayPalUnavailable as e:
+                logger.warning(f"PayPal unavailable, capture skipped for order {paypal_order_id}")
+                return paypal_unavailable_response(e)
             except Exception as e:
                 logger.error(f"PayPal capture failed for order {paypal_order_id}: {e}")
                 return Response({
@@ -604,7 +608,7 @@ class PaymentCaptureAPIView(APIView):
                 }, status=400)
 
     def _send_booking_confirmation_email(self, booking, payment_type='paypal'):
-        """Send booking confirmation email based on payment type"""
+        """Queue the booking confirmation email for the outbox, based on payment type"""
         try:
             recipient_list = [booking.customer_email]
             owner_email = settings.OWNER_EMAIL
@@ -619,72 +623,33 @@ class PaymentCaptureAPIView(APIView):
             if booking.vehicle_registration:
                 vehicle_info += f" ({booking.vehicle_registration})"
             
-            # Customize message based on payment type
-            if payment_type == 'paypal':
-                subject = 'Payment Confirmed - Booking Confirmed'
-                payment_info = (
-                    f"Amount: £{booking.payment_amount}\n"
-                    f"Transaction ID: {booking.paypal_transaction_id}\n"
-                    f"Payment Method: PayPal\n"
-                    f"Payment Status: Completed\n\n"
-                    f"Your payment has been successfully processed through PayPal!"
-                )
-            elif payment_type == 'cash':
-                subject = 'Booking Confirmed - Cash Payment on Arrival'
-                payment_info = (
-                    f"Amount: £{booking.payment_amount}\n"
-                    f"Payment Method: Cash on Arrival\n"
-                    f"Payment Status: Pending\n\n"
-                    f"Please bring cash payment on the day of your appointment."
-                )
-            elif payment_type == 'card':
-                subject = 'Booking Confirmed - Card Payment Processing'
-                payment_info = (
-                    f"Amount: £{booking.payment_amount}\n"
-                    f"Payment Method: Credit/Debit Card\n"
-                    f"Payment Status: Processing\n\n"
-                    f"Your card payment is being processed and you'll receive confirmation shortly."
-                )
-            else:
-                subject = 'Booking Confirmed'
-                payment_info = f"Amount: £{booking.payment_amount}\n"
-            
-            message = (
-                f"Dear {customer_name},\n\n"
-                f"Your booking has been confirmed!\n\n"
-                f"BOOKING DETAILS:\n"
-                f"{'='*50}\n"
-                f"Service: {booking.service.name}\n"
-                f"Date: {booking.date.strftime('%A, %B %d, %Y')}\n"
-                f"Time: {booking.time}\n"
-                f"Vehicle: {vehicle_info}\n\n"
-                f"PAYMENT INFORMATION:\n"
-                f"{'='*50}\n"
-                f"{payment_info}\n"
-                f"CUSTOMER INFORMATION:\n"
-                f"{'='*50}\n"
-                f"Name: {booking.customer_first_name} {booking.customer_last_name}\n"
-                f"Email: {booking.customer_email}\n"
-                f"Phone: {booking.customer_phone}\n\n"
-                f"We look forward to seeing you!\n\n"
-                f"CONTACT INFORMATION:\n"
-                f"{'='*50}\n"
-                f"Access Auto Services\n"
-                f"Email: {settings.DEFAULT_FROM_EMAIL}\n"
-                f"Website: https://www.access-auto-services.co.uk\n\n"
-                f"Thank you for choosing Access Auto Services!\n\n"
-                f"Best regards,\nAccess Auto Services Team"
-            )
+            subject, message, html_message = render('booking_confirmed', {
+                'payment_type': payment_type,
+                'customer_name': customer_name,
+                'service_name': booking.service.name,
+                'date_display': booking.date.strftime('%A, %B %d, %Y'),
+                'time': booking.time,
+                'vehicle_info': vehicle_info,
+                'amount': booking.payment_amount,
+                'transaction_id': booking.paypal_transaction_id,
+                'customer_first_name': booking.customer_first_name,
+                'customer_last_name': booking.customer_last_name,
+                'customer_email': booking.customer_email,
+                'customer_phone': booking.customer_phone,
+            })
             
-            send_mail(
+            enqueue_email(
                 subject=subject,
                 message=message,
-                from_email=settings.DEFAULT_FROM_EMAIL,
+                html_message=html_message,
                 recipient_list=recipient_list,
-                fail_silently=False,
+                category='payment_confirmation' if payment_type == 'paypal' else 'booking_confirmation',
+                reference=f"booking:{booking.id}",
             )
-            logger.info(f"Booking confirmation email sent for booking {booking.id} to {recipient_list}")
+            logger.info(f"Booking confirmation email queued for booking {booking.id} to {recipient_list}")
             
+        except DatabaseError:
+            raise
         except Exception as e:
             logger.error(f"Failed to send booking confirmation email: {e}")
 
@@ -742,11 +707,18 @@ class PayPalCreateOrderAPIView(APIView):
             
             logger.info(f"Creating PayPal order - Amount: {amount}, Currency: {booking.payment_currency}, Description: {description}")
             
-            order = paypal_api.create_order(
-                amount=amount,
-                currency=booking.payment_currency,
-                description=description,
-                custom_id=booking.id
+            order, _ = run_idempotent(
+                create_order_key(booking, amount, booking.payment_currency),
+                'create_order',
+                lambda request_id: paypal_api.create_order(
+                    amount=amount,
+                    currency=booking.payment_currency,
+                    description=description,
+                    custom_id=booking.id,
+                    request_id=request_id
+                ),
+                booking=booking,
+                replay_window=order_replay_window(),
             )
             
             # Store PayPal order ID in booking
@@ -765,6 +737,11 @@ class PayPalCreateOrderAPIView(APIView):
                 "status": "created"
             }, status=201)
 
+        except OperationInProgress:
+            return operation_in_progress_response()
+        except PayPalUnavailable as e:
+            logger.warning(f"PayPal unavailable, order not created for booking {booking_id}")
+            return paypal_unavailable_response(e)
         except Exception as e:
             logger.error(f"Failed to create PayPal order for booking {booking_id}: {str(e)}")
             return Response({
@@ -796,3 +773,41 @@ class BookingDetailAPIView(APIView):
         return Response(serializer.data, status=200)
 
 
+class PayPalStatusAPIView(APIView):
+    """PayPal circuit breaker state and connection metrics for this worker (staff only)"""
+    permission_classes = [permissions.IsAdminUser]
+
+    def get(self, request):
+        health = paypal_api.health()
+        return Response(health, status=200)
+
+
+class PayPalWebhookAPIView(APIView):
+    """
+    Receives PayPal webhook deliveries.
+
+    Events are only stored here and acknowledged straight away; the
+    signature check and booking updates run in process_webhook_events.
+    """
+    permission_classes = [permissions.AllowAny]
+    authentication_classes = []
+
+    def post(self, request):
+        event = request.data
+        if not isinstance(event, dict) or not event.get('id') or not event.get('event_type'):
+            return Response({"error": "Invalid webhook event"}, status=400)
+
+        headers = transmission_headers(request)
+        if 'PAYPAL-TRANSMISSION-ID' not in headers or 'PAYPAL-TRANSMISSION-SIG' not in headers:
+            logger.warning(f"PayPal webhook {event.get('id')} received without signature headers")
+            return Response({"error": "Missing PayPal transmission headers"}, status=400)
+
+        try:
+            _, created = store_event(event, headers)
+        except Exception as e:
+            logger.error(f"Failed to store PayPal webhook {event.get('id')}: {e}")
+            return Response({"error": "Could not store event"}, status=500)
+
+        if not created:
+            logger.info(f"Duplicate PayPal webhook {event['id']} acknowledged")
+        return Response({"received": True}, status=200)
@@ -0,0 +1,256 @@
+import logging
+import re
+
+import requests
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from common.signals import bookings_updated
+
+from .models import Booking, WebhookEvent
+from .paypal_utils import paypal_api, PayPalUnavailable
+
+logger = logging.getLogger(__name__)
+
+# Headers PayPal signs each delivery with; all are needed for verification
+TRANSMISSION_HEADERS = (
+    'PAYPAL-AUTH-ALGO',
+    'PAYPAL-CERT-URL',
+    'PAYPAL-TRANSMISSION-ID',
+    'PAYPAL-TRANSMISSION-SIG',
+    'PAYPAL-TRANSMISSION-TIME',
+)
+
+CAPTURE_LINK = re.compile(r'/v2/payments/captures/([^/?]+)')
+
+# Booking payment states that a late CAPTURE.COMPLETED must not overwrite
+SETTLED_AFTER_CAPTURE = ('refunded', 'reversed')
+
+
+def transmission_headers(request):
+    """Pick PayPal's signature headers out of a Django request"""
+    return {name: request.headers.get(name) for name in TRANSMISSION_HEADERS if request.headers.get(name)}
+
+
+def store_event(event, headers):
+    """
+    Save a webhook delivery for the worker. Returns (event, created);
+    PayPal redelivering an event it already sent returns the stored row.
+    """
+    resource = event.get('resource') or {}
+    return WebhookEvent.objects.get_or_create(
+        event_id=event['id'],
+        defaults={
+            'event_type': event.get('event_type', ''),
+            'resource_id': str(resource.get('id', ''))[:64],
+            'payload': event,
+            'headers': headers,
+        },
+    )
+
+
+def _capture_id(resource):
+    """Capture id a refund or reversal belongs to, from its 'up' link"""
+    for link in resource.get('links', []):
+        if link.get('rel') == 'up':
+            match = CAPTURE_LINK.search(link.get('href', ''))
+            if match:
+                return match.group(1)
+    return None
+
+
+def _booking_refs(event):
+    """
+    What identifies the booking an event is about, as a dict with any of
+    booking_id / order_id / capture_id.
+    """
+    resource = event.payload.get('resource') or {}
+    refs = {}
+
+    if event.event_type.startswith('CUSTOMER.DISPUTE.'):
+        for transaction_ in resource.get('disputed_transactions', []):
+            if transaction_.get('seller_transaction_id'):
+                refs['capture_id'] = transaction_['seller_transaction_id']
+                break
+        return refs
+
+    custom_id = resource.get('custom_id')
+    if custom_id and str(custom_id).isdigit():
+        refs['booking_id'] = int(custom_id)
+
+    related = (resource.get('supplementary_data') or {}).get('related_ids') or {}
+    if related.get('order_id'):
+        refs['order_id'] = related['order_id']
+
+    if event.event_type in ('PAYMENT.CAPTURE.REFUNDED', 'PAYMENT.CAPTURE.REVERSED'):
+        refs['capture_id'] = _capture_id(resource) or resource.get('id')
+    elif resource.get('id'):
+        refs['capture_id'] = resource['id']
+    return refs
+
+
+def _apply(event, booking):
+    """Update ``booking`` for ``event``. Returns False if the event needs no change."""
+    resource = event.payload.get('resource') or {}
+    event_type = event.event_type
+
+    if event_type == 'PAYMENT.CAPTURE.COMPLETED':
+        if booking.payment_status in SETTLED_AFTER_CAPTURE:
+            return False
+        booking.is_paid = True
+        booking.payment_status = 'completed'
+        booking.payment_method = 'paypal'
+        booking.paypal_transaction_id = resource.get('id') or booking.paypal_transaction_id
+    elif event_type == 'PAYMENT.CAPTURE.PENDING':
+        if booking.is_paid:
+            return False
+        booking.payment_status = 'pending'
+    elif event_type == 'PAYMENT.CAPTURE.DENIED':
+        booking.is_paid = False
+        booking.payment_status = 'failed'
+    elif event_type == 'PAYMENT.CAPTURE.REFUNDED':
+        booking.is_paid = False
+        booking.payment_status = 'refunded'
+    elif event_type == 'PAYMENT.CAPTURE.REVERSED':
+        booking.is_paid = False
+        booking.payment_status = 'reversed'
+    elif event_type == 'CUSTOMER.DISPUTE.CREATED':
+        booking.payment_status = 'disputed'
+    elif event_type == 'CUSTOMER.DISPUTE.RESOLVED':
+        outcome = (resource.get('dispute_outcome') or {}).get('outcome_code', '')
+        if outcome == 'RESOLVED_BUYER_FAVOUR':
+            booking.is_paid = False
+            booking.payment_status = 'refunded'
+        else:
+            booking.payment_status = 'completed' if booking.is_paid else booking.payment_status
+    else:
+        return False
+    return True
+
+
+def _verify(events, webhook_id):
+    """
+    Check each event's signature with PayPal. Returns {event_id: error}
+    with '' for genuine events; stops early (leaving the rest unchecked)
+    while PayPal cannot be reached.
+    """
+    results = {}
+    for event in events:
+        missing = [name for name in TRANSMISSION_HEADERS if not event.headers.get(name)]
+        if missing:
+            results[event.id] = f"Missing headers: {', '.join(missing)}"
+            continue
+        try:
+            genuine = paypal_api.verify_webhook_signature(event.headers, event.payload, webhook_id)
+        except (PayPalUnavailable, requests.exceptions.ConnectionError, requests.exceptions.Timeout) as e:
+            logger.warning(f"Cannot verify PayPal webhooks right now, will retry: {e}")
+            break
+        except requests.exceptions.HTTPError as e:
+            if e.response is not None and e.response.status_code >= 500:
+                break
+            results[event.id] = e.response.text if e.response is not None else str(e)
+            continue
+        results[event.id] = '' if genuine else 'Signature verification failed'
+    return results
+
+
+def _find_bookings(refs_by_event):
+    """Load every booking referenced by a set of events with one query"""
+    booking_ids, order_ids, capture_ids = set(), set(), set()
+    for refs in refs_by_event.values():
+        if 'booking_id' in refs:
+            booking_ids.add(refs['booking_id'])
+        if 'order_id' in refs:
+            order_ids.add(refs['order_id'])
+        if 'capture_id' in refs:
+            capture_ids.add(refs['capture_id'])
+
+    if not (booking_ids or order_ids or capture_ids):
+        return {}, {}, {}
+
+    bookings = Booking.objects.select_for_update().filter(
+        Q(id__in=booking_ids) | Q(paypal_order_id__in=order_ids) | Q(paypal_transaction_id__in=capture_ids)
+    )
+    by_id, by_order, by_capture = {}, {}, {}
+    for booking in bookings:
+        by_id[booking.id] = booking
+        if booking.paypal_order_id:
+            by_order[booking.paypal_order_id] = booking
+        if booking.paypal_transaction_id:
+            by_capture[booking.paypal_transaction_id] = booking
+    return by_id, by_order, by_capture
+
+
+def process_webhook_events(limit=500):
+    """
+    Verify and apply stored webhook events to their bookings.
+
+    Events are handled oldest first, so a refund received after its
+    capture wins. Bookings are loaded and saved in bulk. Returns the
+    number of bookings updated.
+    """
+    webhook_id = getattr(settings, 'PAYPAL_WEBHOOK_ID', '')
+    if not webhook_id:
+        logger.error("PAYPAL_WEBHOOK_ID is not set; PayPal webhook events cannot be verified")
+        return 0
+
+    pending = list(WebhookEvent.objects.filter(status='received').order_by('received_at', 'id')[:limit])
+    if not pending:
+        return 0
+
+    # Verification calls PayPal, so it happens before any rows are locked
+    verification = _verify(pending, webhook_id)
+    if not verification:
+        return 0
+
+    with transaction.atomic():
+        events = WebhookEvent.objects.filter(id__in=verification.keys(), status='received')
+        if connection.features.has_select_for_update_skip_locked:
+            # Another worker already has these events
+            events = events.select_for_update(skip_locked=True)
+        events = list(events.order_by('received_at', 'id'))
+
+        refs_by_event = {event.id: _booking_refs(event) for event in events if not verification[event.id]}
+        by_id, by_order, by_capture = _find_bookings(refs_by_event)
+
+        now = timezone.now()
+        changed = {}
+        for event in events:
+            event.processed_at = now
+            if verification[event.id]:
+                event.status = 'rejected'
+                event.error = verification[event.id]
+                logger.warning(f"Rejected PayPal webhook {event.event_id}: {event.error}")
+                continue
+
+            refs = refs_by_event[event.id]
+            booking = (
+                by_id.get(refs.get('booking_id'))
+                or by_order.get(refs.get('order_id'))
+                or by_capture.get(refs.get('capture_id'))
+            )
+            if booking is None or not _apply(event, booking):
+                event.status = 'ignored'
+                event.error = '' if booking else 'No matching booking'
+                continue
+
+            event.status = 'processed'
+            event.error = ''
+            booking.updated = now
+            changed[booking.id] = booking
+            if booking.paypal_transaction_id:
+                # A refund later in this batch may only know the new capture id
+                by_capture[booking.paypal_transaction_id] = booking
+            logger.info(f"PayPal webhook {event.event_type} applied to booking {booking.id}: {booking.payment_status}")
+
+        Booking.objects.bulk_update(
+            changed.values(),
+            ['is_paid', 'payment_status', 'payment_method', 'paypal_transaction_id', 'updated'],
+            batch_size=500,
+        )
+        bookings_updated.send(sender=Booking, bookings=changed.values())
+        WebhookEvent.objects.bulk_update(events, ['status', 'error', 'processed_at'], batch_size=500)
+
+    return len(changed)
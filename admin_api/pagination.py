@@ -0,0 +1,78 @@
+"""
+Keyset (cursor) pagination for the admin API list endpoints.
+
+A page is fetched with ``WHERE (key, id) < (last key, last id)`` on an
+indexed ordering instead of OFFSET, so every page costs the same however
+deep into the table it is. Cursors are opaque URL-safe strings.
+"""
+import base64
+import json
+
+from django.db.models import Q
+
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 200
+
+
+class InvalidPageRequest(ValueError):
+    """Bad cursor or page size; reported to the client as a 400"""
+
+
+def page_size(request, default=DEFAULT_PAGE_SIZE, maximum=MAX_PAGE_SIZE):
+    """``?limit=`` clamped to 1..maximum"""
+    raw = request.GET.get('limit')
+    if not raw:
+        return default
+    try:
+        limit = int(raw)
+    except ValueError:
+        raise InvalidPageRequest('limit must be a number')
+    return max(1, min(limit, maximum))
+
+
+def encode_cursor(values):
+    return base64.urlsafe_b64encode(json.dumps(values).encode()).decode().rstrip('=')
+
+
+def decode_cursor(cursor):
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        return json.loads(base64.urlsafe_b64decode(padded.encode()))
+    except (ValueError, TypeError):
+        raise InvalidPageRequest('Invalid cursor')
+
+
+def keyset_page(queryset, request, key, to_cursor, from_cursor, limit=None, descending=True):
+    """
+    One page of ``queryset`` in (``key``, id) order, newest/largest first
+    unless ``descending`` is False.
+
+    ``to_cursor(obj)`` gives the JSON-able key value of the last row and
+    ``from_cursor(value)`` turns it back into a filter value (None, or
+    ValueError/TypeError, for a value it cannot parse). Returns
+    (rows, next_cursor); next_cursor is None on the last page.
+    """
+    limit = limit or page_size(request)
+    sign, op = ('-', 'lt') if descending else ('', 'gt')
+    queryset = queryset.order_by(f'{sign}{key}', f'{sign}id')
+
+    cursor = request.GET.get('cursor')
+    if cursor:
+        values = decode_cursor(cursor)
+        if not isinstance(values, list) or len(values) != 2:
+            raise InvalidPageRequest('Invalid cursor')
+        try:
+            last_key, last_id = from_cursor(values[0]), int(values[1])
+        except (ValueError, TypeError):
+            raise InvalidPageRequest('Invalid cursor')
+        if last_key is None:
+            # e.g. parse_datetime on a string that is not a datetime
+            raise InvalidPageRequest('Invalid cursor')
+        queryset = queryset.filter(Q(**{f'{key}__{op}': last_key}) | Q(**{key: last_key, f'id__{op}': last_id}))
+
+    rows = list(queryset[:limit + 1])
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = encode_cursor([to_cursor(rows[-1]), rows[-1].id])
+    return rows, next_cursor
@@ -0,0 +1,206 @@
+from datetime import date, datetime, timezone as dt_timezone
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+
+from admin_api.pagination import encode_cursor
+from PAYPAL.models import Booking, Service
+
+User = get_user_model()
+
+
+class ListingQueryCountTests(TestCase):
+    """The users and services listings cost the same number of queries however many rows they return"""
+
+    def _add_rows(self, count):
+        start = Service.objects.count()
+        services = Service.objects.bulk_create([
+            Service(code=f'svc-{start + i}', name=f'Service {start + i:03d}', price='50.00')
+            for i in range(count)
+        ])
+        users = [
+            User.objects.create_user(email=f'user{start + i}@example.com')
+            for i in range(count)
+        ]
+        Booking.objects.bulk_create([
+            Booking(user=user, service=service, date=date(2026, 1, 1), time='10:00')
+            for user, service in zip(users, services)
+            for _ in range(2)
+        ])
+
+    def _assert_constant_queries(self, url, queries):
+        self._add_rows(3)
+        with self.assertNumQueries(queries):
+            small = self.client.get(url, secure=True)
+        self._add_rows(30)
+        with self.assertNumQueries(queries):
+            large = self.client.get(url, secure=True)
+        self.assertEqual(small.status_code, 200)
+        self.assertEqual(large.status_code, 200)
+        self.assertGreater(len(large.json()['results']), len(small.json()['results']))
+        return large.json()
+
+    def test_users_list(self):
+        data = self._assert_constant_queries('/api/users/', 1)
+        self.assertTrue(all(user['booking_count'] == 2 for user in data['results']))
+
+    def test_services_list(self):
+        data = self._assert_constant_queries('/api/services/', 1)
+        self.assertTrue(all(service['booking_count'] == 2 for service in data['results']))
+
+    def test_users_list_pages(self):
+        self._add_rows(5)
+        first = self.client.get('/api/users/?limit=3', secure=True).json()
+        second = self.client.get(f"/api/users/?limit=3&cursor={first['next_cursor']}", secure=True).json()
+        ids = [user['id'] for user in first['results'] + second['results']]
+        self.assertEqual(len(set(ids)), 5)
+        self.assertFalse(second['has_more'])
+
+    def test_detail_views(self):
+        self._add_rows(1)
+        user = User.objects.get()
+        service = Service.objects.get()
+        with self.assertNumQueries(1):
+            response = self.client.get(f'/api/users/{user.id}/', secure=True)
+        self.assertEqual(response.json()['booking_count'], 2)
+        with self.assertNumQueries(1):
+            response = self.client.get(f'/api/services/{service.id}/', secure=True)
+        self.assertEqual(response.json()['booking_count'], 2)
+
+
+class BookingsPaginationTests(TestCase):
+    def setUp(self):
+        self.service = Service.objects.create(code='mot', name='MOT', price='50.00')
+        created = datetime(2026, 3, 1, 12, 0, tzinfo=dt_timezone.utc)
+        for i in range(7):
+            booking = Booking.objects.create(
+                service=self.service, date=date(2026, 3, 1 + i), time='10:00',
+                is_paid=i % 2 == 0, customer_email=f'customer{i}@example.com',
+            )
+            # Pairs share a timestamp, so pages must break ties on id
+            Booking.objects.filter(pk=booking.pk).update(created=created.replace(hour=12 + i // 2))
+
+    def _pages(self, query=''):
+        ids, cursor = [], None
+        while True:
+            url = f'/api/bookings/?limit=2{query}' + (f'&cursor={cursor}' if cursor else '')
+            data = self.client.get(url, secure=True).json()
+            ids += [booking['id'] for booking in data['results']]
+            cursor = data['next_cursor']
+            self.assertEqual(data['has_more'], cursor is not None)
+            if not cursor:
+                return ids
+
+    def test_cursor_round_trip(self):
+        expected = list(Booking.objects.order_by('-created', '-id').values_list('id', flat=True))
+        self.assertEqual(self._pages(), expected)
+
+    def test_filters_apply_to_every_page(self):
+        expected = list(
+            Booking.objects.filter(is_paid=True, date__gte=date(2026, 3, 2))
+            .order_by('-created', '-id').values_list('id', flat=True)
+        )
+        self.assertEqual(self._pages('&paid=true&date_from=2026-03-02'), expected)
+        self.assertEqual(self._pages('&search=customer3@'), [Booking.objects.get(customer_email='customer3@example.com').id])
+
+    def test_bad_cursors(self):
+        for cursor in ('%%%', 'bm90IGpzb24', encode_cursor([1, 2, 3]), encode_cursor(['2026-03-01T12:00:00+00:00', 'x']),
+                       encode_cursor(['not-a-date', 1]), encode_cursor([5, 1])):
+            response = self.client.get(f'/api/bookings/?cursor={cursor}', secure=True)
+            self.assertEqual(response.status_code, 400, cursor)
+            self.assertEqual(response.json(), {'error': 'Invalid cursor'})
+
+    def test_bad_filters(self):
+        for query in ('limit=ten', 'status=done', 'date_to=2026-13-01'):
+            self.assertEqual(self.client.get(f'/api/bookings/?{query}', secure=True).status_code, 400, query)
+
+    def test_detail_matches_listing(self):
+        booking = Booking.objects.get(customer_email='customer3@example.com')
+        listed = self.client.get('/api/bookings/?search=customer3@', secure=True).json()['results']
+        with self.assertNumQueries(1):
+            detail = self.client.get(f'/api/bookings/{booking.id}/', secure=True).json()
+        self.assertEqual(listed, [detail])
+
+
+class BookingTrendsTests(TestCase):
+    def setUp(self):
+        card = Service.objects.create(code='mot', name='MOT', price='50.00')
+        cash = Service.objects.create(code='service', name='Service', price='90.00')
+        created = {
+            datetime(2026, 1, 31, 23, 30, tzinfo=dt_timezone.utc): (card, 'card'),
+            datetime(2026, 2, 1, 0, 30, tzinfo=dt_timezone.utc): (card, 'paypal'),
+            datetime(2026, 2, 14, 12, 0, tzinfo=dt_timezone.utc): (cash, 'card'),
+            datetime(2026, 4, 2, 9, 0, tzinfo=dt_timezone.utc): (cash, 'paypal'),
+        }
+        for when, (service, method) in created.items():
+            booking = Booking.objects.create(service=service, date=when.date(), time='10:00', payment_method=method)
+            Booking.objects.filter(pk=booking.pk).update(created=when)
+
+    def test_monthly_counts_with_gaps_in_one_query(self):
+        with self.assertNumQueries(1):
+            response = self.client.get('/api/bookings/trends/?date_from=2026-01-01&date_to=2026-04-30', secure=True)
+        data = response.json()
+        self.assertEqual(data['labels'], ['Jan 2026', 'Feb 2026', 'Mar 2026', 'Apr 2026'])
+        self.assertEqual(data['paypal_data'], [1, 2, 0, 1])
+
+    def test_split_by_service(self):
+        response = self.client.get(
+            '/api/bookings/trends/?interval=week&date_from=2026-01-26&date_to=2026-02-15&split=service', secure=True
+        )
+        data = response.json()
+        self.assertEqual(data['buckets'], ['2026-01-26', '2026-02-02', '2026-02-09'])
+        self.assertEqual(data['series'], [
+            {'name': 'MOT', 'data': [2, 0, 0]},
+            {'name': 'Service', 'data': [0, 0, 1]},
+        ])
+
+    def test_bad_requests(self):
+        for query in ('interval=year', 'split=user', 'date_from=2026-02-30', 'date_from=2026-03-01&date_to=2026-01-01',
+                      'interval=day&date_from=2000-01-01&date_to=2026-01-01'):
+            response = self.client.get(f'/api/bookings/trends/?{query}', secure=True)
+            self.assertEqual(response.status_code, 400, query)
+
+
+class AdminSummaryTests(TestCase):
+    def setUp(self):
+        self.service = Service.objects.create(code='mot', name='MOT', price='50.00')
+
+    def _book(self, **fields):
+        with self.captureOnCommitCallbacks(execute=True):
+            Booking.objects.create(service=self.service, date=date(2026, 1, 1), time='10:00', **fields)
+
+    def test_fixed_queries_and_figures(self):
+        for paid in (True, False, True):
+            self._book(is_paid=paid, payment_amount='45.00' if paid else None)
+        # Five to key the ETag, five more for the summary itself
+        with self.assertNumQueries(10):
+            response = self.client.get('/api/summary/', secure=True)
+        data = response.json()
+        self.assertEqual(data['bookings']['total'], 3)
+        self.assertEqual(data['payments']['total'], 90.0)
+        self.assertEqual(data['service_distribution'], {'labels': ['MOT'], 'values': [3]})
+        self.assertEqual(len(data['recent_bookings']), 3)
+
+    def test_not_modified_until_something_changes(self):
+        self._book()
+        etag = self.client.get('/api/summary/', secure=True)['ETag']
+        with self.assertNumQueries(5):
+            response = self.client.get('/api/summary/', secure=True, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+
+        self._book()
+        response = self.client.get('/api/summary/', secure=True, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+
+    def test_user_and_service_edits_change_the_etag(self):
+        user = User.objects.create_user(email='user@example.com')
+        etag = self.client.get('/api/summary/', secure=True)['ETag']
+
+        User.objects.filter(pk=user.pk).update(first_name='Ann')
+        second = self.client.get('/api/summary/', secure=True, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(second.status_code, 200)
+
+        Service.objects.filter(pk=self.service.pk).update(active=False)
+        third = self.client.get('/api/summary/', secure=True, HTTP_IF_NONE_MATCH=second['ETag'])
+        self.assertEqual(third.status_code, 200)
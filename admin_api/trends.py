@@ -0,0 +1,116 @@
+"""
+Booking counts over time for the admin charts.
+
+One query truncates ``created`` to the interval (in the current time zone)
+and groups by it, optionally also by service or payment method; buckets
+with no bookings are filled with zeros here rather than in the database.
+"""
+from datetime import date, timedelta
+
+from django.db.models import Count, DateField
+from django.db.models.functions import Trunc
+from django.utils import timezone
+
+from PAYPAL.models import Booking
+
+INTERVALS = ('day', 'week', 'month')
+# Range used when the request gives no start date, in buckets
+DEFAULT_BUCKETS = {'day': 30, 'week': 12, 'month': 12}
+MAX_BUCKETS = 750
+SPLITS = {
+    'service': 'service__name',
+    'payment_method': 'payment_method',
+}
+LABEL_FORMATS = {'day': '%d %b %Y', 'week': '%d %b %Y', 'month': '%b %Y'}
+
+
+class InvalidTrendRequest(ValueError):
+    """Bad interval, range or split; reported to the client as a 400"""
+
+
+def bucket_start(day, interval):
+    """Start of the bucket ``day`` falls in; weeks start on Monday, as in the database"""
+    if interval == 'week':
+        return day - timedelta(days=day.weekday())
+    if interval == 'month':
+        return day.replace(day=1)
+    return day
+
+
+def next_bucket(start, interval):
+    if interval == 'day':
+        return start + timedelta(days=1)
+    if interval == 'week':
+        return start + timedelta(days=7)
+    return date(start.year + start.month // 12, start.month % 12 + 1, 1)
+
+
+def previous_buckets(end, interval, count):
+    """Start of the bucket ``count - 1`` intervals before the one containing ``end``"""
+    start = bucket_start(end, interval)
+    if interval == 'day':
+        return start - timedelta(days=count - 1)
+    if interval == 'week':
+        return start - timedelta(weeks=count - 1)
+    months = start.year * 12 + start.month - 1 - (count - 1)
+    return date(months // 12, months % 12 + 1, 1)
+
+
+def buckets(start, end, interval):
+    """Bucket start dates from the one containing ``start`` to the one containing ``end``"""
+    current = bucket_start(start, interval)
+    result = []
+    while current <= end:
+        result.append(current)
+        if len(result) > MAX_BUCKETS:
+            raise InvalidTrendRequest(f'Range is longer than {MAX_BUCKETS} {interval}s')
+        current = next_bucket(current, interval)
+    return result
+
+
+def booking_trends(interval='month', start=None, end=None, split=None, queryset=None):
+    """
+    Booking counts per ``interval`` between the dates ``start`` and ``end``
+    (inclusive; default the last DEFAULT_BUCKETS intervals to today).
+
+    Returns {'buckets', 'labels', 'total', 'series'}; ``series`` is a list of
+    {'name', 'data'} when ``split`` is 'service' or 'payment_method',
+    otherwise empty.
+    """
+    if interval not in INTERVALS:
+        raise InvalidTrendRequest(f"interval must be one of {', '.join(INTERVALS)}")
+    if split and split not in SPLITS:
+        raise InvalidTrendRequest(f"split must be one of {', '.join(SPLITS)}")
+    end = end or timezone.localdate()
+    start = start or previous_buckets(end, interval, DEFAULT_BUCKETS[interval])
+    if start > end:
+        raise InvalidTrendRequest('date_from is after date_to')
+    starts = buckets(start, end, interval)
+
+    queryset = queryset if queryset is not None else Booking.objects.all()
+    fields = ['bucket'] + ([SPLITS[split]] if split else [])
+    rows = (
+        queryset
+        .filter(created__date__gte=start, created__date__lte=end)
+        .annotate(bucket=Trunc('created', interval, output_field=DateField(), tzinfo=timezone.get_current_timezone()))
+        .values(*fields)
+        .annotate(count=Count('id'))
+        .order_by()
+    )
+
+    index = {bucket: i for i, bucket in enumerate(starts)}
+    total = [0] * len(starts)
+    series = {}
+    for row in rows:
+        i = index[row['bucket']]
+        total[i] += row['count']
+        if split:
+            name = row[SPLITS[split]] or 'Unknown'
+            series.setdefault(name, [0] * len(starts))[i] += row['count']
+
+    return {
+        'buckets': [bucket.isoformat() for bucket in starts],
+        'labels': [bucket.strftime(LABEL_FORMATS[interval]) for bucket in starts],
+        'total': total,
+        'series': [{'name': name, 'data': data} for name, data in sorted(series.items())],
+    }
@@ -6,6 +6,9 @@ urlpatterns = [
     path('admin-panel/', admin_views.AdminPanelView.as_view(), name='admin-panel'),
     path('admin-dashboard/', admin_views.AdminDashboardView.as_view(), name='admin-dashboard'),
     
+    # Dashboard summary (everything the dashboard page shows, with ETag)
+    path('summary/', views.AdminSummaryView.as_view(), name='admin-summary'),
+    
     # Users endpoints
     path('users/', views.UsersListView.as_view(), name='users-list'),
     path('users/<int:user_id>/', views.UserDetailView.as_view(), name='user-detail'),
@@ -1,41 +1,67 @@
-from django.http import JsonResponse
+from django.core.serializers.json import DjangoJSONEncoder
+from django.http import HttpResponse, JsonResponse
 from django.views import View
 from django.contrib.auth import get_user_model
-from django.db.models import Count, Sum, Q
+from django.db.models import Count, Max, Sum, Q
 from django.utils import timezone
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import quote_etag
+from django.utils.dateparse import parse_date, parse_datetime
 from django.views.decorators.csrf import csrf_exempt
 from django.utils.decorators import method_decorator
 from datetime import datetime, timedelta
 from PAYPAL.models import Booking as PayPalBooking, Service as PayPalService
+from admin_dashboard.models import BookingDailyRollup
+from admin_dashboard.rollups import totals
+from .pagination import MAX_PAGE_SIZE, InvalidPageRequest, keyset_page, page_size
+from .trends import InvalidTrendRequest, booking_trends
+import hashlib
 import json
 import logging
 
 User = get_user_model()
 logger = logging.getLogger(__name__)
 
+def _user_data(user):
+    """``user`` must be annotated with booking_count"""
+    return {
+        'id': user.id,
+        'email': user.email,
+        'first_name': user.first_name,
+        'last_name': user.last_name,
+        'is_active': user.is_active,
+        'is_staff': user.is_staff,
+        'date_joined': user.date_joined.isoformat(),
+        'booking_count': user.booking_count
+    }
+
+
+def _user_counts():
+    week_ago = timezone.now() - timedelta(days=7)
+    return User.objects.aggregate(
+        total=Count('id'),
+        new_this_week=Count('id', filter=Q(date_joined__gte=week_ago)),
+    )
+
+
 @method_decorator(csrf_exempt, name='dispatch')
 class UsersListView(View):
     def get(self, request):
+        """Users, newest first, with their booking counts; paginated with limit and cursor"""
         try:
-            users = User.objects.all().order_by('-date_joined')
-            
-            # Add booking count for each user
-            users_data = []
-            for user in users:
-                paypal_bookings = PayPalBooking.objects.filter(user=user).count()
-                
-                users_data.append({
-                    'id': user.id,
-                    'email': user.email,
-                    'first_name': user.first_name,
-                    'last_name': user.last_name,
-                    'is_active': user.is_active,
-                    'is_staff': user.is_staff,
-                    'date_joined': user.date_joined.isoformat(),
-                    'booking_count': paypal_bookings
-                })
-            
-            return JsonResponse({'results': users_data})
+            users = User.objects.annotate(booking_count=Count('bookings'))
+            rows, next_cursor = keyset_page(
+                users, request, 'date_joined',
+                to_cursor=lambda user: user.date_joined.isoformat(),
+                from_cursor=parse_datetime,
+            )
+            return JsonResponse({
+                'results': [_user_data(user) for user in rows],
+                'next_cursor': next_cursor,
+                'has_more': next_cursor is not None,
+            })
+        except InvalidPageRequest as e:
+            return JsonResponse({'error': str(e)}, status=400)
         except Exception as e:
             return JsonResponse({'error': str(e)}, status=500)
     
@@ -83,21 +109,8 @@ class UserDetailView(View):
     def get(self, request, user_id):
         """Get individual user details"""
         try:
-            user = User.objects.get(id=user_id)
-            paypal_bookings = PayPalBooking.objects.filter(user=user).count()
-            
-            user_data = {
-                'id': user.id,
-                'email': user.email,
-                'first_name': user.first_name,
-                'last_name': user.last_name,
-                'is_active': user.is_active,
-                'is_staff': user.is_staff,
-                'date_joined': user.date_joined.isoformat(),
-                'booking_count': paypal_bookings
-            }
-            
-            return JsonResponse(user_data)
+            user = User.objects.annotate(booking_count=Count('bookings')).get(id=user_id)
+            return JsonResponse(_user_data(user))
         except User.DoesNotExist:
             return JsonResponse({'error': 'User not found'}, status=404)
         except Exception as e:
@@ -169,61 +182,110 @@ class UserDetailView(View):
 class UsersCountView(View):
     def get(self, request):
         try:
-            total_users = User.objects.count()
-            week_ago = timezone.now() - timedelta(days=7)
-            new_this_week = User.objects.filter(date_joined__gte=week_ago).count()
-            
-            return JsonResponse({
-                'total': total_users,
-                'new_this_week': new_this_week
-            })
+            return JsonResponse(_user_counts())
         except Exception as e:
             return JsonResponse({'error': str(e)}, status=500)
 
+def _booking_data(booking):
+    return {
+        'id': booking.id,
+        'user': {
+            'id': booking.user.id if booking.user else None,
+            'first_name': booking.user.first_name if booking.user else '',
+            'last_name': booking.user.last_name if booking.user else '',
+            'email': booking.user.email if booking.user else ''
+        },
+        'service': {
+            'id': booking.service.id if booking.service else None,
+            'name': booking.service.name if booking.service else 'Unknown Service',
+            'price': float(booking.service.price) if booking.service else 0
+        },
+        'customer_first_name': booking.customer_first_name,
+        'customer_last_name': booking.customer_last_name,
+        'customer_email': booking.customer_email,
+        'customer_phone': booking.customer_phone,
+        'customer_address': booking.customer_address,
+        'booking_date': booking.date.isoformat() if booking.date else None,
+        'booking_time': booking.time if booking.time else None,
+        'status': 'confirmed' if booking.is_verified else 'pending',
+        'payment_status': booking.payment_status,
+        'payment_method': booking.payment_method,
+        'amount': float(booking.payment_amount) if booking.payment_amount else 0,
+        'currency': booking.payment_currency,
+        'paypal_order_id': booking.paypal_order_id,
+        'paypal_transaction_id': booking.paypal_transaction_id,
+        'is_paid': booking.is_paid,
+        'is_verified': booking.is_verified,
+        'created_at': booking.created.isoformat(),
+        'updated_at': booking.updated.isoformat(),
+    }
+
+
+def _filter_bookings(bookings, params):
+    """Apply the bookings list query-string filters"""
+    status = params.get('status')
+    if status == 'confirmed':
+        bookings = bookings.filter(is_verified=True)
+    elif status == 'pending':
+        bookings = bookings.filter(is_verified=False)
+    elif status:
+        raise InvalidPageRequest('status must be pending or confirmed')
+
+    if params.get('payment_status'):
+        bookings = bookings.filter(payment_status=params['payment_status'])
+    if params.get('payment_method'):
+        bookings = bookings.filter(payment_method=params['payment_method'])
+
+    paid = params.get('paid', '').lower()
+    if paid in ('true', '1'):
+        bookings = bookings.filter(is_paid=True)
+    elif paid in ('false', '0'):
+        bookings = bookings.filter(is_paid=False)
+
+    for param, lookup in (('date_from', 'date__gte'), ('date_to', 'date__lte')):
+        if params.get(param):
+            try:
+                value = parse_date(params[param])
+            except ValueError:
+                value = None
+            if value is None:
+                raise InvalidPageRequest(f'{param} must be a date (YYYY-MM-DD)')
+            bookings = bookings.filter(**{lookup: value})
+
+    search = params.get('search', '').strip()
+    if search:
+        bookings = bookings.filter(Q(customer_email__icontains=search) | Q(user__email__icontains=search))
+    return bookings
+
+
 @method_decorator(csrf_exempt, name='dispatch')
 class BookingsListView(View):
     def get(self, request):
+        """
+        Bookings, newest first, one keyset page at a time.
+
+        Filters: status (pending/confirmed), payment_status, payment_method,
+        paid (true/false), date_from/date_to (booking date, YYYY-MM-DD) and
+        search (customer or account email). Page with limit and the
+        next_cursor of the previous page.
+        """
         try:
-            # Get only PayPal bookings (DVLA removed)
-            paypal_bookings = PayPalBooking.objects.select_related('user', 'service').all().order_by('-created')
-            
-            bookings_data = []
-            
-            # Add PayPal bookings
-            for booking in paypal_bookings:
-                bookings_data.append({
-                    'id': booking.id,
-                    'user': {
-                        'id': booking.user.id if booking.user else None,
-                        'first_name': booking.user.first_name if booking.user else '',
-                        'last_name': booking.user.last_name if booking.user else '',
-                        'email': booking.user.email if booking.user else ''
-                    },
-                    'service': {
-                        'id': booking.service.id if booking.service else None,
-                        'name': booking.service.name if booking.service else 'Unknown Service',
-                        'price': float(booking.service.price) if booking.service else 0
-                    },
-                    'customer_first_name': booking.customer_first_name,
-                    'customer_last_name': booking.customer_last_name,
-                    'customer_email': booking.customer_email,
-                    'customer_phone': booking.customer_phone,
-                    'customer_address': booking.customer_address,
-                    'booking_date': booking.date.isoformat() if booking.date else None,
-                    'booking_time': booking.time if booking.time else None,
-                    'status': 'confirmed' if booking.is_verified else 'pending',
-                    'payment_status': booking.payment_status,
-                    'payment_method': booking.payment_method,
-                    'amount': float(booking.payment_amount) if booking.payment_amount else 0,
-                    'currency': booking.payment_currency,
-                    'paypal_order_id': booking.paypal_order_id,
-                    'paypal_transaction_id': booking.paypal_transaction_id,
-                    'is_paid': booking.is_paid,
-                    'created_at': booking.created.isoformat(),
-                    'updated_at': booking.updated.isoformat(),
-                })
-            
-            return JsonResponse({'results': bookings_data})
+            bookings = _filter_bookings(
+                PayPalBooking.objects.select_related('user', 'service'),
+                request.GET,
+            )
+            rows, next_cursor = keyset_page(
+                bookings, request, 'created',
+                to_cursor=lambda booking: booking.created.isoformat(),
+                from_cursor=parse_datetime,
+            )
+            return JsonResponse({
+                'results': [_booking_data(booking) for booking in rows],
+                'next_cursor': next_cursor,
+                'has_more': next_cursor is not None,
+            })
+        except InvalidPageRequest as e:
+            return JsonResponse({'error': str(e)}, status=400)
         except Exception as e:
             logger.error(f"Error fetching bookings: {e}")
             return JsonResponse({'error': str(e)}, status=500)
@@ -301,41 +363,7 @@ class BookingDetailView(View):
         """Get individual booking details"""
         try:
             booking = PayPalBooking.objects.select_related('user', 'service').get(id=booking_id)
-            
-            booking_data = {
-                'id': booking.id,
-                'user': {
-                    'id': booking.user.id if booking.user else None,
-                    'first_name': booking.user.first_name if booking.user else '',
-                    'last_name': booking.user.last_name if booking.user else '',
-                    'email': booking.user.email if booking.user else ''
-                },
-                'service': {
-                    'id': booking.service.id if booking.service else None,
-                    'name': booking.service.name if booking.service else 'Unknown Service',
-                    'price': float(booking.service.price) if booking.service else 0
-                },
-                'customer_first_name': booking.customer_first_name,
-                'customer_last_name': booking.customer_last_name,
-                'customer_email': booking.customer_email,
-                'customer_phone': booking.customer_phone,
-                'customer_address': booking.customer_address,
-                'booking_date': booking.date.isoformat() if booking.date else None,
-                'booking_time': booking.time if booking.time else None,
-                'status': 'confirmed' if booking.is_verified else 'pending',
-                'payment_status': booking.payment_status,
-                'payment_method': booking.payment_method,
-                'amount': float(booking.payment_amount) if booking.payment_amount else 0,
-                'currency': booking.payment_currency,
-                'paypal_order_id': booking.paypal_order_id,
-                'paypal_transaction_id': booking.paypal_transaction_id,
-                'is_paid': booking.is_paid,
-                'is_verified': booking.is_verified,
-                'created_at': booking.created.isoformat(),
-                'updated_at': booking.updated.isoformat(),
-            }
-            
-            return JsonResponse(booking_data)
+            return JsonResponse(_booking_data(booking))
         except PayPalBooking.DoesNotExist:
             return JsonResponse({'error': 'Booking not found'}, status=404)
         except Exception as e:
@@ -431,149 +459,153 @@ class BookingDetailView(View):
             logger.error(f"Error deleting booking {booking_id}: {e}")
             return JsonResponse({'error': str(e)}, status=500)
 
+def _paypal_totals():
+    """PayPal booking and revenue totals from the daily rollups, in one query"""
+    today = timezone.localdate()
+    return totals(
+        BookingDailyRollup.objects.filter(source='paypal'),
+        today=Q(date=today),
+        week=Q(date__gte=today - timedelta(days=7)),
+        month=Q(date__gte=today.replace(day=1)),
+    )
+
+
+def _booking_counts(paypal_totals):
+    # Only PayPal bookings now
+    return {
+        'total': paypal_totals['bookings'],
+        'today': paypal_totals['today_bookings'],
+        'paypal': paypal_totals['bookings']
+    }
+
+
+def _payment_totals(paypal_totals):
+    return {
+        'total': float(paypal_totals['amount_paid']),
+        'today': float(paypal_totals['today_amount_paid']),
+        'week': float(paypal_totals['week_amount_paid']),
+        'month': float(paypal_totals['month_amount_paid']),
+        'paypal': float(paypal_totals['amount_paid'])
+    }
+
+
 class BookingsCountView(View):
     def get(self, request):
         try:
-            paypal_count = PayPalBooking.objects.count()
-            total_bookings = paypal_count  # Only PayPal bookings now
-            
-            # Today's bookings
-            today = timezone.now().date()
-            paypal_today = PayPalBooking.objects.filter(created__date=today).count()
-            today_bookings = paypal_today
-            
-            return JsonResponse({
-                'total': total_bookings,
-                'today': today_bookings,
-                'paypal': paypal_count
-            })
+            return JsonResponse(_booking_counts(_paypal_totals()))
         except Exception as e:
             return JsonResponse({'error': str(e)}, status=500)
 
 class BookingTrendsView(View):
     def get(self, request):
+        """
+        Booking counts per ?interval= (day, week or month) over
+        ?date_from= .. ?date_to=, optionally split by ?split=service or
+        payment_method. One grouped query whatever the range.
+        """
         try:
-            # Get last 12 months data
-            months = []
-            paypal_data = []
-            
-            for i in range(11, -1, -1):
-                date = timezone.now() - timedelta(days=30*i)
-                month_start = date.replace(day=1)
-                if i == 0:
-                    month_end = timezone.now()
-                else:
-                    next_month = month_start.replace(month=month_start.month + 1) if month_start.month < 12 else month_start.replace(year=month_start.year + 1, month=1)
-                    month_end = next_month - timedelta(days=1)
-                
-                months.append(date.strftime('%b %Y'))
-                
-                paypal_count = PayPalBooking.objects.filter(
-                    created__gte=month_start,
-                    created__lte=month_end
-                ).count()
-                
-                paypal_data.append(paypal_count)
-            
+            params = request.GET
+            dates = {}
+            for name in ('date_from', 'date_to'):
+                if params.get(name):
+                    dates[name] = parse_date(params[name])
+                    if dates[name] is None:
+                        raise InvalidTrendRequest(f'{name} must be a date (YYYY-MM-DD)')
+            trends = booking_trends(
+                interval=params.get('interval', 'month'),
+                start=dates.get('date_from'),
+                end=dates.get('date_to'),
+                split=params.get('split') or None,
+            )
             return JsonResponse({
-                'labels': months,
-                'paypal_data': paypal_data
+                'interval': params.get('interval', 'month'),
+                'labels': trends['labels'],
+                'buckets': trends['buckets'],
+                'paypal_data': trends['total'],
+                'series': trends['series'],
             })
+        except ValueError as e:  # InvalidTrendRequest or an impossible date
+            return JsonResponse({'error': str(e)}, status=400)
         except Exception as e:
             return JsonResponse({'error': str(e)}, status=500)
 
+def _service_distribution(services):
+    """Bookings per active service (``services`` as dicts with id, name and active), from the daily rollups"""
+    counts = dict(
+        BookingDailyRollup.objects.filter(source='paypal')
+        .values_list('service_id')
+        .annotate(Sum('bookings'))
+        .order_by()
+    )
+    labels = []
+    values = []
+    
+    for service in services:
+        booking_count = counts.get(service['id'], 0)
+        if service['active'] and booking_count > 0:
+            labels.append(service['name'])
+            values.append(booking_count)
+    
+    # If no data, show placeholder
+    if not labels:
+        labels = ['No Bookings Yet']
+        values = [1]
+    
+    return {
+        'labels': labels,
+        'values': values
+    }
+
+
 class ServiceDistributionView(View):
     def get(self, request):
         try:
-            # Get service distribution by actual services
-            services_data = PayPalService.objects.filter(active=True).annotate(
-                booking_count=Count('booking')
-            ).values('name', 'booking_count')
-            
-            labels = []
-            values = []
-            
-            for service in services_data:
-                if service['booking_count'] > 0:
-                    labels.append(service['name'])
-                    values.append(service['booking_count'])
-            
-            # If no data, show placeholder
-            if not labels:
-                labels = ['No Bookings Yet']
-                values = [1]
-            
-            return JsonResponse({
-                'labels': labels,
-                'values': values
-            })
+            services = PayPalService.objects.filter(active=True).values('id', 'name', 'active')
+            return JsonResponse(_service_distribution(services))
         except Exception as e:
             return JsonResponse({'error': str(e)}, status=500)
 
 class PaymentsTotalView(View):
     def get(self, request):
         try:
-            # Calculate total revenue from PayPal bookings only
-            paypal_total = PayPalBooking.objects.filter(
-                is_paid=True
-            ).aggregate(total=Sum('payment_amount'))['total'] or 0
-            
-            total_revenue = float(paypal_total)
-            
-            # Today's revenue
-            today = timezone.now().date()
-            paypal_today = PayPalBooking.objects.filter(
-                is_paid=True,
-                created__date=today
-            ).aggregate(total=Sum('payment_amount'))['total'] or 0
-            
-            today_revenue = float(paypal_today)
-            
-            # This week's revenue
-            week_ago = today - timedelta(days=7)
-            week_revenue = PayPalBooking.objects.filter(
-                is_paid=True,
-                created__date__gte=week_ago
-            ).aggregate(total=Sum('payment_amount'))['total'] or 0
-            
-            # This month's revenue
-            month_start = today.replace(day=1)
-            month_revenue = PayPalBooking.objects.filter(
-                is_paid=True,
-                created__date__gte=month_start
-            ).aggregate(total=Sum('payment_amount'))['total'] or 0
-            
-            return JsonResponse({
-                'total': total_revenue,
-                'today': today_revenue,
-                'week': float(week_revenue),
-                'month': float(month_revenue),
-                'paypal': float(paypal_total)
-            })
+            # PayPal bookings only
+            return JsonResponse(_payment_totals(_paypal_totals()))
         except Exception as e:
             return JsonResponse({'error': str(e)}, status=500)
 
+def _service_data(service):
+    """``service`` must be annotated with booking_count"""
+    return {
+        'id': service.id,
+        'code': service.code,
+        'name': service.name,
+        'description': service.description,
+        'price': float(service.price),
+        'active': service.active,
+        'booking_count': service.booking_count
+    }
+
+
 @method_decorator(csrf_exempt, name='dispatch')
 class ServicesListView(View):
     def get(self, request):
+        """Services by name with their booking counts; paginated with limit and cursor"""
         try:
-            # Return actual PayPal services
-            services = PayPalService.objects.all().order_by('name')
-            services_data = []
-            
-            for service in services:
-                booking_count = PayPalBooking.objects.filter(service=service).count()
-                services_data.append({
-                    'id': service.id,
-                    'code': service.code,
-                    'name': service.name,
-                    'description': service.description,
-                    'price': float(service.price),
-                    'active': service.active,
-                    'booking_count': booking_count
-                })
-            
-            return JsonResponse({'results': services_data})
+            services = PayPalService.objects.annotate(booking_count=Count('booking'))
+            rows, next_cursor = keyset_page(
+                services, request, 'name',
+                to_cursor=lambda service: service.name,
+                from_cursor=str,
+                limit=page_size(request, default=MAX_PAGE_SIZE),
+                descending=False,
+            )
+            return JsonResponse({
+                'results': [_service_data(service) for service in rows],
+                'next_cursor': next_cursor,
+                'has_more': next_cursor is not None,
+            })
+        except InvalidPageRequest as e:
+            return JsonResponse({'error': str(e)}, status=400)
         except Exception as e:
             return JsonResponse({'error': str(e)}, status=500)
     
@@ -618,20 +650,8 @@ class ServiceDetailView(View):
     def get(self, request, service_id):
         """Get individual service details"""
         try:
-            service = PayPalService.objects.get(id=service_id)
-            booking_count = PayPalBooking.objects.filter(service=service).count()
-            
-            service_data = {
-                'id': service.id,
-                'code': service.code,
-                'name': service.name,
-                'description': service.description,
-                'price': float(service.price),
-                'active': service.active,
-                'booking_count': booking_count
-            }
-            
-            return JsonResponse(service_data)
+            service = PayPalService.objects.annotate(booking_count=Count('booking')).get(id=service_id)
+            return JsonResponse(_service_data(service))
         except PayPalService.DoesNotExist:
             return JsonResponse({'error': 'Service not found'}, status=404)
         except Exception as e:
@@ -692,4 +712,78 @@ class ServiceDetailView(View):
             return JsonResponse({'error': 'Service not found'}, status=404)
         except Exception as e:
             logger.error(f"Error deleting service {service_id}: {e}")
-            return JsonResponse({'error': str(e)}, status=500)
\ No newline at end of file
+            return JsonResponse({'error': str(e)}, status=500)
+
+def _summary_version(services, user_counts, recent_users):
+    """
+    A key that changes whenever the admin summary would: the day, the
+    services and users shown, and the latest change to the bookings and
+    their rollups. Costs two small aggregates beyond what the summary
+    itself reads.
+    """
+    bookings = PayPalBooking.objects.aggregate(count=Count('id'), updated=Max('updated'))
+    rollups = BookingDailyRollup.objects.aggregate(count=Count('id'), updated=Max('updated'))
+    return json.dumps(
+        [timezone.localdate(), services, user_counts, recent_users, bookings, rollups],
+        cls=DjangoJSONEncoder,
+    )
+
+
+class AdminSummaryView(View):
+    def get(self, request):
+        """
+        Everything the admin dashboard shows, in one response: counts,
+        revenue, active services, the booking trends and service charts, and
+        the latest bookings and users. Sends an ETag of what the summary is
+        built from; a request whose If-None-Match still matches gets a 304
+        before the summary is built.
+        """
+        try:
+            services = list(PayPalService.objects.values('id', 'name', 'active'))
+            user_counts = _user_counts()
+            recent_users = list(User.objects.order_by('-date_joined', '-id')[:5].values_list(
+                'id', 'email', 'first_name', 'last_name', 'is_active', 'is_staff', 'date_joined',
+            ))
+            version = _summary_version(services, user_counts, recent_users)
+        except Exception as e:
+            logger.error(f"Error building admin summary: {e}")
+            return JsonResponse({'error': str(e)}, status=500)
+
+        etag = quote_etag(hashlib.sha256(version.encode()).hexdigest())
+        response = get_conditional_response(request, etag=etag)
+        if response is None:
+            try:
+                response = HttpResponse(self._summary(services, user_counts), content_type='application/json')
+            except Exception as e:
+                logger.error(f"Error building admin summary: {e}")
+                return JsonResponse({'error': str(e)}, status=500)
+        response['ETag'] = etag
+        # Let clients keep the body, but always revalidate it
+        patch_cache_control(response, private=True, no_cache=True)
+        return response
+
+    def _summary(self, services, user_counts):
+        paypal_totals = _paypal_totals()
+        trends = booking_trends()
+        recent_bookings = PayPalBooking.objects.select_related('user', 'service').order_by('-created', '-id')[:5]
+        recent_users = User.objects.annotate(booking_count=Count('bookings')).order_by('-date_joined', '-id')[:5]
+
+        summary = {
+            'users': user_counts,
+            'bookings': _booking_counts(paypal_totals),
+            'payments': _payment_totals(paypal_totals),
+            'services': {
+                'total': len(services),
+                'active': sum(1 for service in services if service['active']),
+            },
+            'trends': {
+                'interval': 'month',
+                'labels': trends['labels'],
+                'buckets': trends['buckets'],
+                'paypal_data': trends['total'],
+            },
+            'service_distribution': _service_distribution(services),
+            'recent_bookings': [_booking_data(booking) for booking in recent_bookings],
+            'recent_users': [_user_data(user) for user in recent_users],
+        }
+        return json.dumps(summary, cls=DjangoJSONEncoder, sort_keys=True)
@@ -8,6 +8,7 @@ from datetime import datetime, timedelta
 from accounts.models import CustomUser, Booking as AccountsBooking, Vehicle, Document
 from PAYPAL.models import Booking as PaypalBooking, Service as PaypalService
 from DVLAA.models import Booking as DVLABooking, Service as DVLAService, CartItem
+from .rollups import monthly_booking_counts, totals
 
 # Import custom admin actions
 from .admin_actions import (
@@ -61,23 +62,11 @@ class AdminDashboardSite(admin.AdminSite):
         new_users_today = CustomUser.objects.filter(date_joined__date=today).count()
         new_users_month = CustomUser.objects.filter(date_joined__date__gte=last_30_days).count()
         
-        # Booking statistics
-        total_bookings = PaypalBooking.objects.count() + DVLABooking.objects.count()
-        bookings_today = (
-            PaypalBooking.objects.filter(created__date=today).count() +
-            DVLABooking.objects.filter(created_at__date=today).count()
-        )
-        
-        # Revenue statistics
-        paypal_revenue = PaypalBooking.objects.filter(is_paid=True).aggregate(
-            total=Sum('service__price')
-        )['total'] or 0
-        
-        dvla_revenue = DVLABooking.objects.filter(payment_completed=True).aggregate(
-            total=Sum('service__price')
-        )['total'] or 0
-        
-        total_revenue = paypal_revenue + dvla_revenue
+        # Booking and revenue statistics, from the daily rollups
+        booking_totals = totals(today=Q(date=today))
+        total_bookings = booking_totals['bookings']
+        bookings_today = booking_totals['today_bookings']
+        total_revenue = booking_totals['revenue']
         
         # Recent activities
         recent_bookings = list(PaypalBooking.objects.select_related('user', 'service').order_by('-created')[:5])
@@ -105,31 +94,10 @@ class AdminDashboardSite(admin.AdminSite):
             booking_count=Count('dvlaa_bookings')
         ).order_by('-booking_count')
         
-        # Monthly booking trends
-        monthly_data = []
-        for i in range(12):
-            month_start = timezone.now().replace(day=1) - timedelta(days=30*i)
-            month_end = month_start + timedelta(days=30)
-            
-            paypal_count = PaypalBooking.objects.filter(
-                created__gte=month_start, created__lt=month_end
-            ).count()
-            
-            dvla_count = DVLABooking.objects.filter(
-                created_at__gte=month_start, created_at__lt=month_end
-            ).count()
-            
-            monthly_data.append({
-                'month': month_start.strftime('%B %Y'),
-                'paypal_bookings': paypal_count,
-                'dvla_bookings': dvla_count,
-                'total': paypal_count + dvla_count
-            })
-        
         return {
             'paypal_services': paypal_services,
             'dvla_services': dvla_services,
-            'monthly_data': list(reversed(monthly_data)),
+            'monthly_data': monthly_booking_counts(),
         }
     
     def get_reports_context(self):
@@ -145,7 +113,7 @@ class AdminDashboardSite(admin.AdminSite):
     
     def get_dashboard_stats(self):
         """Get dashboard statistics for API"""
-        today = timezone.now().date()
+        booking_totals = totals()
         
         return {
             'users': {
@@ -154,11 +122,9 @@ class AdminDashboardSite(admin.AdminSite):
                 'staff': CustomUser.objects.filter(is_staff=True).count(),
             },
             'bookings': {
-                'total': PaypalBooking.objects.count() + DVLABooking.objects.count(),
-                'paid': PaypalBooking.objects.filter(is_paid=True).count() + 
-                       DVLABooking.objects.filter(payment_completed=True).count(),
-                'pending': PaypalBooking.objects.filter(is_paid=False).count() + 
-                          DVLABooking.objects.filter(payment_completed=False).count(),
+                'total': booking_totals['bookings'],
+                'paid': booking_totals['paid'],
+                'pending': booking_totals['bookings'] - booking_totals['paid'],
             },
             'services': {
                 'paypal_services': PaypalService.objects.filter(active=True).count(),
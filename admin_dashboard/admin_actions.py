@@ -1,11 +1,12 @@
 from django.contrib import admin
 from django.http import HttpResponse
-from django.core.mail import send_mass_mail
 from django.conf import settings
 from django.utils import timezone
 import csv
 import io
 
+from email_service.outbox import OutboxFull, enqueue_bulk
+
 
 def export_as_csv(modeladmin, request, queryset):
     """Export selected objects as CSV"""
@@ -38,7 +39,7 @@ export_as_csv.short_description = "Export selected items as CSV"
 
 
 def send_email_notification(modeladmin, request, queryset):
-    """Send email notifications to selected users"""
+    """Queue email notifications to selected users on the outbox's bulk queue"""
     if not hasattr(queryset.first(), 'email'):
         modeladmin.message_user(request, "Selected objects don't have email field", level='ERROR')
         return
@@ -54,8 +55,10 @@ def send_email_notification(modeladmin, request, queryset):
     
     if emails:
         try:
-            send_mass_mail(emails, fail_silently=False)
-            modeladmin.message_user(request, f"Successfully sent {len(emails)} email notifications.")
+            enqueue_bulk(emails, category='admin_notification')
+            modeladmin.message_user(request, f"Queued {len(emails)} email notifications for sending.")
+        except OutboxFull as e:
+            modeladmin.message_user(request, f"Email queue is busy, please try again later: {e}", level='WARNING')
         except Exception as e:
             modeladmin.message_user(request, f"Error sending emails: {str(e)}", level='ERROR')
     else:
@@ -4,4 +4,7 @@ from django.apps import AppConfig
 class AdminDashboardConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'admin_dashboard'
-    verbose_name = 'Admin Dashboard'
\ No newline at end of file
+    verbose_name = 'Admin Dashboard'
+
+    def ready(self):
+        from . import signals  # noqa: F401
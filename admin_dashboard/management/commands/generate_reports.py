@@ -8,6 +8,8 @@ import os
 from accounts.models import CustomUser, Vehicle, Document
 from PAYPAL.models import Service as PaypalService, Booking as PaypalBooking
 from DVLAA.models import Service as DVLAService, Booking as DVLABooking
+from admin_dashboard.models import BookingDailyRollup
+from admin_dashboard.rollups import daily_totals, days_between, totals
 
 
 class Command(BaseCommand):
@@ -163,39 +165,20 @@ class Command(BaseCommand):
                 'PayPal Bookings', 'DVLA Bookings', 'Total Bookings'
             ])
             
-            # Generate daily revenue data
-            current_date = cutoff_date.date()
+            # Daily revenue data, from the daily rollups
+            start_date = cutoff_date.date()
             end_date = timezone.now().date()
+            daily = daily_totals(start_date, end_date)
+            empty = {'bookings': 0, 'revenue': 0}
             
-            while current_date <= end_date:
-                next_date = current_date + timedelta(days=1)
+            for current_date in days_between(start_date, end_date):
+                paypal = daily.get((current_date, 'paypal'), empty)
+                dvla = daily.get((current_date, 'dvla'), empty)
                 
-                # PayPal revenue
-                paypal_revenue = PaypalBooking.objects.filter(
-                    created__date=current_date,
-                    is_paid=True
-                ).aggregate(
-                    total=Sum('service__price')
-                )['total'] or 0
-                
-                paypal_bookings = PaypalBooking.objects.filter(
-                    created__date=current_date
-                ).count()
-                
-                # DVLA revenue
-                dvla_bookings_qs = DVLABooking.objects.filter(
-                    created_at__date=current_date,
-                    payment_completed=True
-                ).select_related('service')
-                
-                dvla_revenue = sum(
-                    booking.quantity * booking.service.price 
-                    for booking in dvla_bookings_qs
-                )
-                
-                dvla_bookings = DVLABooking.objects.filter(
-                    created_at__date=current_date
-                ).count()
+                paypal_revenue = paypal['revenue']
+                dvla_revenue = dvla['revenue']
+                paypal_bookings = paypal['bookings']
+                dvla_bookings = dvla['bookings']
                 
                 total_revenue = paypal_revenue + dvla_revenue
                 total_bookings = paypal_bookings + dvla_bookings
@@ -209,8 +192,6 @@ class Command(BaseCommand):
                     dvla_bookings,
                     total_bookings
                 ])
-                
-                current_date = next_date
         
         self.stdout.write(f'Revenue report saved to: {filename}')
 
@@ -227,52 +208,35 @@ class Command(BaseCommand):
                 'Paid Bookings', 'Revenue', 'Conversion Rate'
             ])
             
-            # PayPal services
-            paypal_services = PaypalService.objects.annotate(
-                total_bookings=Count('booking'),
-                paid_bookings=Count('booking', filter=Q(booking__is_paid=True))
-            )
-            
-            for service in paypal_services:
-                revenue = service.paid_bookings * service.price
-                conversion_rate = (
-                    (service.paid_bookings / service.total_bookings * 100) 
-                    if service.total_bookings > 0 else 0
-                )
-                
-                writer.writerow([
-                    'PayPal',
-                    service.name,
-                    f'£{service.price}',
-                    service.total_bookings,
-                    service.paid_bookings,
-                    f'£{revenue:.2f}',
-                    f'{conversion_rate:.1f}%'
-                ])
-            
-            # DVLA services
-            dvla_services = DVLAService.objects.annotate(
-                total_bookings=Count('dvlaa_bookings'),
-                paid_bookings=Count('dvlaa_bookings', filter=Q(dvlaa_bookings__payment_completed=True))
+            # Booking counts and revenue per service, from the daily rollups
+            per_service = {
+                (row['source'], row['service_id']): row
+                for row in BookingDailyRollup.objects.values('source', 'service_id').annotate(
+                    total_bookings=Sum('bookings'),
+                    paid_bookings=Sum('paid'),
+                    revenue=Sum('revenue'),
+                ).order_by()
+            }
+            empty = {'total_bookings': 0, 'paid_bookings': 0, 'revenue': 0}
+            services = (
+                [('PayPal', 'paypal', service) for service in PaypalService.objects.all()] +
+                [('DVLA', 'dvla', service) for service in DVLAService.objects.all()]
             )
             
-            for service in dvla_services:
-                # Calculate revenue considering quantity
-                paid_bookings_qs = service.dvlaa_bookings.filter(payment_completed=True)
-                revenue = sum(booking.quantity * service.price for booking in paid_bookings_qs)
-                
+            for label, source, service in services:
+                stats = per_service.get((source, service.id), empty)
                 conversion_rate = (
-                    (service.paid_bookings / service.total_bookings * 100) 
-                    if service.total_bookings > 0 else 0
+                    (stats['paid_bookings'] / stats['total_bookings'] * 100) 
+                    if stats['total_bookings'] > 0 else 0
                 )
                 
                 writer.writerow([
-                    'DVLA',
+                    label,
                     service.name,
                     f'£{service.price}',
-                    service.total_bookings,
-                    service.paid_bookings,
-                    f'£{revenue:.2f}',
+                    stats['total_bookings'],
+                    stats['paid_bookings'],
+                    f"£{stats['revenue']:.2f}",
                     f'{conversion_rate:.1f}%'
                 ])
         
@@ -291,21 +255,17 @@ class Command(BaseCommand):
         
         self.stdout.write(f'Users: {total_users} total, {active_users} active, {staff_users} staff')
         
-        # Bookings
-        paypal_bookings = PaypalBooking.objects.count()
-        dvla_bookings = DVLABooking.objects.count()
+        # Bookings and revenue, from the daily rollups
+        paypal = totals(BookingDailyRollup.objects.filter(source='paypal'))
+        dvla = totals(BookingDailyRollup.objects.filter(source='dvla'))
+        paypal_bookings = paypal['bookings']
+        dvla_bookings = dvla['bookings']
         total_bookings = paypal_bookings + dvla_bookings
         
         self.stdout.write(f'Bookings: {total_bookings} total ({paypal_bookings} PayPal, {dvla_bookings} DVLA)')
         
-        # Revenue
-        paypal_revenue = PaypalBooking.objects.filter(is_paid=True).aggregate(
-            total=Sum('service__price')
-        )['total'] or 0
-        
-        dvla_revenue_qs = DVLABooking.objects.filter(payment_completed=True).select_related('service')
-        dvla_revenue = sum(booking.quantity * booking.service.price for booking in dvla_revenue_qs)
-        
+        paypal_revenue = paypal['revenue']
+        dvla_revenue = dvla['revenue']
         total_revenue = paypal_revenue + dvla_revenue
         
         self.stdout.write(f'Revenue: £{total_revenue:.2f} total (£{paypal_revenue:.2f} PayPal, £{dvla_revenue:.2f} DVLA)')
@@ -0,0 +1,41 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+from django.utils.dateparse import parse_date
+
+from admin_dashboard.rollups import SOURCES, rebuild
+
+
+class Command(BaseCommand):
+    help = 'Recompute the daily booking rollups the admin dashboards and reports read'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--date-from', type=str, help='First day to rebuild (YYYY-MM-DD; default: the first booking)')
+        parser.add_argument('--date-to', type=str, help='Last day to rebuild (YYYY-MM-DD; default: the last booking)')
+        parser.add_argument('--days', type=int, help='Rebuild only the last N days, up to today')
+        parser.add_argument(
+            '--source',
+            choices=list(SOURCES),
+            action='append',
+            help='Bookings table to rebuild from (repeatable; default all)'
+        )
+
+    def handle(self, *args, **options):
+        start = end = None
+        if options['days']:
+            end = timezone.localdate()
+            start = end - timedelta(days=options['days'] - 1)
+        for name in ('date_from', 'date_to'):
+            if options[name]:
+                value = parse_date(options[name])
+                if value is None:
+                    raise CommandError(f"--{name.replace('_', '-')} must be a date (YYYY-MM-DD)")
+                if name == 'date_from':
+                    start = value
+                else:
+                    end = value
+
+        rows = rebuild(start=start, end=end, sources=options['source'])
+        span = f"{start or 'the first booking'} to {end or 'the last booking'}"
+        self.stdout.write(self.style.SUCCESS(f'Rebuilt booking rollups from {span}: {rows} rows'))
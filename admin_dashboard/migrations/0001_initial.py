@@ -0,0 +1,33 @@
+# Generated by Django 4.2.30 on 2026-10-18 02:52
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='BookingDailyRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField()),
+                ('source', models.CharField(choices=[('paypal', 'PayPal'), ('dvla', 'DVLA')], max_length=16)),
+                ('service_id', models.PositiveIntegerField()),
+                ('service_name', models.CharField(max_length=128)),
+                ('payment_method', models.CharField(blank=True, max_length=32)),
+                ('bookings', models.PositiveIntegerField(default=0)),
+                ('paid', models.PositiveIntegerField(default=0)),
+                ('revenue', models.DecimalField(decimal_places=2, default=0, max_digits=12)),
+                ('updated', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+        migrations.AddConstraint(
+            model_name='bookingdailyrollup',
+            constraint=models.UniqueConstraint(fields=('date', 'source', 'service_id', 'payment_method'), name='booking_rollup_cell_unique'),
+        ),
+    ]
@@ -0,0 +1,36 @@
+# Generated by Django 4.2.30 on 2026-10-18 03:18
+
+from django.db import migrations, models
+
+
+def backfill_rollups(apps, schema_editor):
+    """Fill the rollup table from the bookings that existed before it"""
+    from admin_dashboard.rollups import SOURCES, rollup_rows
+
+    BookingDailyRollup = apps.get_model('admin_dashboard', 'BookingDailyRollup')
+    models_by_source = {
+        'paypal': apps.get_model('PAYPAL', 'Booking'),
+        'dvla': apps.get_model('DVLAA', 'Booking'),
+    }
+    for name, source in SOURCES.items():
+        rows = rollup_rows(source, models_by_source[name].objects.all())
+        BookingDailyRollup.objects.filter(source=name).delete()
+        BookingDailyRollup.objects.bulk_create([BookingDailyRollup(**row) for row in rows], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('admin_dashboard', '0001_initial'),
+        ('PAYPAL', '0015_booking_created_id_index'),
+        ('DVLAA', '0006_vehicle'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='bookingdailyrollup',
+            name='amount_paid',
+            field=models.DecimalField(decimal_places=2, default=0, max_digits=12),
+        ),
+        migrations.RunPython(backfill_rollups, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,36 @@
+from django.db import models
+
+
+class BookingDailyRollup(models.Model):
+    """
+    Bookings created on one day for one service and payment method,
+    maintained by admin_dashboard.rollups so dashboards and reports never
+    aggregate the bookings tables themselves.
+    """
+    SOURCE_CHOICES = [
+        ('paypal', 'PayPal'),
+        ('dvla', 'DVLA'),
+    ]
+
+    date = models.DateField()
+    source = models.CharField(max_length=16, choices=SOURCE_CHOICES)
+    service_id = models.PositiveIntegerField()  # PAYPAL.Service or DVLAA.Service, by source
+    service_name = models.CharField(max_length=128)
+    payment_method = models.CharField(max_length=32, blank=True)
+    bookings = models.PositiveIntegerField(default=0)
+    paid = models.PositiveIntegerField(default=0)
+    revenue = models.DecimalField(max_digits=12, decimal_places=2, default=0)  # paid bookings at list price
+    amount_paid = models.DecimalField(max_digits=12, decimal_places=2, default=0)  # what was actually charged
+
+    updated = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=['date', 'source', 'service_id', 'payment_method'],
+                name='booking_rollup_cell_unique',
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.date} {self.source} {self.service_name} ({self.payment_method or 'unknown'}): {self.bookings}"
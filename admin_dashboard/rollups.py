@@ -0,0 +1,265 @@
+"""
+Daily booking rollups (date x source x service x payment method).
+
+A day's rows are recomputed from that day's bookings whenever one of them
+is saved, deleted or paid (see admin_dashboard.signals), after the change
+commits. Dashboards and reports sum these rows instead of scanning the
+bookings tables, so their cost follows the number of days shown. Rebuild
+with ``manage.py rebuild_booking_rollups`` after loading data any other
+way.
+
+A refresh counts and writes a day inside one transaction that holds a lock
+on that (source, day), so concurrent refreshes run one after the other and
+the last one always sees the latest bookings. A rebuild locks the whole
+source.
+"""
+import logging
+import zlib
+from datetime import timedelta
+
+from django.db import DatabaseError, IntegrityError, connection, transaction
+from django.db.models import Count, DecimalField, F, Q, Sum, Value
+from django.db.models.functions import Coalesce, TruncDate, TruncMonth
+from django.utils import timezone
+
+from admin_api.trends import buckets, previous_buckets
+from DVLAA.models import Booking as DVLABooking
+from PAYPAL.models import Booking as PaypalBooking
+
+from .models import BookingDailyRollup
+
+logger = logging.getLogger(__name__)
+
+MONEY = DecimalField(max_digits=12, decimal_places=2)
+
+
+class RollupSource:
+    """How one bookings table maps onto rollup rows"""
+
+    def __init__(self, name, model, created, paid, revenue, amount_paid, fields):
+        self.name = name
+        self.model = model
+        self.created = created
+        self.paid = paid
+        self.revenue = revenue
+        self.amount_paid = amount_paid
+        self.fields = set(fields)  # booking fields that change the rollup
+
+    def day(self, booking):
+        return timezone.localdate(getattr(booking, self.created))
+
+
+SOURCES = {
+    'paypal': RollupSource(
+        'paypal', PaypalBooking, 'created',
+        paid=Q(is_paid=True),
+        # Revenue at list price, as the dashboards and reports have always
+        # counted it; amount_paid is what PayPal captured (payments totals)
+        revenue=F('service__price'),
+        amount_paid=F('payment_amount'),
+        fields=['created', 'service', 'payment_method', 'is_paid', 'payment_amount'],
+    ),
+    'dvla': RollupSource(
+        'dvla', DVLABooking, 'created_at',
+        paid=Q(payment_completed=True),
+        revenue=F('quantity') * F('service__price'),
+        amount_paid=F('quantity') * F('service__price'),
+        fields=['created_at', 'service', 'payment_method', 'payment_completed', 'quantity'],
+    ),
+}
+SOURCE_BY_MODEL = {source.model: source for source in SOURCES.values()}
+
+
+def rollup_rows(source, bookings):
+    """
+    Field values of the rollup rows for ``bookings``, one dict per row.
+    Uses only ``bookings``' own model, so migrations can call it with
+    historical models.
+    """
+    grouped = (
+        bookings
+        .annotate(day=TruncDate(source.created), method=Coalesce('payment_method', Value('')))
+        .values('day', 'service_id', 'service__name', 'method')
+        .annotate(
+            count=Count('id'),
+            paid_count=Count('id', filter=source.paid),
+            paid_revenue=Sum(source.revenue, filter=source.paid, output_field=MONEY),
+            paid_amount=Sum(source.amount_paid, filter=source.paid, output_field=MONEY),
+        )
+        .order_by()
+    )
+    return [
+        {
+            'date': row['day'],
+            'source': source.name,
+            'service_id': row['service_id'],
+            'service_name': row['service__name'],
+            'payment_method': row['method'],
+            'bookings': row['count'],
+            'paid': row['paid_count'],
+            'revenue': row['paid_revenue'] or 0,
+            'amount_paid': row['paid_amount'] or 0,
+        }
+        for row in grouped
+    ]
+
+
+def _advisory_key(*parts):
+    return zlib.crc32(':'.join(['booking-rollup', *map(str, parts)]).encode()) & 0x7fffffff
+
+
+def _lock(source_name, days=None):
+    """
+    Hold a lock on each of ``days`` of one source (None: on the whole source)
+    until the transaction ends.
+
+    PostgreSQL takes advisory locks, which also cover days with no rows
+    yet; refreshes share the source lock that a rebuild takes exclusively.
+    Elsewhere the existing rows are locked and the unique constraint
+    catches the rest.
+    """
+    if connection.vendor == 'postgresql':
+        with connection.cursor() as cursor:
+            if days is None:
+                cursor.execute('SELECT pg_advisory_xact_lock(%s)', [_advisory_key(source_name)])
+                return
+            cursor.execute('SELECT pg_advisory_xact_lock_shared(%s)', [_advisory_key(source_name)])
+            for day in sorted(days):  # Same order everywhere, so refreshes cannot deadlock
+                cursor.execute('SELECT pg_advisory_xact_lock(%s, %s)', [_advisory_key(source_name), day.toordinal()])
+        return
+
+    rollups = BookingDailyRollup.objects.filter(source=source_name)
+    if days is not None:
+        rollups = rollups.filter(date__in=days)
+    list(rollups.select_for_update().order_by('id').values_list('id', flat=True))
+
+
+def _replace(source, bookings, rollups, days=None):
+    """
+    Swap ``rollups`` for rows recomputed from ``bookings`` under the lock for
+    ``days`` (None: the whole source); returns the row count
+    """
+    for attempt in range(2):
+        try:
+            with transaction.atomic():
+                _lock(source.name, days)
+                rows = [BookingDailyRollup(**row) for row in rollup_rows(source, bookings)]
+                rollups.delete()
+                BookingDailyRollup.objects.bulk_create(rows, batch_size=500)
+            return len(rows)
+        except IntegrityError:
+            # A refresh of a day that had no rows yet got there first; recount once
+            if attempt:
+                raise
+
+
+def refresh_days(source_name, days):
+    """Recompute the rollup rows of ``days`` (dates) for one source"""
+    days = set(days)
+    if not days:
+        return 0
+    source = SOURCES[source_name]
+    bookings = source.model.objects.filter(**{f'{source.created}__date__in': days})
+    rollups = BookingDailyRollup.objects.filter(source=source_name, date__in=days)
+    return _replace(source, bookings, rollups, days)
+
+
+def rebuild(start=None, end=None, sources=None):
+    """Recompute every rollup row between the dates ``start`` and ``end`` (None: unbounded)"""
+    total = 0
+    for name in sources or SOURCES:
+        source = SOURCES[name]
+        bookings = source.model.objects.all()
+        rollups = BookingDailyRollup.objects.filter(source=name)
+        if start:
+            bookings = bookings.filter(**{f'{source.created}__date__gte': start})
+            rollups = rollups.filter(date__gte=start)
+        if end:
+            bookings = bookings.filter(**{f'{source.created}__date__lte': end})
+            rollups = rollups.filter(date__lte=end)
+        total += _replace(source, bookings, rollups)
+    return total
+
+
+def _refresh_quietly(source_name, days):
+    try:
+        refresh_days(source_name, days)
+    except DatabaseError as e:
+        logger.error(f"Could not refresh {source_name} booking rollups for {sorted(days)}: {e}; "
+                     f"run rebuild_booking_rollups")
+
+
+def schedule_refresh(source_name, days):
+    """Refresh ``days`` once the current transaction commits (immediately outside one)"""
+    days = set(days)
+    if days:
+        transaction.on_commit(lambda: _refresh_quietly(source_name, days))
+
+
+def totals(rollups=None, **periods):
+    """
+    Sums of bookings, paid, revenue and amount_paid over ``rollups``
+    (default all rows), plus one sum per keyword: ``today=Q(date=today)``
+    adds today_bookings, today_paid, today_revenue and today_amount_paid.
+    One query.
+    """
+    rollups = rollups if rollups is not None else BookingDailyRollup.objects.all()
+    aggregates = {}
+    for period, condition in [(None, None), *periods.items()]:
+        for field in ('bookings', 'paid', 'revenue', 'amount_paid'):
+            name = f'{period}_{field}' if period else field
+            # Aliases may not shadow the fields being summed
+            aggregates[f'sum_{name}'] = Sum(field, filter=condition)
+    return {name[len('sum_'):]: value or 0 for name, value in rollups.aggregate(**aggregates).items()}
+
+
+def daily_totals(start, end, by=('source',)):
+    """{(date, *by values): {'bookings', 'paid', 'revenue'}} for each day with bookings"""
+    rows = (
+        BookingDailyRollup.objects
+        .filter(date__gte=start, date__lte=end)
+        .values('date', *by)
+        .annotate(day_bookings=Sum('bookings'), day_paid=Sum('paid'), day_revenue=Sum('revenue'))
+        .order_by()
+    )
+    return {
+        (row['date'], *(row[field] for field in by)): {
+            'bookings': row['day_bookings'],
+            'paid': row['day_paid'],
+            'revenue': row['day_revenue'],
+        }
+        for row in rows
+    }
+
+
+def monthly_booking_counts(months=12):
+    """Bookings per calendar month for the last ``months`` months, oldest first, by source"""
+    end = timezone.localdate()
+    starts = buckets(previous_buckets(end, 'month', months), end, 'month')
+    rows = (
+        BookingDailyRollup.objects
+        .filter(date__gte=starts[0])
+        .annotate(month=TruncMonth('date'))
+        .values('month', 'source')
+        .annotate(month_bookings=Sum('bookings'))
+        .order_by()
+    )
+    counts = {(row['month'], row['source']): row['month_bookings'] for row in rows}
+    monthly = []
+    for start in starts:
+        paypal_count = counts.get((start, 'paypal'), 0)
+        dvla_count = counts.get((start, 'dvla'), 0)
+        monthly.append({
+            'month': start.strftime('%B %Y'),
+            'paypal_bookings': paypal_count,
+            'dvla_bookings': dvla_count,
+            'total': paypal_count + dvla_count
+        })
+    return monthly
+
+
+def days_between(start, end):
+    day = start
+    while day <= end:
+        yield day
+        day += timedelta(days=1)
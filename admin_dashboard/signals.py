@@ -0,0 +1,41 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from common.signals import bookings_updated
+from DVLAA.models import Booking as DVLABooking, Service as DVLAService
+from PAYPAL.models import Booking as PaypalBooking, Service as PaypalService
+
+from .models import BookingDailyRollup
+from .rollups import SOURCE_BY_MODEL, schedule_refresh
+
+
+@receiver(post_save, sender=PaypalBooking)
+@receiver(post_save, sender=DVLABooking)
+def booking_saved(sender, instance, update_fields=None, **kwargs):
+    source = SOURCE_BY_MODEL[sender]
+    if update_fields and not source.fields.intersection(update_fields):
+        return
+    schedule_refresh(source.name, [source.day(instance)])
+
+
+@receiver(post_delete, sender=PaypalBooking)
+@receiver(post_delete, sender=DVLABooking)
+def booking_deleted(sender, instance, **kwargs):
+    source = SOURCE_BY_MODEL[sender]
+    schedule_refresh(source.name, [source.day(instance)])
+
+
+@receiver(bookings_updated)
+def bulk_bookings_updated(sender, bookings, **kwargs):
+    source = SOURCE_BY_MODEL[sender]
+    schedule_refresh(source.name, {source.day(booking) for booking in bookings})
+
+
+@receiver(post_save, sender=PaypalService)
+@receiver(post_save, sender=DVLAService)
+def service_saved(sender, instance, **kwargs):
+    """Keep rollup rows labelled with the current service name"""
+    source = 'paypal' if sender is PaypalService else 'dvla'
+    BookingDailyRollup.objects.filter(source=source, service_id=instance.id).exclude(
+        service_name=instance.name
+    ).update(service_name=instance.name)
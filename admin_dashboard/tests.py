@@ -0,0 +1,270 @@
+import csv
+import gzip
+import io
+import json
+from datetime import datetime, timedelta, timezone as dt_timezone
+from decimal import Decimal
+from importlib import import_module
+from unittest import mock
+
+from django.apps import apps as django_apps
+from django.core.management import call_command
+from django.db import connection
+from django.db.models import F, Sum, Value
+from django.db.models.functions import Coalesce
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.utils import timezone
+
+from accounts.models import CustomUser
+from admin_dashboard import rollups
+from admin_dashboard.models import BookingDailyRollup
+from common.signals import bookings_updated
+from DVLAA.models import Booking as DVLABooking, Service as DVLAService
+from PAYPAL.models import Booking as PaypalBooking, Service as PaypalService
+
+
+def live_totals():
+    """{(date, source): (bookings, paid, revenue, amount_paid)} aggregated from the bookings tables themselves"""
+    totals = {}
+    for source, bookings, created, paid, revenue, amount_paid in (
+        ('paypal', PaypalBooking.objects.all(), 'created', 'is_paid',
+         F('service__price'), Coalesce('payment_amount', Value(0), output_field=rollups.MONEY)),
+        ('dvla', DVLABooking.objects.all(), 'created_at', 'payment_completed',
+         F('quantity') * F('service__price'), F('quantity') * F('service__price')),
+    ):
+        for booking in bookings.annotate(revenue_=revenue, amount_paid_=amount_paid):
+            day = timezone.localdate(getattr(booking, created))
+            row = totals.get((day, source), (0, 0, Decimal('0'), Decimal('0')))
+            is_paid = getattr(booking, paid)
+            totals[(day, source)] = (row[0] + 1, row[1] + is_paid,
+                                     row[2] + (booking.revenue_ if is_paid else 0),
+                                     row[3] + (booking.amount_paid_ if is_paid else 0))
+    return totals
+
+
+def rollup_totals():
+    rows = BookingDailyRollup.objects.values('date', 'source').annotate(
+        day_bookings=Sum('bookings'), day_paid=Sum('paid'), day_revenue=Sum('revenue'),
+        day_amount_paid=Sum('amount_paid'),
+    ).order_by()
+    return {
+        (row['date'], row['source']): (row['day_bookings'], row['day_paid'], row['day_revenue'], row['day_amount_paid'])
+        for row in rows if row['day_bookings']
+    }
+
+
+class RollupTests(TestCase):
+    def setUp(self):
+        self.service = PaypalService.objects.create(code='mot', name='MOT', price='50.00')
+        self.dvla_service = DVLAService.objects.create(name='Full service', price='120.00')
+
+    def assertRollupsMatch(self):
+        self.assertEqual(rollup_totals(), live_totals())
+
+    def _book(self, **fields):
+        with self.captureOnCommitCallbacks(execute=True):
+            return PaypalBooking.objects.create(service=self.service, date=timezone.localdate(), time='10:00', **fields)
+
+    def test_create_pay_and_delete(self):
+        first = self._book(payment_method='card')
+        second = self._book(payment_method='paypal')
+        self.assertRollupsMatch()
+
+        with self.captureOnCommitCallbacks(execute=True):
+            first.is_paid = True
+            first.payment_amount = Decimal('45.00')
+            first.save()
+        self.assertRollupsMatch()
+        # Revenue stays at list price; amount_paid is what was captured
+        self.assertEqual((rollups.totals()['revenue'], rollups.totals()['amount_paid']),
+                         (Decimal('50.00'), Decimal('45.00')))
+
+        with self.captureOnCommitCallbacks(execute=True) as callbacks:
+            second.save(update_fields=['customer_phone'])
+        self.assertEqual(callbacks, [])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            first.delete()
+        self.assertRollupsMatch()
+        self.assertEqual(rollups.totals(), {'bookings': 1, 'paid': 0, 'revenue': 0, 'amount_paid': 0})
+
+    def test_dvla_bookings(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            booking = DVLABooking.objects.create(service=self.dvla_service, quantity=2, payment_method='card')
+        with self.captureOnCommitCallbacks(execute=True):
+            booking.payment_completed = True
+            booking.save()
+        self.assertRollupsMatch()
+        self.assertEqual(rollups.totals()['revenue'], Decimal('240.00'))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            booking.delete()
+        self.assertEqual(rollup_totals(), {})
+
+    def test_bulk_update_signal(self):
+        bookings = [self._book() for _ in range(3)]
+        with self.captureOnCommitCallbacks(execute=True):
+            PaypalBooking.objects.filter(id__in=[b.id for b in bookings[:2]]).update(is_paid=True, payment_status='completed')
+            bookings_updated.send(sender=PaypalBooking, bookings=bookings[:2])
+        self.assertRollupsMatch()
+        self.assertEqual(rollups.totals()['paid'], 2)
+
+        # The same signal carries DVLA bulk updates
+        with self.captureOnCommitCallbacks(execute=True):
+            dvla = DVLABooking.objects.create(service=self.dvla_service)
+        with self.captureOnCommitCallbacks(execute=True):
+            DVLABooking.objects.filter(pk=dvla.pk).update(payment_completed=True)
+            bookings_updated.send(sender=DVLABooking, bookings=[dvla])
+        self.assertRollupsMatch()
+        self.assertEqual(rollups.totals()['paid'], 3)
+
+    def test_service_rename(self):
+        self._book()
+        self.service.name = 'MOT test'
+        self.service.save()
+        self.assertEqual(list(BookingDailyRollup.objects.values_list('service_name', flat=True)), ['MOT test'])
+
+    def test_rebuild_command(self):
+        booking = self._book(is_paid=True)
+        self._book()
+        # Loaded without signals: moved to another day, and a stale row left behind
+        PaypalBooking.objects.filter(pk=booking.pk).update(created=timezone.now() - timedelta(days=40))
+        BookingDailyRollup.objects.create(date=timezone.localdate() - timedelta(days=3), source='paypal',
+                                          service_id=self.service.id, service_name='MOT', bookings=9)
+        self.assertNotEqual(rollup_totals(), live_totals())
+
+        call_command('rebuild_booking_rollups', '--days', '7', stdout=mock.Mock())
+        self.assertEqual(rollups.totals()['bookings'], 1)
+
+        call_command('rebuild_booking_rollups', stdout=mock.Mock())
+        self.assertRollupsMatch()
+
+    def test_refresh_days_matches_live_counts(self):
+        when = datetime(2026, 2, 1, 12, 0, tzinfo=dt_timezone.utc)
+        booking = self._book(is_paid=True)
+        PaypalBooking.objects.filter(pk=booking.pk).update(created=when)
+        rollups.refresh_days('paypal', [timezone.localdate(when), timezone.localdate()])
+        self.assertRollupsMatch()
+
+    def test_revenue_matches_previous_aggregates(self):
+        self._book(is_paid=True, payment_amount=Decimal('45.00'))
+        self._book(is_paid=True)
+        self._book()
+        with self.captureOnCommitCallbacks(execute=True):
+            DVLABooking.objects.create(service=self.dvla_service, quantity=2, payment_completed=True)
+        totals = rollups.totals(rollups=BookingDailyRollup.objects.filter(source='paypal'))
+        # What the dashboards and revenue report summed from the bookings tables
+        self.assertEqual(totals['revenue'], PaypalBooking.objects.filter(is_paid=True).aggregate(
+            total=Sum('service__price'))['total'])
+        # ... and what the payments totals summed
+        self.assertEqual(totals['amount_paid'], PaypalBooking.objects.filter(is_paid=True).aggregate(
+            total=Sum('payment_amount'))['total'])
+        dvla = rollups.totals(rollups=BookingDailyRollup.objects.filter(source='dvla'))
+        self.assertEqual(dvla['revenue'], sum(b.quantity * b.service.price
+                                              for b in DVLABooking.objects.filter(payment_completed=True)))
+
+    def test_migration_backfills_existing_bookings(self):
+        backfill = import_module('admin_dashboard.migrations.0002_bookingdailyrollup_amount_paid').backfill_rollups
+        self._book(is_paid=True, payment_amount=Decimal('45.00'))
+        DVLABooking.objects.create(service=self.dvla_service, payment_completed=True)
+        BookingDailyRollup.objects.all().delete()
+
+        backfill(django_apps, None)
+        self.assertRollupsMatch()
+
+
+class RollupLockingTests(TransactionTestCase):
+    def test_counts_and_writes_under_the_lock(self):
+        service = PaypalService.objects.create(code='mot', name='MOT', price='50.00')
+        booking = PaypalBooking.objects.create(service=service, date=timezone.localdate(), time='10:00')
+        day = timezone.localdate(booking.created)
+
+        calls = []
+        lock = mock.Mock(side_effect=lambda *args: calls.append(('lock', connection.in_atomic_block)))
+        rows = rollups.rollup_rows
+
+        def count(*args):
+            calls.append(('count', connection.in_atomic_block))
+            return rows(*args)
+
+        with mock.patch.object(rollups, '_lock', lock), mock.patch.object(rollups, 'rollup_rows', side_effect=count):
+            rollups.refresh_days('paypal', [day])
+            rollups.rebuild()
+
+        self.assertEqual(calls, [('lock', True), ('count', True)] * 3)
+        self.assertEqual(lock.call_args_list[0].args, ('paypal', {day}))
+        self.assertEqual([call.args for call in lock.call_args_list[1:]], [('paypal', None), ('dvla', None)])
+        self.assertEqual(rollup_totals(), live_totals())
+
+
+@override_settings(EXPORT_CHUNK_SIZE=2)
+class ExportTests(TestCase):
+    url = '/admin-dashboard/api/export/'
+
+    def setUp(self):
+        self.staff = CustomUser.objects.create_user(email='staff@example.com', is_staff=True)
+        for i in range(4):
+            CustomUser.objects.create_user(email=f'user{i}@example.com')
+        service = PaypalService.objects.create(code='mot', name='MOT', price='50.00')
+        dvla_service = DVLAService.objects.create(name='Full service', price='120.00')
+        self.paypal = [
+            PaypalBooking.objects.create(service=service, date=timezone.localdate(), time='10:00', is_paid=i == 0)
+            for i in range(3)
+        ]
+        self.dvla = [DVLABooking.objects.create(service=dvla_service) for _ in range(3)]
+        self.client.force_login(self.staff)
+
+    def _get(self, **params):
+        response = self.client.get(self.url, params, secure=True)
+        if not response.streaming:
+            return response, None
+        body = b''.join(response.streaming_content)
+        if params.get('gzip'):
+            body = gzip.decompress(body)
+        return response, body.decode()
+
+    def test_staff_only(self):
+        self.client.logout()
+        response = self.client.get(self.url, secure=True)
+        self.assertEqual(response.status_code, 302)
+
+    def test_csv_users(self):
+        response, body = self._get(type='users', format='csv')
+        self.assertEqual(response['Content-Type'], 'text/csv')
+        rows = list(csv.reader(io.StringIO(body)))
+        self.assertEqual(rows[0], ['ID', 'Email', 'First Name', 'Last Name', 'Date Joined', 'Is Active', 'Is Staff'])
+        self.assertEqual([row[1] for row in rows[1:]],
+                         list(CustomUser.objects.order_by('id').values_list('email', flat=True)))
+
+    def test_json_bookings_in_id_order_across_sections(self):
+        response, body = self._get(type='bookings', format='json')
+        self.assertEqual(response['Content-Type'], 'application/json')
+        ids = [record['id'] for record in json.loads(body)]
+        self.assertEqual(ids, [f'PP-{b.id}' for b in self.paypal] + [f'DV-{b.id}' for b in self.dvla])
+
+    def test_ndjson_resumes_after_cursor(self):
+        response, body = self._get(type='bookings', format='ndjson', after=f'PP-{self.paypal[1].id}')
+        self.assertEqual(response['Content-Type'], 'application/x-ndjson')
+        ids = [json.loads(line)['id'] for line in body.splitlines()]
+        self.assertEqual(ids, [f'PP-{self.paypal[2].id}'] + [f'DV-{b.id}' for b in self.dvla])
+
+        _, body = self._get(type='bookings', format='ndjson', after=f'DV-{self.dvla[0].id}')
+        self.assertEqual([json.loads(line)['id'] for line in body.splitlines()], [f'DV-{b.id}' for b in self.dvla[1:]])
+
+        _, body = self._get(type='users', format='ndjson', after=str(self.staff.id))
+        self.assertEqual(len(body.splitlines()), 4)
+
+    def test_gzip(self):
+        _, plain = self._get(type='bookings', format='csv')
+        response, body = self._get(type='bookings', format='csv', gzip='1')
+        self.assertEqual(response['Content-Type'], 'application/gzip')
+        self.assertIn('bookings_export.csv.gz', response['Content-Disposition'])
+        self.assertEqual(body, plain)
+
+    def test_bad_requests(self):
+        for params in ({'type': 'payments'}, {'format': 'xml'}, {'after': 'XX-1'},
+                       {'type': 'bookings', 'after': 'PP-x'}, {'date_from': 'not-a-date'},
+                       {'type': 'bookings', 'date_to': '2026-13-45'}):
+            response = self.client.get(self.url, params, secure=True)
+            self.assertEqual(response.status_code, 400, params)
+            self.assertIn('error', response.json())
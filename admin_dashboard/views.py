@@ -1,15 +1,19 @@
 from django.shortcuts import render
-from django.http import JsonResponse, HttpResponse
+from django.conf import settings
+from django.http import JsonResponse, StreamingHttpResponse
 from django.contrib.admin.views.decorators import staff_member_required
+from django.core.exceptions import ValidationError
 from django.db.models import Count, Sum, Q
 from django.utils import timezone
 from datetime import datetime, timedelta
 import csv
 import json
+import zlib
 
 from accounts.models import CustomUser, Booking as AccountsBooking, Vehicle, Document
 from PAYPAL.models import Booking as PaypalBooking, Service as PaypalService
 from DVLAA.models import Booking as DVLABooking, Service as DVLAService, CartItem
+from .rollups import monthly_booking_counts, totals
 
 
 @staff_member_required
@@ -42,18 +46,33 @@ def dashboard_stats_api(request):
 
 @staff_member_required
 def export_data(request):
-    """Export data in various formats"""
+    """
+    Export data in various formats, streamed.
+
+    ?after=<id> resumes after the last row of an interrupted export (the ID
+    column, e.g. 42 or PP-42); ?gzip=1 sends a gzipped file.
+    """
     data_type = request.GET.get('type', 'users')
     format_type = request.GET.get('format', 'csv')
     date_from = request.GET.get('date_from')
     date_to = request.GET.get('date_to')
+    after = request.GET.get('after')
+    compress = request.GET.get('gzip') in ('1', 'true')
     
-    if format_type == 'csv':
-        return export_csv(data_type, date_from, date_to)
-    elif format_type == 'json':
-        return export_json(data_type, date_from, date_to)
-    else:
-        return JsonResponse({'error': 'Unsupported format'}, status=400)
+    if data_type not in EXPORT_TYPES:
+        return JsonResponse({'error': 'Unsupported data type'}, status=400)
+    try:
+        if format_type == 'csv':
+            return export_csv(data_type, date_from, date_to, after, compress)
+        elif format_type in ('json', 'ndjson'):
+            return export_json(data_type, date_from, date_to, after, compress, ndjson=format_type == 'ndjson')
+        else:
+            return JsonResponse({'error': 'Unsupported format'}, status=400)
+    except ValueError as e:
+        return JsonResponse({'error': str(e)}, status=400)
+    except ValidationError as e:
+        # date_from/date_to the date filters cannot parse
+        return JsonResponse({'error': ' '.join(e.messages)}, status=400)
 
 
 def get_dashboard_context():
@@ -66,23 +85,11 @@ def get_dashboard_context():
     new_users_today = CustomUser.objects.filter(date_joined__date=today).count()
     new_users_month = CustomUser.objects.filter(date_joined__date__gte=last_30_days).count()
     
-    # Booking statistics
-    total_bookings = PaypalBooking.objects.count() + DVLABooking.objects.count()
-    bookings_today = (
-        PaypalBooking.objects.filter(created__date=today).count() +
-        DVLABooking.objects.filter(created_at__date=today).count()
-    )
-    
-    # Revenue statistics
-    paypal_revenue = PaypalBooking.objects.filter(is_paid=True).aggregate(
-        total=Sum('service__price')
-    )['total'] or 0
-    
-    dvla_revenue = DVLABooking.objects.filter(payment_completed=True).aggregate(
-        total=Sum('service__price')
-    )['total'] or 0
-    
-    total_revenue = paypal_revenue + dvla_revenue
+    # Booking and revenue statistics, from the daily rollups
+    booking_totals = totals(today=Q(date=today))
+    total_bookings = booking_totals['bookings']
+    bookings_today = booking_totals['today_bookings']
+    total_revenue = booking_totals['revenue']
     
     # Recent activities
     recent_bookings = list(PaypalBooking.objects.select_related('user', 'service').order_by('-created')[:5])
@@ -111,31 +118,10 @@ def get_analytics_context():
         booking_count=Count('dvlaa_bookings')
     ).order_by('-booking_count')
     
-    # Monthly booking trends
-    monthly_data = []
-    for i in range(12):
-        month_start = timezone.now().replace(day=1) - timedelta(days=30*i)
-        month_end = month_start + timedelta(days=30)
-        
-        paypal_count = PaypalBooking.objects.filter(
-            created__gte=month_start, created__lt=month_end
-        ).count()
-        
-        dvla_count = DVLABooking.objects.filter(
-            created_at__gte=month_start, created_at__lt=month_end
-        ).count()
-        
-        monthly_data.append({
-            'month': month_start.strftime('%B %Y'),
-            'paypal_bookings': paypal_count,
-            'dvla_bookings': dvla_count,
-            'total': paypal_count + dvla_count
-        })
-    
     return {
         'paypal_services': paypal_services,
         'dvla_services': dvla_services,
-        'monthly_data': list(reversed(monthly_data)),
+        'monthly_data': monthly_booking_counts(),
     }
 
 
@@ -153,7 +139,7 @@ def get_reports_context():
 
 def get_dashboard_stats():
     """Get dashboard statistics for API"""
-    today = timezone.now().date()
+    booking_totals = totals()
     
     return {
         'users': {
@@ -162,11 +148,9 @@ def get_dashboard_stats():
             'staff': CustomUser.objects.filter(is_staff=True).count(),
         },
         'bookings': {
-            'total': PaypalBooking.objects.count() + DVLABooking.objects.count(),
-            'paid': PaypalBooking.objects.filter(is_paid=True).count() + 
-                   DVLABooking.objects.filter(payment_completed=True).count(),
-            'pending': PaypalBooking.objects.filter(is_paid=False).count() + 
-                      DVLABooking.objects.filter(payment_completed=False).count(),
+            'total': booking_totals['bookings'],
+            'paid': booking_totals['paid'],
+            'pending': booking_totals['bookings'] - booking_totals['paid'],
         },
         'services': {
             'paypal_services': PaypalService.objects.filter(active=True).count(),
@@ -175,122 +159,188 @@ def get_dashboard_stats():
     }
 
 
-def export_csv(data_type, date_from=None, date_to=None):
-    """Export data as CSV"""
-    response = HttpResponse(content_type='text/csv')
-    response['Content-Disposition'] = f'attachment; filename="{data_type}_export.csv"'
-    
-    writer = csv.writer(response)
-    
+class ExportSection:
+    """One table's rows in an export, keyed by ``prefix`` + id"""
+
+    def __init__(self, prefix, queryset, record):
+        self.prefix = prefix
+        self.queryset = queryset
+        self.record = record
+
+
+def _user_record(user):
+    return {
+        'id': user.id,
+        'email': user.email,
+        'first_name': user.first_name,
+        'last_name': user.last_name,
+        'date_joined': user.date_joined.isoformat(),
+        'is_active': user.is_active,
+        'is_staff': user.is_staff
+    }
+
+
+def _paypal_booking_record(booking):
+    return {
+        'id': f'PP-{booking.id}',
+        'user': booking.user.email if booking.user else booking.customer_email,
+        'service': booking.service.name,
+        'date': booking.date.isoformat(),
+        'status': 'Verified' if booking.is_verified else 'Pending',
+        'payment_status': 'Paid' if booking.is_paid else 'Unpaid',
+        'type': 'PayPal'
+    }
+
+
+def _dvla_booking_record(booking):
+    return {
+        'id': f'DV-{booking.id}',
+        'user': booking.user.email if booking.user else booking.customer_email,
+        'service': booking.service.name,
+        'date': booking.scheduled_for.isoformat() if booking.scheduled_for else None,
+        'status': booking.status,
+        'payment_status': 'Paid' if booking.payment_completed else 'Unpaid',
+        'type': 'DVLA'
+    }
+
+
+def _export_sections(data_type, date_from=None, date_to=None):
     if data_type == 'users':
-        writer.writerow(['Email', 'First Name', 'Last Name', 'Date Joined', 'Is Active', 'Is Staff'])
         users = CustomUser.objects.all()
         if date_from:
             users = users.filter(date_joined__gte=date_from)
         if date_to:
             users = users.filter(date_joined__lte=date_to)
-        
-        for user in users:
-            writer.writerow([
-                user.email, user.first_name, user.last_name,
-                user.date_joined, user.is_active, user.is_staff
-            ])
+        return [ExportSection('', users, _user_record)]
     
-    elif data_type == 'bookings':
-        writer.writerow(['ID', 'User', 'Service', 'Date', 'Status', 'Payment Status'])
-        
-        # PayPal bookings
-        paypal_bookings = PaypalBooking.objects.select_related('user', 'service')
-        if date_from:
-            paypal_bookings = paypal_bookings.filter(created__gte=date_from)
-        if date_to:
-            paypal_bookings = paypal_bookings.filter(created__lte=date_to)
-        
-        for booking in paypal_bookings:
-            writer.writerow([
-                f'PP-{booking.id}', booking.user.email, booking.service.name,
-                booking.date, 'Verified' if booking.is_verified else 'Pending',
-                'Paid' if booking.is_paid else 'Unpaid'
-            ])
-        
-        # DVLA bookings
-        dvla_bookings = DVLABooking.objects.select_related('user', 'service')
-        if date_from:
-            dvla_bookings = dvla_bookings.filter(created_at__gte=date_from)
-        if date_to:
-            dvla_bookings = dvla_bookings.filter(created_at__lte=date_to)
-        
-        for booking in dvla_bookings:
-            writer.writerow([
-                f'DV-{booking.id}', booking.user.email, booking.service.name,
-                booking.scheduled_for, booking.status,
-                'Paid' if booking.payment_completed else 'Unpaid'
-            ])
+    paypal_bookings = PaypalBooking.objects.select_related('user', 'service')
+    if date_from:
+        paypal_bookings = paypal_bookings.filter(created__gte=date_from)
+    if date_to:
+        paypal_bookings = paypal_bookings.filter(created__lte=date_to)
+    
+    dvla_bookings = DVLABooking.objects.select_related('user', 'service')
+    if date_from:
+        dvla_bookings = dvla_bookings.filter(created_at__gte=date_from)
+    if date_to:
+        dvla_bookings = dvla_bookings.filter(created_at__lte=date_to)
     
+    return [
+        ExportSection('PP-', paypal_bookings, _paypal_booking_record),
+        ExportSection('DV-', dvla_bookings, _dvla_booking_record),
+    ]
+
+
+# Columns of the CSV export: (header, record key)
+EXPORT_TYPES = {
+    'users': [
+        ('ID', 'id'), ('Email', 'email'), ('First Name', 'first_name'), ('Last Name', 'last_name'),
+        ('Date Joined', 'date_joined'), ('Is Active', 'is_active'), ('Is Staff', 'is_staff'),
+    ],
+    'bookings': [
+        ('ID', 'id'), ('User', 'user'), ('Service', 'service'), ('Date', 'date'),
+        ('Status', 'status'), ('Payment Status', 'payment_status'),
+    ],
+}
+
+
+def export_records(data_type, date_from=None, date_to=None, after=None):
+    """
+    Iterator over export records in id order, reading EXPORT_CHUNK_SIZE rows
+    at a time by keyset, so memory use does not grow with the table.
+    ``after`` is the id of the last record already exported; a malformed
+    one raises ValueError here rather than mid-stream.
+    """
+    sections = _export_sections(data_type, date_from, date_to)
+    start, last_id = 0, 0
+    if after:
+        for index, section in enumerate(sections):
+            number = after[len(section.prefix):]
+            if after.startswith(section.prefix) and number.isdigit():
+                start, last_id = index, int(number)
+                break
+        else:
+            raise ValueError(f'Invalid export cursor: {after}')
+    return _iter_records(sections[start:], last_id)
+
+
+def _iter_records(sections, last_id):
+    chunk_size = getattr(settings, 'EXPORT_CHUNK_SIZE', 2000)
+    for section in sections:
+        while True:
+            chunk = list(section.queryset.filter(id__gt=last_id).order_by('id')[:chunk_size])
+            for obj in chunk:
+                yield section.record(obj)
+            if len(chunk) < chunk_size:
+                break
+            last_id = chunk[-1].id
+        last_id = 0
+
+
+class _Echo:
+    """File-like object whose write() hands back the line, for streaming csv.writer output"""
+
+    def write(self, value):
+        return value
+
+
+def _batched(lines, size=500):
+    """Join lines into one chunk per ``size`` so the response is not written line by line"""
+    batch = []
+    for line in lines:
+        batch.append(line)
+        if len(batch) >= size:
+            yield ''.join(batch)
+            batch = []
+    if batch:
+        yield ''.join(batch)
+
+
+def _gzipped(chunks):
+    compressor = zlib.compressobj(wbits=16 + zlib.MAX_WBITS)  # gzip container
+    for chunk in chunks:
+        data = compressor.compress(chunk.encode('utf-8'))
+        if data:
+            yield data
+    yield compressor.flush()
+
+
+def _streaming_export(chunks, filename, content_type, compress):
+    if compress:
+        response = StreamingHttpResponse(_gzipped(chunks), content_type='application/gzip')
+        filename += '.gz'
+    else:
+        response = StreamingHttpResponse(chunks, content_type=content_type)
+    response['Content-Disposition'] = f'attachment; filename="{filename}"'
     return response
 
 
-def export_json(data_type, date_from=None, date_to=None):
-    """Export data as JSON"""
-    data = []
+def export_csv(data_type, date_from=None, date_to=None, after=None, compress=False):
+    """Export data as CSV"""
+    columns = EXPORT_TYPES[data_type]
+    records = export_records(data_type, date_from, date_to, after)
+    writer = csv.writer(_Echo())
     
-    if data_type == 'users':
-        users = CustomUser.objects.all()
-        if date_from:
-            users = users.filter(date_joined__gte=date_from)
-        if date_to:
-            users = users.filter(date_joined__lte=date_to)
-        
-        for user in users:
-            data.append({
-                'email': user.email,
-                'first_name': user.first_name,
-                'last_name': user.last_name,
-                'date_joined': user.date_joined.isoformat(),
-                'is_active': user.is_active,
-                'is_staff': user.is_staff
-            })
+    def lines():
+        yield writer.writerow([header for header, _ in columns])
+        for record in records:
+            yield writer.writerow([record[key] for _, key in columns])
     
-    elif data_type == 'bookings':
-        # PayPal bookings
-        paypal_bookings = PaypalBooking.objects.select_related('user', 'service')
-        if date_from:
-            paypal_bookings = paypal_bookings.filter(created__gte=date_from)
-        if date_to:
-            paypal_bookings = paypal_bookings.filter(created__lte=date_to)
-        
-        for booking in paypal_bookings:
-            data.append({
-                'id': f'PP-{booking.id}',
-                'user': booking.user.email,
-                'service': booking.service.name,
-                'date': booking.date.isoformat(),
-                'status': 'Verified' if booking.is_verified else 'Pending',
-                'payment_status': 'Paid' if booking.is_paid else 'Unpaid',
-                'type': 'PayPal'
-            })
-        
-        # DVLA bookings
-        dvla_bookings = DVLABooking.objects.select_related('user', 'service')
-        if date_from:
-            dvla_bookings = dvla_bookings.filter(created_at__gte=date_from)
-        if date_to:
-            dvla_bookings = dvla_bookings.filter(created_at__lte=date_to)
-        
-        for booking in dvla_bookings:
-            data.append({
-                'id': f'DV-{booking.id}',
-                'user': booking.user.email,
-                'service': booking.service.name,
-                'date': booking.scheduled_for.isoformat() if booking.scheduled_for else None,
-                'status': booking.status,
-                'payment_status': 'Paid' if booking.payment_completed else 'Unpaid',
-                'type': 'DVLA'
-            })
+    return _streaming_export(_batched(lines()), f'{data_type}_export.csv', 'text/csv', compress)
+
+
+def export_json(data_type, date_from=None, date_to=None, after=None, compress=False, ndjson=False):
+    """Export data as a JSON array, or as NDJSON (one object per line)"""
+    records = export_records(data_type, date_from, date_to, after)
+    
+    if ndjson:
+        lines = (json.dumps(record) + '\n' for record in records)
+        return _streaming_export(_batched(lines), f'{data_type}_export.ndjson', 'application/x-ndjson', compress)
+    
+    def lines():
+        yield '['
+        for index, record in enumerate(records):
+            yield (',\n  ' if index else '\n  ') + json.dumps(record)
+        yield '\n]\n'
     
-    response = HttpResponse(
-        json.dumps(data, indent=2),
-        content_type='application/json'
-    )
-    response['Content-Disposition'] = f'attachment; filename="{data_type}_export.json"'
-    return response
\ No newline at end of file
+    return _streaming_export(_batched(lines()), f'{data_type}_export.json', 'application/json', compress)
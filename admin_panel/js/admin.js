@@ -54,8 +54,9 @@ class AdminPanel {
             this.filterTable('usersTable', e.target.value);
         });
 
-        document.getElementById('bookingSearch')?.addEventListener('input', (e) => {
-            this.filterTable('bookingsTable', e.target.value);
+        document.getElementById('bookingSearch')?.addEventListener('input', () => {
+            clearTimeout(this.bookingSearchTimer);
+            this.bookingSearchTimer = setTimeout(() => this.loadBookingsData(), 300);
         });
 
         // Filter functionality
@@ -197,30 +198,48 @@ class AdminPanel {
         }
     }
 
-    loadDashboardData() {
-        this.loadDashboardStats();
-        this.loadRecentBookings();
-        this.loadRecentUsers();
-        this.loadChartData();
-        this.updateSidebarBadges();
+    async fetchSummary() {
+        // One request for every dashboard figure; a 304 means the last summary is still current
+        const headers = { 'Content-Type': 'application/json' };
+        if (this.summaryEtag && this.summary) headers['If-None-Match'] = this.summaryEtag;
+
+        const response = await fetch(`${this.apiBaseUrl}/summary/`, {
+            method: 'GET',
+            headers,
+        });
+
+        if (response.status === 304) return this.summary;
+        if (!response.ok) throw new Error('Failed to fetch dashboard summary');
+
+        this.summary = await response.json();
+        this.summaryEtag = response.headers.get('ETag');
+        return this.summary;
+    }
+
+    async loadDashboardData() {
+        let summary;
+        try {
+            summary = await this.fetchSummary();
+        } catch (error) {
+            console.error('Error loading dashboard summary:', error);
+        }
+
+        this.loadDashboardStats(summary);
+        this.loadRecentBookings(summary?.recent_bookings);
+        this.loadRecentUsers(summary?.recent_users);
+        if (summary) {
+            this.updateBookingChart(summary.trends);
+            this.updateServiceChart(summary.service_distribution);
+        }
+        this.updateSidebarBadges(summary);
     }
 
-    async loadRecentBookings() {
+    loadRecentBookings(bookings) {
         const container = document.getElementById('recentBookings');
         if (!container) return;
 
         try {
-            const response = await fetch(`${this.apiBaseUrl}/bookings/`, {
-                method: 'GET',
-                headers: {
-                    'Content-Type': 'application/json',
-                },
-            });
-            
-            if (!response.ok) throw new Error('Failed to fetch bookings');
-            
-            const data = await response.json();
-            const bookings = (data.results || data).slice(0, 5); // Get first 5 bookings
+            if (!bookings) throw new Error('Failed to fetch bookings');
 
             container.innerHTML = bookings.map(booking => `
                 <div class="list-group-item d-flex justify-content-between align-items-center">
@@ -243,22 +262,12 @@ class AdminPanel {
         }
     }
 
-    async loadRecentUsers() {
+    loadRecentUsers(users) {
         const container = document.getElementById('recentUsers');
         if (!container) return;
 
         try {
-            const response = await fetch(`${this.apiBaseUrl}/users/`, {
-                method: 'GET',
-                headers: {
-                    'Content-Type': 'application/json',
-                },
-            });
-            
-            if (!response.ok) throw new Error('Failed to fetch users');
-            
-            const data = await response.json();
-            const users = (data.results || data).slice(0, 5); // Get first 5 users
+            if (!users) throw new Error('Failed to fetch users');
 
             container.innerHTML = users.map(user => `
                 <div class="list-group-item">
@@ -285,12 +294,15 @@ class AdminPanel {
         }
     }
 
-    async loadUsersData() {
+    async loadUsersData(append = false) {
         const tbody = document.getElementById('usersTableBody');
         if (!tbody) return;
 
         try {
-            const response = await fetch(`${this.apiBaseUrl}/users/`, {
+            const params = new URLSearchParams({ limit: 50 });
+            if (append && this.usersCursor) params.set('cursor', this.usersCursor);
+
+            const response = await fetch(`${this.apiBaseUrl}/users/?${params}`, {
                 method: 'GET',
                 headers: {
                     'Content-Type': 'application/json',
@@ -301,8 +313,9 @@ class AdminPanel {
             
             const data = await response.json();
             const users = data.results || data;
+            this.usersCursor = data.next_cursor || null;
 
-            tbody.innerHTML = users.map(user => {
+            const rows = users.map(user => {
                 const fullName = `${user.first_name || 'Unknown'} ${user.last_name || 'User'}`;
                 const initials = `${user.first_name?.[0] || 'U'}${user.last_name?.[0] || ''}`;
                 const userType = user.is_staff ? 'staff' : 'customer';
@@ -337,6 +350,18 @@ class AdminPanel {
                     </tr>
                 `;
             }).join('');
+
+            document.getElementById('usersLoadMore')?.remove();
+            tbody.innerHTML = append ? tbody.innerHTML + rows : rows;
+            if (this.usersCursor) {
+                tbody.insertAdjacentHTML('beforeend', `
+                    <tr id="usersLoadMore">
+                        <td colspan="8" class="text-center">
+                            <button class="btn btn-sm btn-outline-secondary" onclick="window.adminPanel.loadUsersData(true)">Load more</button>
+                        </td>
+                    </tr>
+                `);
+            }
         } catch (error) {
             console.error('Error loading users:', error);
             tbody.innerHTML = `
@@ -350,12 +375,18 @@ class AdminPanel {
         }
     }
 
-    async loadBookingsData() {
+    async loadBookingsData(append = false) {
         const tbody = document.getElementById('bookingsTableBody');
         if (!tbody) return;
 
         try {
-            const response = await fetch(`${this.apiBaseUrl}/bookings/`, {
+            // One keyset page at a time; the search box filters server-side
+            const params = new URLSearchParams({ limit: 50 });
+            const search = document.getElementById('bookingSearch')?.value.trim();
+            if (search) params.set('search', search);
+            if (append && this.bookingsCursor) params.set('cursor', this.bookingsCursor);
+
+            const response = await fetch(`${this.apiBaseUrl}/bookings/?${params}`, {
                 method: 'GET',
                 headers: {
                     'Content-Type': 'application/json',
@@ -366,8 +397,9 @@ class AdminPanel {
             
             const data = await response.json();
             const bookings = data.results || data;
+            this.bookingsCursor = data.next_cursor || null;
 
-            tbody.innerHTML = bookings.map(booking => {
+            const rows = bookings.map(booking => {
                 const customerName = booking.user ? 
                     `${booking.user.first_name || 'Unknown'} ${booking.user.last_name || 'User'}` : 
                     'Unknown Customer';
@@ -401,6 +433,18 @@ class AdminPanel {
                     </tr>
                 `;
             }).join('');
+
+            document.getElementById('bookingsLoadMore')?.remove();
+            tbody.innerHTML = append ? tbody.innerHTML + rows : rows;
+            if (this.bookingsCursor) {
+                tbody.insertAdjacentHTML('beforeend', `
+                    <tr id="bookingsLoadMore">
+                        <td colspan="9" class="text-center">
+                            <button class="btn btn-sm btn-outline-secondary" onclick="window.adminPanel.loadBookingsData(true)">Load more</button>
+                        </td>
+                    </tr>
+                `);
+            }
         } catch (error) {
             console.error('Error loading bookings:', error);
             tbody.innerHTML = `
@@ -474,97 +518,39 @@ class AdminPanel {
         });
     }
 
-    async loadDashboardStats() {
-        try {
-            // Load users count
-            const usersResponse = await fetch(`${this.apiBaseUrl}/users/count/`, {
-                method: 'GET',
-                headers: { 'Content-Type': 'application/json' }
-            });
-            
-            if (usersResponse.ok) {
-                const usersData = await usersResponse.json();
-                document.getElementById('totalUsers').textContent = usersData.total || 0;
-                document.getElementById('newUsers').textContent = `+${usersData.new_this_week || 0} this week`;
-            }
-
-            // Load bookings count
-            const bookingsResponse = await fetch(`${this.apiBaseUrl}/bookings/count/`, {
-                method: 'GET',
-                headers: { 'Content-Type': 'application/json' }
-            });
-            
-            if (bookingsResponse.ok) {
-                const bookingsData = await bookingsResponse.json();
-                document.getElementById('totalBookings').textContent = bookingsData.total || 0;
-                document.getElementById('todayBookings').textContent = `+${bookingsData.today || 0} today`;
-            }
-
-            // Load payments total
-            const paymentsResponse = await fetch(`${this.apiBaseUrl}/payments/total/`, {
-                method: 'GET',
-                headers: { 'Content-Type': 'application/json' }
-            });
-            
-            if (paymentsResponse.ok) {
-                const paymentsData = await paymentsResponse.json();
-                document.getElementById('totalRevenue').textContent = `£${(paymentsData.total || 0).toFixed(2)}`;
-                document.getElementById('todayRevenue').textContent = `+£${(paymentsData.today || 0).toFixed(2)} today`;
-            }
-
-            // Load services count
-            const servicesResponse = await fetch(`${this.apiBaseUrl}/services/`, {
-                method: 'GET',
-                headers: { 'Content-Type': 'application/json' }
-            });
-            
-            if (servicesResponse.ok) {
-                const servicesData = await servicesResponse.json();
-                const activeServices = (servicesData.results || []).filter(s => s.active).length;
-                document.getElementById('totalServices').textContent = activeServices;
-                document.getElementById('servicesChange').textContent = 'PayPal & DVLA';
-            }
-
-        } catch (error) {
-            console.error('Error loading dashboard stats:', error);
+    loadDashboardStats(summary) {
+        if (!summary) {
             // Set error state
             document.getElementById('totalUsers').textContent = 'Error';
             document.getElementById('totalBookings').textContent = 'Error';
             document.getElementById('totalRevenue').textContent = 'Error';
             document.getElementById('totalServices').textContent = 'Error';
+            return;
         }
+
+        const { users, bookings, payments, services } = summary;
+        document.getElementById('totalUsers').textContent = users.total || 0;
+        document.getElementById('newUsers').textContent = `+${users.new_this_week || 0} this week`;
+        document.getElementById('totalBookings').textContent = bookings.total || 0;
+        document.getElementById('todayBookings').textContent = `+${bookings.today || 0} today`;
+        document.getElementById('totalRevenue').textContent = `£${(payments.total || 0).toFixed(2)}`;
+        document.getElementById('todayRevenue').textContent = `+£${(payments.today || 0).toFixed(2)} today`;
+        document.getElementById('totalServices').textContent = services.active || 0;
+        document.getElementById('servicesChange').textContent = 'PayPal & DVLA';
     }
 
-    async updateSidebarBadges() {
-        try {
-            // Update sidebar badges with real counts
-            const [usersResponse, bookingsResponse, servicesResponse] = await Promise.all([
-                fetch(`${this.apiBaseUrl}/users/count/`),
-                fetch(`${this.apiBaseUrl}/bookings/count/`),
-                fetch(`${this.apiBaseUrl}/services/`)
-            ]);
-
-            if (usersResponse.ok) {
-                const usersData = await usersResponse.json();
-                const usersBadge = document.querySelector('a[data-page="users"] .badge');
-                if (usersBadge) usersBadge.textContent = usersData.total || 0;
-            }
+    updateSidebarBadges(summary) {
+        if (!summary) return;
 
-            if (bookingsResponse.ok) {
-                const bookingsData = await bookingsResponse.json();
-                const bookingsBadge = document.querySelector('a[data-page="bookings"] .badge');
-                if (bookingsBadge) bookingsBadge.textContent = bookingsData.total || 0;
-            }
+        // Update sidebar badges with real counts
+        const usersBadge = document.querySelector('a[data-page="users"] .badge');
+        if (usersBadge) usersBadge.textContent = summary.users.total || 0;
 
-            if (servicesResponse.ok) {
-                const servicesData = await servicesResponse.json();
-                const vehiclesBadge = document.querySelector('a[data-page="vehicles"] .badge');
-                if (vehiclesBadge) vehiclesBadge.textContent = (servicesData.results || []).length;
-            }
+        const bookingsBadge = document.querySelector('a[data-page="bookings"] .badge');
+        if (bookingsBadge) bookingsBadge.textContent = summary.bookings.total || 0;
 
-        } catch (error) {
-            console.error('Error updating sidebar badges:', error);
-        }
+        const vehiclesBadge = document.querySelector('a[data-page="vehicles"] .badge');
+        if (vehiclesBadge) vehiclesBadge.textContent = summary.services.total || 0;
     }
 
     getRelativeTime(dateString) {
@@ -579,39 +565,11 @@ class AdminPanel {
         return date.toLocaleDateString();
     }
 
-    async loadChartData() {
-        try {
-            // Load booking trends data
-            const trendsResponse = await fetch(`${this.apiBaseUrl}/bookings/trends/`, {
-                method: 'GET',
-                headers: { 'Content-Type': 'application/json' }
-            });
-            
-            if (trendsResponse.ok) {
-                const trendsData = await trendsResponse.json();
-                this.updateBookingChart(trendsData);
-            }
-
-            // Load service distribution data
-            const servicesResponse = await fetch(`${this.apiBaseUrl}/bookings/service-distribution/`, {
-                method: 'GET',
-                headers: { 'Content-Type': 'application/json' }
-            });
-            
-            if (servicesResponse.ok) {
-                const servicesData = await servicesResponse.json();
-                this.updateServiceChart(servicesData);
-            }
-        } catch (error) {
-            console.error('Error loading chart data:', error);
-        }
-    }
-
     updateBookingChart(data) {
-        if (this.charts.booking && data.labels && data.paypal_data && data.dvla_data) {
+        if (this.charts.booking && data.labels && data.paypal_data) {
             this.charts.booking.data.labels = data.labels;
             this.charts.booking.data.datasets[0].data = data.paypal_data;
-            this.charts.booking.data.datasets[1].data = data.dvla_data;
+            this.charts.booking.data.datasets[1].data = data.dvla_data || [];
             this.charts.booking.update();
         }
     }
@@ -626,14 +584,11 @@ class AdminPanel {
 
     async loadPaymentsData() {
         try {
-            // Load payment statistics
-            const paymentsResponse = await fetch(`${this.apiBaseUrl}/payments/total/`, {
-                method: 'GET',
-                headers: { 'Content-Type': 'application/json' }
-            });
+            // Payment statistics come with the dashboard summary
+            const summary = await this.fetchSummary().catch(() => null);
             
-            if (paymentsResponse.ok) {
-                const paymentsData = await paymentsResponse.json();
+            if (summary) {
+                const paymentsData = summary.payments;
                 document.getElementById('paypalRevenue').textContent = `£${(paymentsData.paypal || 0).toFixed(2)}`;
                 document.getElementById('dvlaRevenue').textContent = `£${(paymentsData.dvla || 0).toFixed(2)}`;
                 document.getElementById('totalPaymentRevenue').textContent = `£${(paymentsData.total || 0).toFixed(2)}`;
@@ -641,14 +596,14 @@ class AdminPanel {
             }
 
             // Load recent payments (using bookings data as proxy)
-            const bookingsResponse = await fetch(`${this.apiBaseUrl}/bookings/`, {
+            const bookingsResponse = await fetch(`${this.apiBaseUrl}/bookings/?payment_status=completed&limit=10`, {
                 method: 'GET',
                 headers: { 'Content-Type': 'application/json' }
             });
             
             if (bookingsResponse.ok) {
                 const data = await bookingsResponse.json();
-                const bookings = (data.results || data).filter(b => b.payment_status === 'completed').slice(0, 10);
+                const bookings = data.results || data;
                 
                 const tbody = document.getElementById('paymentsTableBody');
                 if (tbody) {
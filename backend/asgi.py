@@ -12,5 +12,7 @@ import os
 from django.core.asgi import get_asgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'backend.settings')
+# Serve PayPal checkout through the async views and client under ASGI
+os.environ.setdefault('PAYPAL_ASYNC_VIEWS', 'True')
 
 application = get_asgi_application()
@@ -141,6 +141,10 @@ REST_FRAMEWORK = {
     'DEFAULT_PERMISSION_CLASSES': [
         'rest_framework.permissions.AllowAny',
     ],
+    'DEFAULT_THROTTLE_RATES': {
+        # Batch vehicle lookups per user (DVLAA.views.VehicleInfoBatchAPIView)
+        'dvla_batch': os.getenv('DVLA_BATCH_THROTTLE_RATE', '30/hour'),
+    },
 }
 
 # JWT Configuration
@@ -188,7 +192,9 @@ CORS_ALLOWED_HEADERS = [
     'user-agent',
     'x-csrftoken',
     'x-requested-with',
+    'if-none-match',  # admin summary revalidation
 ]
+CORS_ALLOW_HEADERS = CORS_ALLOWED_HEADERS  # the name django-cors-headers reads
 
 # Allow specific methods
 CORS_ALLOWED_METHODS = [
@@ -205,6 +211,7 @@ CORS_PREFLIGHT_MAX_AGE = 86400  # 24 hours
 CORS_EXPOSE_HEADERS = [
     'Content-Type',
     'X-CSRFToken',
+    'ETag',
 ]
 
 # PayPal Configuration - Only 3 credentials needed from .env file
@@ -212,6 +219,43 @@ PAYPAL_CLIENT_ID = os.getenv('PAYPAL_CLIENT_ID', '').strip()
 PAYPAL_SECRET = os.getenv('PAYPAL_SECRET', '').strip()
 PAYPAL_API_BASE = os.getenv('PAYPAL_API_BASE', 'https://api-m.paypal.com').strip()
 
+# PayPal OAuth token caching - the token is shared between worker processes
+# through the default cache and refreshed this many seconds before it expires
+PAYPAL_TOKEN_CACHE_KEY = 'paypal:access_token'
+PAYPAL_TOKEN_REFRESH_MARGIN = int(os.getenv('PAYPAL_TOKEN_REFRESH_MARGIN', 300))
+
+# PayPal HTTP connection pool and timeouts (seconds)
+PAYPAL_HTTP_POOL_CONNECTIONS = int(os.getenv('PAYPAL_HTTP_POOL_CONNECTIONS', 4))
+PAYPAL_HTTP_POOL_MAXSIZE = int(os.getenv('PAYPAL_HTTP_POOL_MAXSIZE', 10))
+PAYPAL_HTTP_CONNECT_TIMEOUT = float(os.getenv('PAYPAL_HTTP_CONNECT_TIMEOUT', 5))
+PAYPAL_HTTP_READ_TIMEOUT = float(os.getenv('PAYPAL_HTTP_READ_TIMEOUT', 30))
+
+# PayPal retries (idempotent calls only) and circuit breaker
+PAYPAL_RETRY_MAX_ATTEMPTS = int(os.getenv('PAYPAL_RETRY_MAX_ATTEMPTS', 3))
+PAYPAL_RETRY_BACKOFF_BASE = float(os.getenv('PAYPAL_RETRY_BACKOFF_BASE', 0.5))
+PAYPAL_RETRY_BACKOFF_MAX = float(os.getenv('PAYPAL_RETRY_BACKOFF_MAX', 8))
+PAYPAL_CIRCUIT_FAILURE_THRESHOLD = int(os.getenv('PAYPAL_CIRCUIT_FAILURE_THRESHOLD', 5))
+PAYPAL_CIRCUIT_RECOVERY_TIMEOUT = int(os.getenv('PAYPAL_CIRCUIT_RECOVERY_TIMEOUT', 30))
+
+# PayPal idempotency ledger - a created order is handed out again on retry
+# for this long; a pending operation older than the timeout may be retried
+PAYPAL_ORDER_REPLAY_WINDOW = int(os.getenv('PAYPAL_ORDER_REPLAY_WINDOW', 3 * 60 * 60))
+PAYPAL_IDEMPOTENCY_PENDING_TIMEOUT = int(os.getenv('PAYPAL_IDEMPOTENCY_PENDING_TIMEOUT', 60))
+
+# PayPal payouts - items per batch (PayPal allows at most 15000)
+PAYPAL_PAYOUT_BATCH_SIZE = int(os.getenv('PAYPAL_PAYOUT_BATCH_SIZE', 15000))
+
+# Async PayPal checkout views - enabled automatically by backend/asgi.py
+PAYPAL_ASYNC_VIEWS = os.getenv('PAYPAL_ASYNC_VIEWS', 'False').lower() == 'true'
+PAYPAL_ASYNC_MAX_CONNECTIONS = int(os.getenv('PAYPAL_ASYNC_MAX_CONNECTIONS', 100))
+
+# PayPal webhooks - id of the webhook registered in the PayPal dashboard
+PAYPAL_WEBHOOK_ID = os.getenv('PAYPAL_WEBHOOK_ID', '').strip()
+
+# PayPal reconciliation - parallel order lookups and max lookups per second
+PAYPAL_RECONCILE_CONCURRENCY = int(os.getenv('PAYPAL_RECONCILE_CONCURRENCY', 4))
+PAYPAL_RECONCILE_MAX_RATE = float(os.getenv('PAYPAL_RECONCILE_MAX_RATE', 5))
+
 # Validate PayPal credentials are loaded
 if not PAYPAL_CLIENT_ID or not PAYPAL_SECRET:
     print("⚠️  WARNING: PayPal credentials not found in .env file")
@@ -225,6 +269,19 @@ else:
 # DVLA API Configuration
 DVLA_API_KEY = os.getenv('DVLA_API_KEY')
 DVLA_LOOKUP_URL = os.getenv('DVLA_LOOKUP_URL')
+DVLA_TIMEOUT = int(os.getenv('DVLA_TIMEOUT', 10))
+
+# DVLA lookup cache (DVLAA.dvla) - found vehicles, unknown registrations, entries per process
+DVLA_CACHE_TTL = int(os.getenv('DVLA_CACHE_TTL', 21600))
+DVLA_NOT_FOUND_TTL = int(os.getenv('DVLA_NOT_FOUND_TTL', 900))
+DVLA_CACHE_MAX_ENTRIES = int(os.getenv('DVLA_CACHE_MAX_ENTRIES', 10000))
+# Vehicle registry rows older than this (seconds) are refreshed from DVLA in the background
+DVLA_REGISTRY_MAX_AGE = int(os.getenv('DVLA_REGISTRY_MAX_AGE', 86400))
+
+# DVLA request limits per process - keep DVLA_MAX_RATE (requests/second) under the API quota
+DVLA_MAX_RATE = float(os.getenv('DVLA_MAX_RATE', 10))
+DVLA_BATCH_CONCURRENCY = int(os.getenv('DVLA_BATCH_CONCURRENCY', 4))
+DVLA_BATCH_MAX_SIZE = int(os.getenv('DVLA_BATCH_MAX_SIZE', 50))
 
 # Email Configuration
 EMAIL_BACKEND = os.getenv('EMAIL_BACKEND', 'django.core.mail.backends.smtp.EmailBackend')
@@ -246,16 +303,58 @@ OWNER_EMAIL = os.getenv('OWNER_EMAIL', 'info.accessautoservices@gmail.com')
 # Email timeout settings to prevent hanging
 EMAIL_TIMEOUT = 30  # 30 seconds timeout
 
+# Pooled SMTP sessions (email_service.mailer) - recycle after this many messages or idle seconds
+EMAIL_POOL_MAX_MESSAGES = int(os.getenv('EMAIL_POOL_MAX_MESSAGES', 100))
+EMAIL_POOL_MAX_IDLE = int(os.getenv('EMAIL_POOL_MAX_IDLE', 60))
+
+# Send rate limit shared by all processes through the default cache, set to the
+# relay's quota (0 disables). Bulk mail leaves EMAIL_RATE_BULK_RESERVE of the
+# burst free for transactional emails; the outbox dispatcher waits up to
+# EMAIL_RATE_MAX_WAIT seconds for allowance.
+EMAIL_RATE_PER_MINUTE = int(os.getenv('EMAIL_RATE_PER_MINUTE', 60))
+EMAIL_RATE_BURST = int(os.getenv('EMAIL_RATE_BURST', 20))
+EMAIL_RATE_BULK_RESERVE = int(os.getenv('EMAIL_RATE_BULK_RESERVE', 5))
+EMAIL_RATE_MAX_WAIT = int(os.getenv('EMAIL_RATE_MAX_WAIT', 30))
+
+# Booking reminders - sent by a periodic sweep, this many per claimed batch;
+# a claim not marked sent within REMINDER_CLAIM_TIMEOUT seconds is retried
+REMINDER_BATCH_SIZE = int(os.getenv('REMINDER_BATCH_SIZE', 200))
+REMINDER_CLAIM_TIMEOUT = int(os.getenv('REMINDER_CLAIM_TIMEOUT', 300))
+
+# Email outbox - emails are queued in the database and sent by a dispatcher
+EMAIL_OUTBOX_BATCH_SIZE = int(os.getenv('EMAIL_OUTBOX_BATCH_SIZE', 100))
+EMAIL_OUTBOX_MAX_ATTEMPTS = int(os.getenv('EMAIL_OUTBOX_MAX_ATTEMPTS', 5))
+EMAIL_OUTBOX_SENDING_TIMEOUT = int(os.getenv('EMAIL_OUTBOX_SENDING_TIMEOUT', 300))
+EMAIL_OUTBOX_MAX_BULK_BACKLOG = int(os.getenv('EMAIL_OUTBOX_MAX_BULK_BACKLOG', 2000))  # Bulk sends are refused above this
+
 # Redis Configuration (for Celery/Cache) - Optional
 REDIS_URL = os.getenv('REDIS_URL', 'redis://localhost:6379/0')
 
 # Cache Configuration with fallback
-# Use dummy cache by default (no Redis dependency)
-CACHES = {
-    'default': {
-        'BACKEND': 'django.core.cache.backends.dummy.DummyCache',
+# Shared between workers through Redis when REDIS_URL (or CACHE_URL) is set, so
+# the PayPal OAuth token and DVLA lookups are fetched once for all processes.
+# Without it (development) each process gets its own in-memory cache.
+CACHE_URL = os.getenv('CACHE_URL') or os.getenv('REDIS_URL')
+try:
+    import redis  # noqa: F401 - required by Django's Redis cache backend
+except ImportError:
+    CACHE_URL = None
+
+if CACHE_URL:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': CACHE_URL,
+            'KEY_PREFIX': os.getenv('CACHE_KEY_PREFIX', 'backend'),
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+            'LOCATION': 'backend-default',
+        }
     }
-}
 
 # Celery Configuration - Optional (only if Celery is installed)
 try:
@@ -271,12 +370,42 @@ try:
     CELERY_BROKER_CONNECTION_RETRY_ON_STARTUP = True
     CELERY_BROKER_CONNECTION_RETRY = True
     CELERY_BROKER_CONNECTION_MAX_RETRIES = 3
+
+    # Periodic tasks (run with `celery beat`)
+    CELERY_BEAT_SCHEDULE = {
+        'dispatch-paypal-payouts': {
+            'task': 'PAYPAL.tasks.dispatch_payouts_task',
+            'schedule': 300.0,
+        },
+        'poll-paypal-payout-batches': {
+            'task': 'PAYPAL.tasks.poll_payout_batches_task',
+            'schedule': 120.0,
+        },
+        'process-paypal-webhooks': {
+            'task': 'PAYPAL.tasks.process_webhook_events_task',
+            'schedule': 15.0,
+        },
+        'reconcile-paypal-payments': {
+            'task': 'PAYPAL.tasks.reconcile_payments_task',
+            'schedule': 3600.0,
+        },
+        'dispatch-email-outbox': {
+            'task': 'email_service.tasks.dispatch_outbox_task',
+            'schedule': 10.0,
+        },
+        'dispatch-booking-reminders': {
+            'task': 'email_service.tasks.dispatch_reminders_task',
+            'schedule': 60.0,
+        },
+    }
 except ImportError:
     # Celery not available, skip configuration
     pass
 
 # Admin Site Configuration
 SITE_NAME = 'Access Auto Services'
+# Rows read per query by the streaming admin exports
+EXPORT_CHUNK_SIZE = int(os.getenv('EXPORT_CHUNK_SIZE', 2000))
 
 # Logging Configuration
 LOGGING = {
@@ -0,0 +1,7 @@
+from django.dispatch import Signal
+
+# Sent by the bookings' model class (PAYPAL or DVLAA Booking) with
+# ``bookings`` (an iterable of its instances) after their payment fields
+# were changed without Booking.save(), e.g. by bulk_update() or
+# QuerySet.update(), so listeners that rely on post_save still hear of it.
+bookings_updated = Signal()
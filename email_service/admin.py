@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import EmailVerification, BookingReminder
+from .models import EmailVerification, BookingReminder, OutboxEmail
 
 @admin.register(EmailVerification)
 class EmailVerificationAdmin(admin.ModelAdmin):
@@ -14,3 +14,10 @@ class BookingReminderAdmin(admin.ModelAdmin):
     list_filter = ['reminder_sent', 'created_at', 'appointment_datetime']
     search_fields = ['email']
     readonly_fields = ['created_at', 'sent_at']
+
+@admin.register(OutboxEmail)
+class OutboxEmailAdmin(admin.ModelAdmin):
+    list_display = ['subject', 'category', 'priority', 'reference', 'status', 'attempts', 'created_at', 'sent_at']
+    list_filter = ['status', 'priority', 'category', 'created_at']
+    search_fields = ['subject', 'reference']
+    readonly_fields = ['attempts', 'last_error', 'created_at', 'sent_at']
@@ -0,0 +1,381 @@
+"""
+Email templates for booking, payment and reminder messages.
+
+Every template is compiled once, when this module is imported, and renders
+from a plain dict, so messages can be rendered in bulk by the dispatchers
+without touching the ORM. Each template has a plain text and an HTML body.
+
+    subject, text, html = render('reminder', {'bookings': [...]})
+"""
+from django.conf import settings
+from django.template import Context, Engine
+
+SITE_NAME = 'Access Auto Services'
+SITE_URL = 'https://www.access-auto-services.co.uk'
+RULE = '=' * 50
+
+# Text bodies must not be HTML-escaped; HTML bodies must be
+_text_engine = Engine(autoescape=False)
+_html_engine = Engine(autoescape=True)
+
+
+class EmailTemplate:
+    """Subject, text and HTML templates compiled together"""
+
+    def __init__(self, subject, text, html):
+        self.subject = _text_engine.from_string(subject)
+        self.text = _text_engine.from_string(text)
+        self.html = _html_engine.from_string(html)
+
+    def render(self, context):
+        context = {
+            'site_name': SITE_NAME,
+            'site_url': SITE_URL,
+            'contact_email': settings.DEFAULT_FROM_EMAIL,
+            **context,
+        }
+        return (
+            self.subject.render(Context(context, autoescape=False)).strip(),
+            self.text.render(Context(context, autoescape=False)),
+            self.html.render(Context(context)),
+        )
+
+
+def _html_page(heading, body):
+    return (
+        '<!DOCTYPE html><html><body style="font-family: Arial, sans-serif; color: #222; line-height: 1.5;">'
+        '<div style="max-width: 600px; margin: 0 auto;">'
+        f'<h2 style="color: #1a4d8f;">{heading}</h2>'
+        f'{body}'
+        '<p style="margin-top: 24px; font-size: 13px; color: #666;">'
+        '{{ site_name }}<br>Email: {{ contact_email }}<br>'
+        'Website: <a href="{{ site_url }}">{{ site_url }}</a></p>'
+        '</div></body></html>'
+    )
+
+
+CONTACT_TEXT = (
+    "CONTACT INFORMATION:\n"
+    f"{RULE}\n"
+    "{{ site_name }}\n"
+    "Email: {{ contact_email }}\n"
+    "Website: {{ site_url }}\n\n"
+)
+
+BOOKING_CREATED = EmailTemplate(
+    subject="Booking Confirmation - {{ site_name }}",
+    text=(
+        "Dear {{ customer_name }},\n\n"
+        "Your booking has been successfully created!\n\n"
+        "BOOKING DETAILS:\n"
+        f"{RULE}\n"
+        "Service: {{ service_name }}\n"
+        "{% if mot_class %}MOT Class: {{ mot_class }}\n{% endif %}"
+        "Date: {{ date_display }}\n"
+        "Time: {{ time }}\n"
+        "Vehicle: {{ vehicle_info }}\n"
+        "{% if currency == 'GBP' %}Amount: £{{ amount }}{% else %}Amount: {{ amount }} {{ currency }}{% endif %}\n\n"
+        "CUSTOMER INFORMATION:\n"
+        f"{RULE}\n"
+        "{% if customer_full_name %}Customer: {{ customer_full_name }}\n{% endif %}"
+        "{% if customer_phone %}Phone: {{ customer_phone }}\n{% endif %}"
+        "{% if customer_address %}Address: {{ customer_address }}\n{% endif %}"
+        "Email: {{ customer_email }}\n\n"
+        "NEXT STEPS:\n"
+        f"{RULE}\n"
+        "• You will receive a reminder email 24 hours before your appointment\n"
+        "• If you need to reschedule or cancel, please contact us as soon as possible\n\n"
+        + CONTACT_TEXT +
+        "Thank you for choosing {{ site_name }}!\n\n"
+        "Best regards,\n"
+        "The {{ site_name }} Team"
+    ),
+    html=_html_page(
+        'Your booking has been created',
+        '<p>Dear {{ customer_name }},</p>'
+        '<p>Your booking has been successfully created!</p>'
+        '<table cellpadding="4">'
+        '<tr><td><strong>Service</strong></td><td>{{ service_name }}</td></tr>'
+        '{% if mot_class %}<tr><td><strong>MOT Class</strong></td><td>{{ mot_class }}</td></tr>{% endif %}'
+        '<tr><td><strong>Date</strong></td><td>{{ date_display }}</td></tr>'
+        '<tr><td><strong>Time</strong></td><td>{{ time }}</td></tr>'
+        '<tr><td><strong>Vehicle</strong></td><td>{{ vehicle_info }}</td></tr>'
+        '<tr><td><strong>Amount</strong></td><td>{% if currency == "GBP" %}£{{ amount }}{% else %}{{ amount }} {{ currency }}{% endif %}</td></tr>'
+        '{% if customer_full_name %}<tr><td><strong>Customer</strong></td><td>{{ customer_full_name }}</td></tr>{% endif %}'
+        '{% if customer_phone %}<tr><td><strong>Phone</strong></td><td>{{ customer_phone }}</td></tr>{% endif %}'
+        '{% if customer_address %}<tr><td><strong>Address</strong></td><td>{{ customer_address }}</td></tr>{% endif %}'
+        '<tr><td><strong>Email</strong></td><td>{{ customer_email }}</td></tr>'
+        '</table>'
+        '<ul><li>You will receive a reminder email 24 hours before your appointment</li>'
+        '<li>If you need to reschedule or cancel, please contact us as soon as possible</li></ul>'
+        '<p>Thank you for choosing {{ site_name }}!</p>'
+    ),
+)
+
+BOOKING_CONFIRMED = EmailTemplate(
+    subject=(
+        "{% if payment_type == 'paypal' %}Payment Confirmed - Booking Confirmed"
+        "{% elif payment_type == 'cash' %}Booking Confirmed - Cash Payment on Arrival"
+        "{% elif payment_type == 'card' %}Booking Confirmed - Card Payment Processing"
+        "{% else %}Booking Confirmed{% endif %}"
+    ),
+    text=(
+        "Dear {{ customer_name }},\n\n"
+        "Your booking has been confirmed!\n\n"
+        "BOOKING DETAILS:\n"
+        f"{RULE}\n"
+        "Service: {{ service_name }}\n"
+        "Date: {{ date_display }}\n"
+        "Time: {{ time }}\n"
+        "Vehicle: {{ vehicle_info }}\n\n"
+        "PAYMENT INFORMATION:\n"
+        f"{RULE}\n"
+        "Amount: £{{ amount }}\n"
+        "{% if payment_type == 'paypal' %}"
+        "Transaction ID: {{ transaction_id }}\n"
+        "Payment Method: PayPal\n"
+        "Payment Status: Completed\n\n"
+        "Your payment has been successfully processed through PayPal!\n"
+        "{% elif payment_type == 'cash' %}"
+        "Payment Method: Cash on Arrival\n"
+        "Payment Status: Pending\n\n"
+        "Please bring cash payment on the day of your appointment.\n"
+        "{% elif payment_type == 'card' %}"
+        "Payment Method: Credit/Debit Card\n"
+        "Payment Status: Processing\n\n"
+        "Your card payment is being processed and you'll receive confirmation shortly.\n"
+        "{% else %}\n{% endif %}"
+        "CUSTOMER INFORMATION:\n"
+        f"{RULE}\n"
+        "Name: {{ customer_first_name }} {{ customer_last_name }}\n"
+        "Email: {{ customer_email }}\n"
+        "Phone: {{ customer_phone }}\n\n"
+        "We look forward to seeing you!\n\n"
+        + CONTACT_TEXT +
+        "Thank you for choosing {{ site_name }}!\n\n"
+        "Best regards,\n{{ site_name }} Team"
+    ),
+    html=_html_page(
+        'Your booking is confirmed',
+        '<p>Dear {{ customer_name }},</p>'
+        '<p>Your booking has been confirmed!</p>'
+        '<table cellpadding="4">'
+        '<tr><td><strong>Service</strong></td><td>{{ service_name }}</td></tr>'
+        '<tr><td><strong>Date</strong></td><td>{{ date_display }}</td></tr>'
+        '<tr><td><strong>Time</strong></td><td>{{ time }}</td></tr>'
+        '<tr><td><strong>Vehicle</strong></td><td>{{ vehicle_info }}</td></tr>'
+        '<tr><td><strong>Amount</strong></td><td>£{{ amount }}</td></tr>'
+        '{% if payment_type == "paypal" %}'
+        '<tr><td><strong>Transaction ID</strong></td><td>{{ transaction_id }}</td></tr>'
+        '<tr><td><strong>Payment</strong></td><td>PayPal - Completed</td></tr>'
+        '{% elif payment_type == "cash" %}'
+        '<tr><td><strong>Payment</strong></td><td>Cash on Arrival - Pending</td></tr>'
+        '{% elif payment_type == "card" %}'
+        '<tr><td><strong>Payment</strong></td><td>Credit/Debit Card - Processing</td></tr>'
+        '{% endif %}'
+        '</table>'
+        '{% if payment_type == "paypal" %}<p>Your payment has been successfully processed through PayPal!</p>'
+        '{% elif payment_type == "cash" %}<p>Please bring cash payment on the day of your appointment.</p>'
+        '{% elif payment_type == "card" %}<p>Your card payment is being processed and you\'ll receive confirmation shortly.</p>'
+        '{% endif %}'
+        '<p>We look forward to seeing you!</p>'
+    ),
+)
+
+# Booking summaries in reminders: numbered services, or one framed booking
+REMINDER_SUMMARY_TEXT = (
+    "{% if is_list %}{% for booking in bookings %}"
+    "\nService {{ forloop.counter }}:\n"
+    "==============================\n"
+    "Service: {{ booking.service_name|default:'N/A' }}\n"
+    "{% if booking.mot_class %}MOT Class: {{ booking.mot_class }}\n{% endif %}"
+    "Date: {{ booking.date|default:'N/A' }}\n"
+    "Time: {{ booking.time|default:'N/A' }}\n"
+    "{% if booking.vehicle_registration %}Vehicle Registration: {{ booking.vehicle_registration }}\n{% endif %}"
+    "Price: £{{ booking.price|default:0 }}\n\n"
+    "{% endfor %}{% else %}{% with booking=bookings.0 %}"
+    f"{RULE}\n"
+    "Service: {{ booking.service_name|default:'N/A' }}\n"
+    "{% if booking.mot_class %}MOT Class: {{ booking.mot_class }}\n{% endif %}"
+    "Date: {{ booking.date|default:'N/A' }}\n"
+    "Time: {{ booking.time|default:'N/A' }}\n"
+    "{% if booking.vehicle_registration %}Vehicle Registration: {{ booking.vehicle_registration }}\n{% endif %}"
+    "Price: £{{ booking.price|default:0 }}\n"
+    f"{RULE}\n"
+    "{% endwith %}{% endif %}"
+)
+
+BOOKINGS_TABLE_HTML = (
+    '<table cellpadding="4" style="border-collapse: collapse;">'
+    '<tr><th align="left">Service</th><th align="left">Date</th><th align="left">Time</th>'
+    '<th align="left">Vehicle</th><th align="left">Price</th></tr>'
+    '{% for booking in bookings %}<tr>'
+    '<td>{{ booking.service_name|default:"N/A" }}{% if booking.mot_class %} ({{ booking.mot_class }}){% endif %}</td>'
+    '<td>{{ booking.date|default:"N/A" }}</td><td>{{ booking.time|default:"N/A" }}</td>'
+    '<td>{{ booking.vehicle_registration }}</td><td>£{{ booking.price|default:0 }}</td>'
+    '</tr>{% endfor %}</table>'
+)
+
+REMINDER = EmailTemplate(
+    subject="Appointment Reminder - {{ site_name }}",
+    text=(
+        "Dear Customer,\n\n"
+        "This is a friendly reminder about your upcoming appointment with {{ site_name }}.\n\n"
+        "APPOINTMENT DETAILS:\n"
+        + REMINDER_SUMMARY_TEXT +
+        "\n"
+        "IMPORTANT REMINDERS:\n"
+        "• Please arrive 10 minutes before your scheduled time\n"
+        "• Bring your vehicle registration documents\n"
+        "• Ensure your vehicle is accessible and ready for service\n"
+        "• If you need to reschedule, please contact us at least 24 hours in advance\n\n"
+        "CONTACT INFORMATION:\n"
+        "{{ site_name }}\n"
+        "Email: {{ contact_email }}\n"
+        "Website: {{ site_url }}\n\n"
+        "We look forward to seeing you!\n\n"
+        "Best regards,\n"
+        "The {{ site_name }} Team"
+    ),
+    html=_html_page(
+        'Appointment reminder',
+        '<p>Dear Customer,</p>'
+        '<p>This is a friendly reminder about your upcoming appointment with {{ site_name }}.</p>'
+        + BOOKINGS_TABLE_HTML +
+        '<ul><li>Please arrive 10 minutes before your scheduled time</li>'
+        '<li>Bring your vehicle registration documents</li>'
+        '<li>Ensure your vehicle is accessible and ready for service</li>'
+        '<li>If you need to reschedule, please contact us at least 24 hours in advance</li></ul>'
+        '<p>We look forward to seeing you!</p>'
+    ),
+)
+
+BOOKING_REMINDER_SHORT = EmailTemplate(
+    subject="Booking Reminder",
+    text=(
+        "Hi {{ recipient_name }},\n\n"
+        "This is a reminder that your booking for {{ service_name }} "
+        "is scheduled at {{ date }} {{ time }}.\n\n"
+        "See you soon!"
+    ),
+    html=_html_page(
+        'Booking reminder',
+        '<p>Hi {{ recipient_name }},</p>'
+        '<p>This is a reminder that your booking for <strong>{{ service_name }}</strong> '
+        'is scheduled at {{ date }} {{ time }}.</p>'
+        '<p>See you soon!</p>'
+    ),
+)
+
+# Booking summaries in verification emails
+BOOKING_SUMMARY_TEXT = (
+    "{% if is_list %}{% for booking in bookings %}"
+    "\nBooking {{ forloop.counter }}:\n"
+    "  Service: {{ booking.service_name|default:'N/A' }}\n"
+    "{% if booking.mot_class %}  MOT Class: {{ booking.mot_class }}\n{% endif %}"
+    "  Price: £{{ booking.price|default:0 }}\n"
+    "  Quantity: {{ booking.quantity|default:1 }}\n"
+    "  Date: {{ booking.date|default:'N/A' }}\n"
+    "  Time: {{ booking.time|default:'N/A' }}\n"
+    "{% if booking.vehicle_registration %}  Vehicle: {{ booking.vehicle_registration }}\n{% endif %}"
+    "\n"
+    "{% endfor %}{% else %}{% with booking=bookings.0 %}"
+    "Service: {{ booking.service_name|default:'N/A' }}\n"
+    "{% if booking.mot_class %}MOT Class: {{ booking.mot_class }}\n{% endif %}"
+    "Price: £{{ booking.price|default:0 }}\n"
+    "Date: {{ booking.date|default:'N/A' }}\n"
+    "Time: {{ booking.time|default:'N/A' }}\n"
+    "{% if booking.vehicle_registration %}Vehicle: {{ booking.vehicle_registration }}\n{% endif %}"
+    "{% endwith %}{% endif %}"
+)
+
+EMAIL_VERIFICATION = EmailTemplate(
+    subject="Booking Confirmation - {{ site_name }}",
+    text=(
+        "\nDear Customer,\n\n"
+        "Thank you for booking with {{ site_name }}!\n\n"
+        "Your booking details:\n"
+        + BOOKING_SUMMARY_TEXT +
+        "\n\n"
+        "Please click the link below to verify your email and confirm your booking:\n"
+        "{{ verification_url }}\n\n"
+        "If you did not make this booking, please ignore this email.\n\n"
+        "Best regards,\n"
+        "{{ site_name }} Team\n"
+    ),
+    html=_html_page(
+        'Please confirm your booking',
+        '<p>Dear Customer,</p>'
+        '<p>Thank you for booking with {{ site_name }}!</p>'
+        + BOOKINGS_TABLE_HTML +
+        '<p><a href="{{ verification_url }}" style="display: inline-block; padding: 10px 18px; '
+        'background: #1a4d8f; color: #fff; text-decoration: none; border-radius: 4px;">Verify my email</a></p>'
+        '<p>If you did not make this booking, please ignore this email.</p>'
+    ),
+)
+
+# Booking summaries in manual reminder emails: numbered services, no dates
+REMINDER_NOW_SUMMARY_TEXT = (
+    "{% if is_list %}{% for booking in bookings %}"
+    "\nService {{ forloop.counter }}:\n"
+    "  Service: {{ booking.service_name|default:'N/A' }}\n"
+    "{% if booking.mot_class %}  MOT Class: {{ booking.mot_class }}\n{% endif %}"
+    "  Price: £{{ booking.price|default:0 }}\n"
+    "  Quantity: {{ booking.quantity|default:1 }}\n"
+    "{% if booking.vehicle_registration %}  Vehicle: {{ booking.vehicle_registration }}\n{% endif %}"
+    "\n"
+    "{% endfor %}{% else %}{% with booking=bookings.0 %}"
+    "Service: {{ booking.service_name|default:'N/A' }}\n"
+    "{% if booking.mot_class %}MOT Class: {{ booking.mot_class }}\n{% endif %}"
+    "Price: £{{ booking.price|default:0 }}\n"
+    "{% if booking.vehicle_registration %}Vehicle: {{ booking.vehicle_registration }}\n{% endif %}"
+    "{% endwith %}{% endif %}"
+)
+
+REMINDER_NOW = EmailTemplate(
+    subject="Booking Reminder - {{ site_name }}",
+    text=(
+        "\nDear Customer,\n\n"
+        "This is a friendly reminder about your upcoming appointment with {{ site_name }}.\n\n"
+        "Your booking details:\n"
+        + REMINDER_NOW_SUMMARY_TEXT +
+        "\n\n"
+        "Appointment Date & Time: {{ appointment_display }}\n\n"
+        "We look forward to seeing you!\n\n"
+        "If you need to reschedule or have any questions, please contact us.\n\n"
+        "Best regards,\n"
+        "{{ site_name }} Team\n"
+    ),
+    html=_html_page(
+        'Appointment reminder',
+        '<p>Dear Customer,</p>'
+        '<p>This is a friendly reminder about your upcoming appointment with {{ site_name }}.</p>'
+        + BOOKINGS_TABLE_HTML +
+        '<p><strong>Appointment:</strong> {{ appointment_display }}</p>'
+        '<p>We look forward to seeing you!</p>'
+        '<p>If you need to reschedule or have any questions, please contact us.</p>'
+    ),
+)
+
+TEMPLATES = {
+    'booking_created': BOOKING_CREATED,
+    'booking_confirmed': BOOKING_CONFIRMED,
+    'reminder': REMINDER,
+    'booking_reminder': BOOKING_REMINDER_SHORT,
+    'email_verification': EMAIL_VERIFICATION,
+    'reminder_now': REMINDER_NOW,
+}
+
+
+def booking_list_context(booking_details):
+    """Context for the booking summaries from stored booking_details JSON"""
+    is_list = isinstance(booking_details, list)
+    return {
+        'is_list': is_list,
+        'bookings': booking_details if is_list else [booking_details or {}],
+    }
+
+
+def render(name, context):
+    """Render template ``name`` from a dict. Returns (subject, text, html)."""
+    return TEMPLATES[name].render(context)
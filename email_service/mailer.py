@@ -0,0 +1,185 @@
+"""
+Shared mail delivery with pooled, long-lived SMTP connections.
+
+Each worker thread keeps one open connection to the relay and sends every
+message over it, instead of a new SMTP + TLS handshake per send_mail call.
+The session is recycled after EMAIL_POOL_MAX_MESSAGES messages or
+EMAIL_POOL_MAX_IDLE seconds without use, and reopened (and the message
+resent once) when the relay drops it.
+
+Every send also takes a token from a bucket sized to the relay's quota
+(EMAIL_RATE_PER_MINUTE, bursting to EMAIL_RATE_BURST) and kept in the
+shared cache, so all processes together stay within it. Bulk sends must
+leave EMAIL_RATE_BULK_RESERVE tokens behind, so a mass mailing can never
+use up the allowance that payment and booking emails need.
+
+Application code queues mail with email_service.outbox.enqueue_email; the
+outbox dispatcher is what sends it through this module.
+"""
+import logging
+import os
+import smtplib
+import socket
+import threading
+import time
+
+from django.conf import settings
+from django.core.mail import EmailMultiAlternatives, get_connection
+
+from .throttle import SharedTokenBucket
+
+logger = logging.getLogger(__name__)
+
+# Errors meaning the session is gone, so a fresh connection may succeed
+CONNECTION_ERRORS = (smtplib.SMTPServerDisconnected, smtplib.SMTPConnectError, ConnectionError, socket.timeout)
+
+
+class MailThrottled(Exception):
+    """No send allowance left within the caller's wait; retry after ``retry_after`` seconds"""
+
+    def __init__(self, retry_after):
+        self.retry_after = retry_after
+        super().__init__(f"Mail rate limit reached, retry in {retry_after:.1f}s")
+
+
+class PooledMailer:
+    """Keeps one open mail connection per thread and process"""
+
+    def __init__(self, max_messages=None, max_idle=None):
+        self.max_messages = max_messages or getattr(settings, 'EMAIL_POOL_MAX_MESSAGES', 100)
+        self.max_idle = max_idle or getattr(settings, 'EMAIL_POOL_MAX_IDLE', 60)
+        self._local = threading.local()
+        self._stats_lock = threading.Lock()
+        self._stats = {'sent': 0, 'failed': 0, 'connections_opened': 0, 'reconnects': 0, 'throttled': 0}
+
+        per_minute = getattr(settings, 'EMAIL_RATE_PER_MINUTE', 60)
+        burst = getattr(settings, 'EMAIL_RATE_BURST', 20)
+        self.bucket = SharedTokenBucket(per_minute / 60, burst)
+        self.bulk_reserve = min(getattr(settings, 'EMAIL_RATE_BULK_RESERVE', 5), burst - 1)
+        self.max_wait = getattr(settings, 'EMAIL_RATE_MAX_WAIT', 30)
+
+    def _count(self, name, amount=1):
+        with self._stats_lock:
+            self._stats[name] += amount
+
+    def _connection(self):
+        local = self._local
+        conn = getattr(local, 'connection', None)
+        stale = conn is not None and (
+            getattr(local, 'pid', None) != os.getpid()
+            or local.messages >= self.max_messages
+            or time.monotonic() - local.last_used > self.max_idle
+        )
+        if stale:
+            self._drop()
+            conn = None
+
+        if conn is None:
+            conn = get_connection(fail_silently=False)
+            conn.open()
+            local.connection = conn
+            local.pid = os.getpid()
+            local.messages = 0
+            self._count('connections_opened')
+        local.last_used = time.monotonic()
+        return conn
+
+    def _drop(self):
+        conn = getattr(self._local, 'connection', None)
+        self._local.connection = None
+        if conn is not None and getattr(self._local, 'pid', None) == os.getpid():
+            try:
+                conn.close()
+            except Exception:
+                pass
+
+    def _throttle(self, bulk, wait):
+        reserve = self.bulk_reserve if bulk else 0
+        if not self.bucket.acquire(reserve=reserve, timeout=self.max_wait if wait is None else wait):
+            self._count('throttled')
+            raise MailThrottled(self.bucket.wait_time(reserve))
+
+    def send(self, message, bulk=False, wait=None):
+        """
+        Send one EmailMessage over the thread's pooled connection.
+
+        Waits up to ``wait`` seconds (default EMAIL_RATE_MAX_WAIT) for the
+        rate limit and raises MailThrottled if there is still no allowance.
+        Reconnects and resends once if the relay has dropped the session.
+        Raises on failure.
+        """
+        self._throttle(bulk, wait)
+        for attempt in (1, 2):
+            conn = self._connection()
+            message.connection = conn
+            try:
+                conn.send_messages([message])
+            except CONNECTION_ERRORS as e:
+                self._drop()
+                if attempt == 2:
+                    self._count('failed')
+                    raise
+                logger.info(f"Mail relay dropped the session ({e}), reconnecting")
+                self._count('reconnects')
+                continue
+            except Exception:
+                self._count('failed')
+                raise
+
+            self._local.messages += 1
+            self._count('sent')
+            return 1
+
+    def send_many(self, messages, bulk=False, wait=None):
+        """
+        Send messages over as few sessions as possible.
+
+        Returns a list with None for each message sent and the exception
+        for each one that failed, in order.
+        """
+        results = []
+        for message in messages:
+            try:
+                self.send(message, bulk=bulk, wait=wait)
+                results.append(None)
+            except MailThrottled as e:
+                results.append(e)
+            except Exception as e:
+                logger.error(f"Failed to send email '{message.subject}' to {message.to}: {e}")
+                results.append(e)
+        return results
+
+    def close(self):
+        """Close this thread's connection (e.g. at worker shutdown)"""
+        self._drop()
+
+    def stats(self):
+        with self._stats_lock:
+            return dict(self._stats)
+
+
+def build_message(subject, message, recipient_list, from_email=None, html_message=None):
+    """EmailMultiAlternatives with an optional HTML part"""
+    email = EmailMultiAlternatives(
+        subject=subject,
+        body=message,
+        from_email=from_email or settings.DEFAULT_FROM_EMAIL,
+        to=list(recipient_list),
+    )
+    if html_message:
+        email.attach_alternative(html_message, 'text/html')
+    return email
+
+
+def send_mail(subject, message, recipient_list, from_email=None, html_message=None, fail_silently=False):
+    """Drop-in for django.core.mail.send_mail that uses the pooled connection"""
+    try:
+        return mailer.send(build_message(subject, message, recipient_list, from_email, html_message))
+    except Exception:
+        if fail_silently:
+            return 0
+        raise
+
+
+# Shared instance
+mailer = PooledMailer()
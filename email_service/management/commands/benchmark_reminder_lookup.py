@@ -0,0 +1,91 @@
+import random
+import statistics
+import time
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.test.utils import setup_databases, teardown_databases
+from django.utils import timezone
+
+from email_service.models import BookingReminder
+from email_service.reminders import due_reminders, reminders_due_within
+
+INSERT_CHUNK = 10000
+
+
+def _timed(query, repeat):
+    """Median milliseconds to evaluate ``query()``"""
+    durations = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        query()
+        durations.append((time.perf_counter() - started) * 1000)
+    return statistics.median(durations)
+
+
+class Command(BaseCommand):
+    help = 'Measure how the due-reminder lookups scale as the reminder history grows (uses a throwaway test database)'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--sizes',
+            default='10000,100000,1000000',
+            help='Comma-separated total row counts to measure at'
+        )
+        parser.add_argument(
+            '--backlog',
+            type=int,
+            default=2000,
+            help='Unsent reminders spread over the next 30 days'
+        )
+        parser.add_argument('--window', type=int, default=15, help='Minutes ahead for the due-within lookup')
+        parser.add_argument('--repeat', type=int, default=20, help='Runs per measurement')
+
+    def _insert(self, count, sent, now):
+        rows = []
+        for _ in range(count):
+            if sent:
+                scheduled_for = now - timedelta(minutes=random.randint(60, 60 * 24 * 365 * 3))
+            else:
+                scheduled_for = now + timedelta(minutes=random.randint(-30, 60 * 24 * 30))
+            rows.append(BookingReminder(
+                email='customer@example.com',
+                booking_details={'service_name': 'MOT Test'},
+                appointment_datetime=scheduled_for + timedelta(hours=24),
+                booking_url='https://www.access-auto-services.co.uk',
+                reminder_sent=sent,
+                scheduled_for=scheduled_for,
+                sent_at=scheduled_for if sent else None,
+            ))
+            if len(rows) >= INSERT_CHUNK:
+                BookingReminder.objects.bulk_create(rows)
+                rows = []
+        BookingReminder.objects.bulk_create(rows)
+
+    def handle(self, *args, **options):
+        sizes = sorted(int(size) for size in options['sizes'].split(','))
+        window = options['window']
+        repeat = options['repeat']
+
+        self.stdout.write('Creating throwaway test database...')
+        old_config = setup_databases(verbosity=0, interactive=False, aliases={'default'})
+        try:
+            now = timezone.now()
+            self._insert(options['backlog'], sent=False, now=now)
+            total = options['backlog']
+
+            self.stdout.write(f"{'rows':>10} {'due batch (ms)':>15} {f'due in {window}m (ms)':>18} {'matches':>8}")
+            for size in sizes:
+                if size > total:
+                    self._insert(size - total, sent=True, now=now)
+                    total = size
+
+                due_ms = _timed(lambda: list(due_reminders(now)[:200]), repeat)
+                within_ms = _timed(lambda: list(reminders_due_within(window, now)[:200]), repeat)
+                matches = reminders_due_within(window, now).count()
+                self.stdout.write(f"{total:>10} {due_ms:>15.2f} {within_ms:>18.2f} {matches:>8}")
+
+            self.stdout.write('\nQuery plan for the due-within lookup:')
+            self.stdout.write(reminders_due_within(window, now)[:200].explain())
+        finally:
+            teardown_databases(old_config, verbosity=0)
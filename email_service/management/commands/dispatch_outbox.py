@@ -0,0 +1,31 @@
+from django.core.management.base import BaseCommand
+
+from email_service.outbox import dispatch_outbox, run_dispatcher
+
+
+class Command(BaseCommand):
+    help = 'Send emails waiting in the outbox'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--loop',
+            action='store_true',
+            help='Keep running and send new emails as they are queued'
+        )
+        parser.add_argument(
+            '--poll-interval',
+            type=float,
+            default=1.0,
+            help='Seconds to wait between checks when the outbox is empty (with --loop)'
+        )
+
+    def handle(self, *args, **options):
+        if options['loop']:
+            self.stdout.write(self.style.SUCCESS('Outbox dispatcher running, press Ctrl+C to stop'))
+            try:
+                run_dispatcher(poll_interval=options['poll_interval'])
+            except KeyboardInterrupt:
+                return
+
+        sent = dispatch_outbox()
+        self.stdout.write(self.style.SUCCESS(f'Sent {sent} email(s)'))
@@ -0,0 +1,19 @@
+from django.core.management.base import BaseCommand
+
+from email_service.reminders import dispatch_due_reminders
+
+
+class Command(BaseCommand):
+    help = 'Send booking reminders that are due'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=None,
+            help='Number of reminders locked and sent together'
+        )
+
+    def handle(self, *args, **options):
+        sent = dispatch_due_reminders(batch_size=options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(f'Sent {sent} reminder(s)'))
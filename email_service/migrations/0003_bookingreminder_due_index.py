@@ -0,0 +1,17 @@
+# Generated by Django 4.2.30 on 2026-10-18 02:35
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('email_service', '0002_outboxemail'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='bookingreminder',
+            index=models.Index(fields=['reminder_sent', 'scheduled_for'], name='reminder_due_idx'),
+        ),
+    ]
@@ -0,0 +1,21 @@
+# Generated by Django 4.2.30 on 2026-10-18 02:36
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('email_service', '0003_bookingreminder_due_index'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='bookingreminder',
+            name='reminder_due_idx',
+        ),
+        migrations.AddIndex(
+            model_name='bookingreminder',
+            index=models.Index(condition=models.Q(('reminder_sent', False)), fields=['scheduled_for', 'appointment_datetime'], name='reminder_unsent_due_idx'),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 4.2.30 on 2026-10-18 02:41
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('email_service', '0004_bookingreminder_partial_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='outboxemail',
+            name='priority',
+            field=models.PositiveSmallIntegerField(choices=[(0, 'Payment'), (1, 'Transactional'), (2, 'Reminder'), (3, 'Bulk')], default=1),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 4.2.30 on 2026-10-18 03:06
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('email_service', '0005_outboxemail_priority'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='bookingreminder',
+            name='claimed_until',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+    ]
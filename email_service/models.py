@@ -26,6 +26,62 @@ class BookingReminder(models.Model):
     scheduled_for = models.DateTimeField()  # When to send the reminder
     created_at = models.DateTimeField(auto_now_add=True)
     sent_at = models.DateTimeField(null=True, blank=True)
+    # Set while a sweep is sending the reminder; an expired claim is taken over
+    claimed_until = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            # Only unsent reminders are ever looked up by time, so the sent
+            # history (almost every row) is left out of the index
+            models.Index(
+                fields=['scheduled_for', 'appointment_datetime'],
+                condition=models.Q(reminder_sent=False),
+                name='reminder_unsent_due_idx',
+            ),
+        ]
     
     def __str__(self):
         return f"Booking reminder for {self.email} at {self.appointment_datetime}"
+
+class OutboxEmail(models.Model):
+    """Email waiting to be sent, written in the same transaction as the change that caused it"""
+    STATUS_CHOICES = [
+        ('pending', 'Pending'),
+        ('sending', 'Sending'),
+        ('sent', 'Sent'),
+        ('failed', 'Failed'),
+    ]
+    # Lower is sent first; bulk also has to leave part of the rate limit free
+    PRIORITY_PAYMENT = 0
+    PRIORITY_TRANSACTIONAL = 1
+    PRIORITY_REMINDER = 2
+    PRIORITY_BULK = 3
+    PRIORITY_CHOICES = [
+        (PRIORITY_PAYMENT, 'Payment'),
+        (PRIORITY_TRANSACTIONAL, 'Transactional'),
+        (PRIORITY_REMINDER, 'Reminder'),
+        (PRIORITY_BULK, 'Bulk'),
+    ]
+
+    category = models.CharField(max_length=32, default='transactional')
+    priority = models.PositiveSmallIntegerField(choices=PRIORITY_CHOICES, default=PRIORITY_TRANSACTIONAL)
+    reference = models.CharField(max_length=64, blank=True)  # e.g. "booking:42", for tracing
+    subject = models.CharField(max_length=255)
+    body = models.TextField()
+    html_body = models.TextField(blank=True)
+    from_email = models.CharField(max_length=254, blank=True)  # Blank: DEFAULT_FROM_EMAIL at send time
+    recipients = models.JSONField()
+    status = models.CharField(max_length=16, choices=STATUS_CHOICES, default='pending')
+    attempts = models.IntegerField(default=0)
+    last_error = models.TextField(blank=True)
+    next_attempt_at = models.DateTimeField()
+    created_at = models.DateTimeField(auto_now_add=True)
+    sent_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['status', 'next_attempt_at'], name='outbox_due_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.subject} to {', '.join(self.recipients)} ({self.status})"
@@ -0,0 +1,207 @@
+import logging
+import time
+from datetime import timedelta
+from itertools import groupby
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.utils import timezone
+
+from .mailer import MailThrottled, build_message, mailer
+from .models import OutboxEmail
+
+logger = logging.getLogger(__name__)
+
+# Queue each category is sent from; anything else is transactional
+CATEGORY_PRIORITIES = {
+    'payment_confirmation': OutboxEmail.PRIORITY_PAYMENT,
+    'booking_confirmation': OutboxEmail.PRIORITY_TRANSACTIONAL,
+    'reminder': OutboxEmail.PRIORITY_REMINDER,
+    'bulk': OutboxEmail.PRIORITY_BULK,
+}
+
+
+class OutboxFull(Exception):
+    """The bulk queue is over EMAIL_OUTBOX_MAX_BULK_BACKLOG; try again once it drains"""
+
+
+def outbox_email(subject, message, recipient_list, from_email=None, html_message=None,
+                 category='transactional', reference='', priority=None):
+    """An unsaved OutboxEmail, due now; see enqueue_email"""
+    if priority is None:
+        priority = CATEGORY_PRIORITIES.get(category, OutboxEmail.PRIORITY_TRANSACTIONAL)
+    return OutboxEmail(
+        category=category,
+        priority=priority,
+        reference=reference,
+        subject=subject,
+        body=message,
+        html_body=html_message or '',
+        from_email=from_email or settings.DEFAULT_FROM_EMAIL or '',
+        recipients=list(recipient_list),
+        next_attempt_at=timezone.now(),
+    )
+
+
+def enqueue_email(subject, message, recipient_list, from_email=None, html_message=None,
+                  category='transactional', reference='', priority=None):
+    """
+    Store an email for the outbox dispatcher instead of sending it now.
+
+    Called inside ``transaction.atomic()`` the email is only sent if the
+    surrounding changes commit. Returns the OutboxEmail row.
+    """
+    email = outbox_email(subject, message, recipient_list, from_email, html_message,
+                         category, reference, priority)
+    email.save()
+    logger.info(f"Queued email {email.id} '{subject}' to {recipient_list}")
+    return email
+
+
+def bulk_backlog():
+    """Bulk emails still waiting to be sent"""
+    return OutboxEmail.objects.filter(
+        priority=OutboxEmail.PRIORITY_BULK,
+        status__in=['pending', 'sending'],
+    ).count()
+
+
+def enqueue_bulk(messages, category='bulk', reference=''):
+    """
+    Queue (subject, message, from_email, recipient_list) tuples, as for
+    send_mass_mail, on the bulk queue.
+
+    Raises OutboxFull instead of queueing anything when the bulk backlog
+    would pass EMAIL_OUTBOX_MAX_BULK_BACKLOG. Returns the number queued.
+    """
+    messages = list(messages)
+    limit = getattr(settings, 'EMAIL_OUTBOX_MAX_BULK_BACKLOG', 2000)
+    backlog = bulk_backlog()
+    if backlog + len(messages) > limit:
+        raise OutboxFull(f"{backlog} bulk emails are still queued (limit {limit})")
+
+    now = timezone.now()
+    OutboxEmail.objects.bulk_create([
+        OutboxEmail(
+            category=category,
+            priority=OutboxEmail.PRIORITY_BULK,
+            reference=reference,
+            subject=subject,
+            body=message,
+            from_email=from_email or settings.DEFAULT_FROM_EMAIL or '',
+            recipients=list(recipient_list),
+            next_attempt_at=now,
+        )
+        for subject, message, from_email, recipient_list in messages
+    ])
+    logger.info(f"Queued {len(messages)} bulk email(s)")
+    return len(messages)
+
+
+def _retry_delay(attempts):
+    """Back off 1, 2, 4 ... minutes, at most an hour"""
+    return timedelta(seconds=min(60 * 2 ** (attempts - 1), 3600))
+
+
+def _claim(batch_size):
+    """
+    Mark up to ``batch_size`` due emails as sending and return them.
+
+    A claim expires after EMAIL_OUTBOX_SENDING_TIMEOUT, so emails held by a
+    dispatcher that died are picked up again.
+    """
+    now = timezone.now()
+    timeout = timedelta(seconds=getattr(settings, 'EMAIL_OUTBOX_SENDING_TIMEOUT', 300))
+
+    with transaction.atomic():
+        due = OutboxEmail.objects.filter(
+            status__in=['pending', 'sending'],
+            next_attempt_at__lte=now,
+        ).order_by('priority', 'next_attempt_at', 'id')
+        if connection.features.has_select_for_update_skip_locked:
+            due = due.select_for_update(skip_locked=True)
+        emails = list(due[:batch_size])
+
+        for email in emails:
+            email.status = 'sending'
+            email.attempts += 1
+            email.next_attempt_at = now + timeout
+        OutboxEmail.objects.bulk_update(emails, ['status', 'attempts', 'next_attempt_at'])
+    return emails
+
+
+def _build_message(email):
+    return build_message(email.subject, email.body, email.recipients, email.from_email, email.html_body)
+
+
+def _send(emails):
+    """Send a claimed batch, highest priority first; bulk emails never wait for the rate limit"""
+    results = []
+    for priority, group in groupby(emails, key=lambda email: email.priority):
+        bulk = priority == OutboxEmail.PRIORITY_BULK
+        messages = [_build_message(email) for email in group]
+        results.extend(mailer.send_many(messages, bulk=bulk, wait=0 if bulk else None))
+    return results
+
+
+def dispatch_outbox(batch_size=None):
+    """
+    Send due outbox emails over the pooled SMTP connection, payment and
+    booking emails before reminders and bulk mail.
+
+    Failed emails are retried with exponential backoff until
+    EMAIL_OUTBOX_MAX_ATTEMPTS, then left as failed. Emails held back by the
+    rate limit go back on the queue without using an attempt. Returns the
+    number sent.
+    """
+    batch_size = batch_size or getattr(settings, 'EMAIL_OUTBOX_BATCH_SIZE', 100)
+    max_attempts = getattr(settings, 'EMAIL_OUTBOX_MAX_ATTEMPTS', 5)
+    sent_total = 0
+
+    while True:
+        emails = _claim(batch_size)
+        if not emails:
+            return sent_total
+
+        results = _send(emails)
+        throttled = 0
+        for email, error in zip(emails, results):
+            if error is None:
+                email.status = 'sent'
+                email.sent_at = timezone.now()
+                email.last_error = ''
+                sent_total += 1
+            elif isinstance(error, MailThrottled):
+                email.status = 'pending'
+                email.attempts -= 1
+                email.next_attempt_at = timezone.now() + timedelta(seconds=error.retry_after)
+                throttled += 1
+            elif email.attempts >= max_attempts:
+                email.status = 'failed'
+                email.last_error = str(error)
+                logger.error(f"Giving up on email {email.id} after {email.attempts} attempts: {error}")
+            else:
+                email.status = 'pending'
+                email.last_error = str(error)
+                email.next_attempt_at = timezone.now() + _retry_delay(email.attempts)
+                logger.warning(f"Email {email.id} failed (attempt {email.attempts}), will retry: {error}")
+
+        OutboxEmail.objects.bulk_update(emails, ['status', 'attempts', 'last_error', 'next_attempt_at', 'sent_at'])
+        logger.info(f"Outbox batch done: {sum(e.status == 'sent' for e in emails)}/{len(emails)} sent")
+        if throttled:
+            logger.info(f"{throttled} email(s) held back by the send rate limit")
+
+        if len(emails) < batch_size or throttled:
+            return sent_total
+
+
+def run_dispatcher(poll_interval=1.0):
+    """Drain the outbox continuously; for a dedicated dispatcher process"""
+    while True:
+        try:
+            sent = dispatch_outbox()
+        except Exception as e:
+            logger.error(f"Outbox dispatch failed: {e}")
+            sent = 0
+        if not sent:
+            time.sleep(poll_interval)
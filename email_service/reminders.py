@@ -0,0 +1,167 @@
+import logging
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from .email_templates import SITE_URL, booking_list_context, render
+from .models import BookingReminder, OutboxEmail
+from .outbox import outbox_email
+
+logger = logging.getLogger(__name__)
+
+REMINDER_LEAD_TIME = timedelta(hours=24)
+
+
+def create_reminder(email, booking_details, appointment_datetime, booking_url=SITE_URL):
+    """
+    Store a reminder due REMINDER_LEAD_TIME before the appointment.
+
+    The row is the schedule: the reminder dispatcher sends it once it is
+    due. Returns None when the appointment is too soon for a reminder.
+    """
+    scheduled_for = appointment_datetime - REMINDER_LEAD_TIME
+    if scheduled_for <= timezone.now():
+        return None
+    return BookingReminder.objects.create(
+        email=email,
+        booking_details=booking_details,
+        appointment_datetime=appointment_datetime,
+        booking_url=booking_url,
+        scheduled_for=scheduled_for,
+    )
+
+
+def reminder_recipients(reminder):
+    """The customer, plus the owner's copy"""
+    recipient_list = [reminder.email]
+    owner_email = settings.OWNER_EMAIL
+    if owner_email and owner_email not in recipient_list:
+        recipient_list.append(owner_email)
+    return recipient_list
+
+
+def build_reminder_message(reminder):
+    """The reminder email for ``reminder`` as (subject, message, html_message)"""
+    return render('reminder', booking_list_context(reminder.booking_details))
+
+
+def unsent_reminders():
+    """Unsent reminders; matches the partial indexes on BookingReminder"""
+    return BookingReminder.objects.filter(reminder_sent=False)
+
+
+def due_reminders(now=None):
+    """Unsent reminders that are due and whose appointment is still ahead"""
+    now = now or timezone.now()
+    return unsent_reminders().filter(
+        scheduled_for__lte=now,
+        appointment_datetime__gt=now,
+    ).order_by('scheduled_for')
+
+
+def reminders_due_within(minutes, now=None):
+    """
+    Unsent reminders that become due in the next ``minutes`` minutes (or are
+    overdue), soonest first. Reads only the unsent index range, so its cost
+    follows the backlog rather than the size of the reminder history.
+    """
+    now = now or timezone.now()
+    return unsent_reminders().filter(
+        scheduled_for__lte=now + timedelta(minutes=minutes),
+        appointment_datetime__gt=now,
+    ).order_by('scheduled_for')
+
+
+def _claim(batch_size):
+    """
+    Claim up to ``batch_size`` due reminders and return them.
+
+    The rows are only locked while the claim is written, so concurrent
+    sweeps skip them without anything being sent inside the transaction.
+    A claim expires after REMINDER_CLAIM_TIMEOUT, so reminders held by a
+    sweep that died are picked up again.
+    """
+    now = timezone.now()
+    timeout = timedelta(seconds=getattr(settings, 'REMINDER_CLAIM_TIMEOUT', 300))
+
+    with transaction.atomic():
+        due = due_reminders(now).filter(Q(claimed_until__isnull=True) | Q(claimed_until__lte=now))
+        if connection.features.has_select_for_update_skip_locked:
+            due = due.select_for_update(skip_locked=True)
+        reminders = list(due[:batch_size])
+        BookingReminder.objects.filter(id__in=[reminder.id for reminder in reminders]).update(
+            claimed_until=now + timeout
+        )
+    return reminders
+
+
+def queue_reminders(entries):
+    """
+    Mark reminders sent and put them on the outbox's reminder queue.
+
+    ``entries`` are (reminder, subject, message, html_message,
+    recipient_list) tuples; a recipient_list of None means
+    reminder_recipients(). Both happen in one transaction, and only for
+    reminders not already sent, so each is queued once. Returns the ids of
+    the reminders queued.
+    """
+    entries = {entry[0].id: entry for entry in entries}
+    if not entries:
+        return []
+    with transaction.atomic():
+        # Locked, so the update below marks exactly these rows
+        ids = list(
+            unsent_reminders().filter(id__in=entries).select_for_update().order_by('id').values_list('id', flat=True)
+        )
+        BookingReminder.objects.filter(id__in=ids, reminder_sent=False).update(
+            reminder_sent=True, sent_at=timezone.now(), claimed_until=None
+        )
+        OutboxEmail.objects.bulk_create([
+            outbox_email(
+                subject, message, recipient_list or reminder_recipients(reminder),
+                html_message=html_message,
+                category='reminder',
+                reference=f"reminder:{reminder.id}",
+            )
+            for reminder, subject, message, html_message, recipient_list in map(entries.get, ids)
+        ])
+    return ids
+
+
+def queue_reminder(reminder, subject, message, html_message, recipient_list=None):
+    """queue_reminders for one reminder; returns whether it was queued"""
+    return bool(queue_reminders([(reminder, subject, message, html_message, recipient_list)]))
+
+
+def _queue_batch(batch_size):
+    """
+    Claim a batch of due reminders and hand them to the outbox, which
+    sends them after payment and booking emails. Returns (claimed, queued).
+    """
+    reminders = _claim(batch_size)
+    queued = queue_reminders([(reminder, *build_reminder_message(reminder), None) for reminder in reminders])
+    return len(reminders), len(queued)
+
+
+def dispatch_due_reminders(batch_size=None):
+    """
+    Queue every reminder that is due, in batches, for the outbox dispatcher.
+
+    A reminder claimed by a sweep that dies before queueing it is picked up
+    again after REMINDER_CLAIM_TIMEOUT. Returns the number queued.
+    """
+    batch_size = batch_size or getattr(settings, 'REMINDER_BATCH_SIZE', 200)
+    total_queued = 0
+
+    while True:
+        claimed, queued = _queue_batch(batch_size)
+        total_queued += queued
+        if claimed < batch_size:
+            break
+
+    if total_queued:
+        logger.info(f"Queued {total_queued} booking reminder(s)")
+    return total_queued
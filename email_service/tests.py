@@ -1,3 +1,180 @@
-from django.test import TestCase
+from datetime import timedelta
+from unittest import mock
 
-# Create your tests here.
+from django.core import mail
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from rest_framework.test import APITestCase
+
+from email_service.email_templates import booking_list_context, render
+from email_service.mailer import mailer
+from email_service.models import BookingReminder, OutboxEmail
+from email_service.outbox import dispatch_outbox, enqueue_email
+from email_service.reminders import dispatch_due_reminders, queue_reminders
+from email_service.throttle import SharedTokenBucket
+
+
+class ReminderDispatchTests(TestCase):
+    def setUp(self):
+        now = timezone.now()
+        self.reminders = [
+            BookingReminder.objects.create(
+                email=f'customer{i}@example.com',
+                booking_details={'service': 'MOT'},
+                appointment_datetime=now + timedelta(hours=2),
+                booking_url='https://example.com/',
+                scheduled_for=now - timedelta(minutes=i + 1),
+            )
+            for i in range(3)
+        ]
+
+    def test_due_reminders_are_queued_once(self):
+        with mock.patch.object(mailer, 'send_many') as send_many:
+            self.assertEqual(dispatch_due_reminders(), 3)
+        send_many.assert_not_called()
+        self.assertEqual(
+            set(BookingReminder.objects.values_list('reminder_sent', 'claimed_until')), {(True, None)}
+        )
+        queued = OutboxEmail.objects.all()
+        self.assertEqual({email.priority for email in queued}, {OutboxEmail.PRIORITY_REMINDER})
+        self.assertEqual({email.reference for email in queued},
+                         {f'reminder:{reminder.id}' for reminder in self.reminders})
+        self.assertEqual(dispatch_due_reminders(), 0)
+
+    def test_claimed_reminders_are_skipped_until_claim_expires(self):
+        BookingReminder.objects.filter(id=self.reminders[0].id).update(
+            claimed_until=timezone.now() + timedelta(minutes=5)
+        )
+        self.assertEqual(dispatch_due_reminders(), 2)
+
+        BookingReminder.objects.filter(id=self.reminders[0].id).update(
+            claimed_until=timezone.now() - timedelta(seconds=1)
+        )
+        self.assertEqual(dispatch_due_reminders(), 1)
+        self.assertEqual(OutboxEmail.objects.count(), 3)
+
+    def test_batch_is_queued_in_bulk(self):
+        now = timezone.now()
+        for i in range(3, 10):
+            BookingReminder.objects.create(
+                email=f'customer{i}@example.com', booking_details={'service': 'MOT'},
+                appointment_datetime=now + timedelta(hours=2), scheduled_for=now - timedelta(minutes=1),
+            )
+        # Claim, then one transaction: lock, mark sent, insert the emails
+        with self.assertNumQueries(9):
+            self.assertEqual(dispatch_due_reminders(), 10)
+        self.assertEqual(OutboxEmail.objects.count(), 10)
+
+    def test_sent_reminders_are_not_queued_again(self):
+        BookingReminder.objects.filter(id=self.reminders[0].id).update(reminder_sent=True)
+        entries = [(reminder, 'Reminder', 'Body', '', None) for reminder in self.reminders]
+        self.assertEqual(queue_reminders(entries), [r.id for r in self.reminders[1:]])
+        self.assertEqual(queue_reminders(entries), [])
+        self.assertEqual(OutboxEmail.objects.count(), 2)
+
+    @override_settings(EMAIL_BACKEND='django.core.mail.backends.locmem.EmailBackend')
+    def test_outbox_sends_reminders_after_payment_emails(self):
+        dispatch_due_reminders()
+        enqueue_email('Payment received', 'Thanks', ['payer@example.com'], category='payment_confirmation')
+        with mock.patch.object(mailer.bucket, 'rate', 0):
+            self.assertEqual(dispatch_outbox(), 4)
+        self.assertEqual(mail.outbox[0].subject, 'Payment received')
+
+
+class SharedTokenBucketTests(TestCase):
+    def setUp(self):
+        cache.clear()
+
+    def test_processes_share_one_allowance(self):
+        # Two buckets on the same key stand in for two processes
+        first, second = SharedTokenBucket(1, 3), SharedTokenBucket(1, 3)
+        with mock.patch('email_service.throttle.time.time', return_value=3000.0):
+            taken = [bucket.try_acquire() == 0 for bucket in (first, second, first, second)]
+            self.assertEqual(taken, [True, True, True, False])
+            self.assertEqual(first.wait_time(), 3)
+        with mock.patch('email_service.throttle.time.time', return_value=3003.0):
+            self.assertEqual(second.try_acquire(), 0)
+
+    def test_reserve_is_left_for_priority_mail(self):
+        bucket = SharedTokenBucket(1, 3)
+        with mock.patch('email_service.throttle.time.time', return_value=3000.0):
+            self.assertEqual(bucket.try_acquire(reserve=1), 0)
+            self.assertEqual(bucket.try_acquire(reserve=1), 0)
+            self.assertGreater(bucket.try_acquire(reserve=1), 0)
+            self.assertEqual(bucket.try_acquire(), 0)
+
+    def test_falls_back_to_process_bucket_without_cache(self):
+        bucket = SharedTokenBucket(1, 1)
+        with mock.patch.object(SharedTokenBucket, '_shared', side_effect=ConnectionError('cache down')):
+            self.assertEqual(bucket.try_acquire(), 0)
+            self.assertGreater(bucket.try_acquire(), 0)
+
+
+class VerificationEmailTests(APITestCase):
+    def test_queued_instead_of_sent_on_request(self):
+        with mock.patch.object(mailer, 'send') as send:
+            response = self.client.post('/api/email/verification/', {
+                'email': 'customer@example.com',
+                'booking_details': {'service': 'MOT'},
+                'booking_url': 'https://example.com/book',
+            }, format='json', secure=True)
+        self.assertEqual(response.status_code, 201)
+        send.assert_not_called()
+        email = OutboxEmail.objects.get()
+        self.assertEqual((email.recipients, email.priority), (['customer@example.com'], OutboxEmail.PRIORITY_TRANSACTIONAL))
+        self.assertEqual(email.reference, f"verification:{response.json()['verification_id']}")
+
+
+# SendReminderNowAPIView's text before the email templates, less the indentation it ended on
+REMINDER_NOW_BASELINE = """
+Dear Customer,
+
+This is a friendly reminder about your upcoming appointment with Access Auto Services.
+
+Your booking details:
+
+Service 1:
+  Service: MOT
+  MOT Class: 4
+  Price: £54.85
+  Quantity: 1
+  Vehicle: AB12CDE
+
+
+Service 2:
+  Service: Full service
+  Price: £120
+  Quantity: 2
+
+
+
+Appointment Date & Time: 2026-11-02 at 09:30
+
+We look forward to seeing you!
+
+If you need to reschedule or have any questions, please contact us.
+
+Best regards,
+Access Auto Services Team
+"""
+
+
+class ReminderTemplateTests(TestCase):
+    def test_reminder_now_keeps_its_wording(self):
+        bookings = [
+            {'service_name': 'MOT', 'mot_class': '4', 'price': '54.85', 'quantity': 1,
+             'vehicle_registration': 'AB12CDE', 'date': '2026-11-02', 'time': '09:30'},
+            {'service_name': 'Full service', 'price': 120, 'quantity': 2, 'date': '2026-11-02', 'time': '11:00'},
+        ]
+        subject, message, _ = render('reminder_now', {
+            **booking_list_context(bookings), 'appointment_display': '2026-11-02 at 09:30',
+        })
+        self.assertEqual(subject, 'Booking Reminder - Access Auto Services')
+        self.assertEqual(message, REMINDER_NOW_BASELINE)
+
+        _, message, _ = render('reminder_now', {
+            **booking_list_context({'service_name': 'MOT', 'price': '54.85', 'date': '2026-11-02'}),
+            'appointment_display': '2026-11-02 at 09:30',
+        })
+        self.assertIn('Your booking details:\nService: MOT\nPrice: £54.85\n\n\nAppointment', message)
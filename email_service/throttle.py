@@ -0,0 +1,119 @@
+import logging
+import math
+import threading
+import time
+
+from django.core.cache import caches
+
+logger = logging.getLogger(__name__)
+
+
+class TokenBucket:
+    """
+    Token bucket shared by the threads of one process.
+
+    Refills at ``rate`` tokens per second up to ``capacity``. A caller can ask
+    for a token only if ``reserve`` tokens are left afterwards, so low
+    priority senders never use the last of the burst allowance.
+    """
+
+    def __init__(self, rate, capacity):
+        self.rate = rate
+        self.capacity = max(capacity, 1)
+        self._tokens = float(self.capacity)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self):
+        now = time.monotonic()
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def try_acquire(self, reserve=0):
+        """Take a token; returns 0 on success, else the seconds until one is free"""
+        if not self.rate:
+            return 0
+        with self._lock:
+            self._refill()
+            if self._tokens - 1 >= reserve:
+                self._tokens -= 1
+                return 0
+            return (reserve + 1 - self._tokens) / self.rate
+
+    def acquire(self, reserve=0, timeout=None):
+        """Wait up to ``timeout`` seconds (None: forever) for a token. Returns whether one was taken."""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            wait = self.try_acquire(reserve)
+            if not wait:
+                return True
+            if deadline is not None:
+                remaining = deadline - time.monotonic()
+                if remaining < wait:
+                    return False
+            time.sleep(wait)
+
+    def wait_time(self, reserve=0):
+        """Seconds until a token could be taken, without taking it"""
+        if not self.rate:
+            return 0
+        with self._lock:
+            self._refill()
+            return max(reserve + 1 - self._tokens, 0) / self.rate
+
+
+class SharedTokenBucket(TokenBucket):
+    """
+    Send allowance shared by every process through a Django cache.
+
+    Each window of ``capacity / rate`` seconds allows ``capacity`` tokens,
+    counted with atomic cache increments under ``key``, so the average rate
+    holds across processes and machines as long as they share the cache
+    (Redis; LocMemCache only spans one process). Falls back to the
+    in-process bucket while the cache cannot be reached.
+    """
+
+    def __init__(self, rate, capacity, key='email-send-rate', cache_alias='default'):
+        super().__init__(rate, capacity)
+        self.key = key
+        self.cache_alias = cache_alias
+        self.window = self.capacity / rate if rate else 0
+
+    def _counter(self):
+        """Cache key of the current window and the seconds left in it"""
+        now = time.time()
+        index = math.floor(now / self.window)
+        return f"{self.key}:{index}", (index + 1) * self.window - now
+
+    def _shared(self, reserve, take):
+        cache = caches[self.cache_alias]
+        key, remaining = self._counter()
+        if not take:
+            used = cache.get(key, 0)
+            return 0 if used + 1 <= self.capacity - reserve else remaining
+        cache.add(key, 0, timeout=math.ceil(self.window) + 1)
+        if cache.incr(key) <= self.capacity - reserve:
+            return 0
+        cache.decr(key)
+        return remaining
+
+    def _fallback(self, error):
+        logger.warning(f"Shared send rate limit unavailable, limiting this process only: {error}")
+
+    def try_acquire(self, reserve=0):
+        if not self.rate:
+            return 0
+        try:
+            return self._shared(reserve, take=True)
+        except Exception as e:
+            self._fallback(e)
+            return super().try_acquire(reserve)
+
+    def wait_time(self, reserve=0):
+        if not self.rate:
+            return 0
+        try:
+            return self._shared(reserve, take=False)
+        except Exception as e:
+            self._fallback(e)
+            return super().wait_time(reserve)
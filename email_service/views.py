@@ -1,7 +1,9 @@
 from datetime import datetime, timedelta
 import logging
-from django.core.mail import send_mail
-from django.conf import settings
+from .email_templates import booking_list_context, render
+from .outbox import enqueue_email
+from .reminders import queue_reminder
+from django.db import transaction
 from django.utils import timezone
 from rest_framework import status
 from rest_framework.response import Response
@@ -13,16 +15,6 @@ from .serializers import EmailVerificationSerializer, BookingReminderSerializer
 # Set up logging
 logger = logging.getLogger(__name__)
 
-# Import tasks with error handling
-try:
-    from .tasks import send_reminder_email_task
-    CELERY_AVAILABLE = True
-except ImportError:
-    CELERY_AVAILABLE = False
-    def send_reminder_email_task(reminder_id):
-        logger.warning(f"Celery not available, skipping reminder task for reminder {reminder_id}")
-        pass
-
 class EmailVerificationAPIView(APIView):
     """
     Handle email verification requests
@@ -34,10 +26,10 @@ class EmailVerificationAPIView(APIView):
         try:
             serializer = EmailVerificationSerializer(data=request.data)
             if serializer.is_valid():
-                email_verification = serializer.save()
-                
-                # Send verification email
-                self.send_verification_email(email_verification)
+                # Queued with the row, so the request never waits on SMTP
+                with transaction.atomic():
+                    email_verification = serializer.save()
+                    self.send_verification_email(email_verification)
                 
                 logger.info(f"Email verification created for {email_verification.email}")
                 return Response({
@@ -54,75 +46,28 @@ class EmailVerificationAPIView(APIView):
             }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
     
     def send_verification_email(self, email_verification):
-        """Send the verification email"""
+        """Queue the verification email for the outbox dispatcher"""
         try:
-            # Format booking details for email
-            booking_details = email_verification.booking_details
-            booking_summary = self.format_booking_details(booking_details)
-            
             verification_url = f"{email_verification.booking_url}?verify={email_verification.verification_token}"
+            subject, message, html_message = render('email_verification', {
+                **booking_list_context(email_verification.booking_details),
+                'verification_url': verification_url,
+            })
             
-            subject = "Booking Confirmation - Access Auto Services"
-            message = f"""
-Dear Customer,
-
-Thank you for booking with Access Auto Services!
-
-Your booking details:
-{booking_summary}
-
-Please click the link below to verify your email and confirm your booking:
-{verification_url}
-
-If you did not make this booking, please ignore this email.
-
-Best regards,
-Access Auto Services Team
-            """
-            
-            send_mail(
+            enqueue_email(
                 subject=subject,
                 message=message,
-                from_email=settings.DEFAULT_FROM_EMAIL,
                 recipient_list=[email_verification.email],
-                fail_silently=False,
+                html_message=html_message,
+                category='email_verification',
+                reference=f"verification:{email_verification.id}",
             )
             
-            logger.info(f"Verification email sent to {email_verification.email}")
+            logger.info(f"Verification email queued for {email_verification.email}")
             
         except Exception as e:
-            logger.error(f"Failed to send verification email: {e}")
+            logger.error(f"Failed to queue verification email: {e}")
             raise
-    
-    def format_booking_details(self, booking_details):
-        """Format booking details for email display"""
-        formatted = ""
-        
-        if isinstance(booking_details, list):
-            for i, booking in enumerate(booking_details, 1):
-                formatted += f"\nBooking {i}:\n"
-                formatted += f"  Service: {booking.get('service_name', 'N/A')}\n"
-                if booking.get('mot_class'):
-                    formatted += f"  MOT Class: {booking.get('mot_class')}\n"
-                formatted += f"  Price: £{booking.get('price', 0)}\n"
-                formatted += f"  Quantity: {booking.get('quantity', 1)}\n"
-                formatted += f"  Date: {booking.get('date', 'N/A')}\n"
-                formatted += f"  Time: {booking.get('time', 'N/A')}\n"
-                if booking.get('vehicle_registration'):
-                    formatted += f"  Vehicle: {booking.get('vehicle_registration')}\n"
-                formatted += "\n"
-        else:
-            # Single booking
-            formatted += f"Service: {booking_details.get('service_name', 'N/A')}\n"
-            if booking_details.get('mot_class'):
-                formatted += f"MOT Class: {booking_details.get('mot_class')}\n"
-            formatted += f"Price: £{booking_details.get('price', 0)}\n"
-            formatted += f"Date: {booking_details.get('date', 'N/A')}\n"
-            formatted += f"Time: {booking_details.get('time', 'N/A')}\n"
-            if booking_details.get('vehicle_registration'):
-                formatted += f"Vehicle: {booking_details.get('vehicle_registration')}\n"
-        
-        return formatted
 
 class EmailVerifyTokenAPIView(APIView):
     """
@@ -181,11 +126,9 @@ class BookingReminderAPIView(APIView):
                         'message': 'Appointment is too soon for reminder scheduling'
                     }, status=status.HTTP_200_OK)
                 
+                # The reminder sweep sends it once scheduled_for has passed
                 booking_reminder = serializer.save(scheduled_for=reminder_time)
                 
-                # Schedule the reminder email
-                self.schedule_reminder_email(booking_reminder)
-                
                 logger.info(f"Booking reminder scheduled for {booking_reminder.email} at {reminder_time}")
                 
                 return Response({
@@ -201,33 +144,6 @@ class BookingReminderAPIView(APIView):
             return Response({
                 'error': 'Failed to schedule booking reminder'
             }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
-    
-    def schedule_reminder_email(self, booking_reminder):
-        """Schedule the reminder email using Celery or immediate sending"""
-        try:
-            if CELERY_AVAILABLE:
-                try:
-                    # Test Redis connection first
-                    from django.core.cache import cache
-                    cache.get('test_key')  # This will fail if Redis is not available
-                    
-                    # Schedule with Celery
-                    send_reminder_email_task.apply_async(
-                        args=[booking_reminder.id],
-                        eta=booking_reminder.scheduled_for
-                    )
-                    logger.info(f"Reminder email scheduled with Celery for {booking_reminder.id}")
-                except Exception as celery_error:
-                    logger.warning(f"Celery/Redis not available ({celery_error}). Reminder created but not scheduled.")
-                    # Don't raise the error, just log it
-            else:
-                # For development/testing - send immediately or log
-                logger.info(f"Celery not available. Reminder would be sent at {booking_reminder.scheduled_for}")
-                
-        except Exception as e:
-            logger.error(f"Failed to schedule reminder email: {e}")
-            # Don't raise the error to prevent booking creation from failing
-            logger.warning("Continuing without reminder scheduling...")
 
 class SendReminderNowAPIView(APIView):
     """
@@ -252,13 +168,11 @@ class SendReminderNowAPIView(APIView):
                     'message': 'Reminder already sent'
                 }, status=status.HTTP_200_OK)
             
-            # Send the reminder email
-            self.send_reminder_email(booking_reminder)
-            
-            # Mark as sent
-            booking_reminder.reminder_sent = True
-            booking_reminder.sent_at = timezone.now()
-            booking_reminder.save()
+            # Queue the reminder email and mark it sent
+            if not self.send_reminder_email(booking_reminder):
+                return Response({
+                    'message': 'Reminder already sent'
+                }, status=status.HTTP_200_OK)
             
             return Response({
                 'message': 'Reminder email sent successfully'
@@ -275,67 +189,19 @@ class SendReminderNowAPIView(APIView):
             }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
     
     def send_reminder_email(self, booking_reminder):
-        """Send the reminder email"""
+        """Queue the reminder email on the outbox's reminder queue; returns whether it was queued"""
         try:
-            # Format booking details for email
-            booking_details = booking_reminder.booking_details
-            booking_summary = self.format_booking_details(booking_details)
-            
-            subject = "Booking Reminder - Access Auto Services"
-            message = f"""
-Dear Customer,
-
-This is a friendly reminder about your upcoming appointment with Access Auto Services.
-
-Your booking details:
-{booking_summary}
-
-Appointment Date & Time: {booking_reminder.appointment_datetime.strftime('%Y-%m-%d at %H:%M')}
-
-We look forward to seeing you!
-
-If you need to reschedule or have any questions, please contact us.
-
-Best regards,
-Access Auto Services Team
-            """
+            subject, message, html_message = render('reminder_now', {
+                **booking_list_context(booking_reminder.booking_details),
+                'appointment_display': booking_reminder.appointment_datetime.strftime('%Y-%m-%d at %H:%M'),
+            })
             
-            send_mail(
-                subject=subject,
-                message=message,
-                from_email=settings.DEFAULT_FROM_EMAIL,
-                recipient_list=[booking_reminder.email],
-                fail_silently=False,
-            )
-            
-            logger.info(f"Reminder email sent to {booking_reminder.email}")
+            queued = queue_reminder(booking_reminder, subject, message, html_message,
+                                    recipient_list=[booking_reminder.email])
+            if queued:
+                logger.info(f"Reminder email queued for {booking_reminder.email}")
+            return queued
             
         except Exception as e:
-            logger.error(f"Failed to send reminder email: {e}")
+            logger.error(f"Failed to queue reminder email: {e}")
             raise
-    
-    def format_booking_details(self, booking_details):
-        """Format booking details for email display"""
-        formatted = ""
-        
-        if isinstance(booking_details, list):
-            for i, booking in enumerate(booking_details, 1):
-                formatted += f"\nService {i}:\n"
-                formatted += f"  Service: {booking.get('service_name', 'N/A')}\n"
-                if booking.get('mot_class'):
-                    formatted += f"  MOT Class: {booking.get('mot_class')}\n"
-                formatted += f"  Price: £{booking.get('price', 0)}\n"
-                formatted += f"  Quantity: {booking.get('quantity', 1)}\n"
-                if booking.get('vehicle_registration'):
-                    formatted += f"  Vehicle: {booking.get('vehicle_registration')}\n"
-                formatted += "\n"
-        else:
-            # Single booking
-            formatted += f"Service: {booking_details.get('service_name', 'N/A')}\n"
-            if booking_details.get('mot_class'):
-                formatted += f"MOT Class: {booking_details.get('mot_class')}\n"
-            formatted += f"Price: £{booking_details.get('price', 0)}\n"
-            if booking_details.get('vehicle_registration'):
-                formatted += f"Vehicle: {booking_details.get('vehicle_registration')}\n"
-        
-        return formatted
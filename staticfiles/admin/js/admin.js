@@ -10,6 +10,9 @@ class AdminPanel {
         this.currentBookings = [];
         this.currentServices = [];
         this.currentUsers = [];
+        this.usersCursor = null;
+        this.bookingsCursor = null;
+        this.servicesCursor = null;
         this.refreshInterval = null;
         this.init();
     }
@@ -185,14 +188,11 @@ class AdminPanel {
         try {
             console.log('Loading dashboard data...');
             // Load dashboard statistics
-            const [usersCount, bookingsCount, paymentsTotal, services] = await Promise.all([
-                this.apiCall('/users/count/'),
-                this.apiCall('/bookings/count/'),
-                this.apiCall('/payments/total/'),
-                this.apiCall('/services/')
-            ]);
+            // Counts come from the summary; the listings only return one page
+            const summary = await this.apiCall('/summary/');
+            const { users: usersCount, bookings: bookingsCount, payments: paymentsTotal, services } = summary;
             
-            console.log('Dashboard data loaded:', { usersCount, bookingsCount, paymentsTotal, services });
+            console.log('Dashboard data loaded:', summary);
 
             // Update stats cards
             this.updateElement('totalUsers', usersCount.total || 0);
@@ -204,8 +204,8 @@ class AdminPanel {
             this.updateElement('totalRevenue', `£${(paymentsTotal.total || 0).toFixed(2)}`);
             this.updateElement('todayRevenue', `£${(paymentsTotal.today || 0).toFixed(2)} today`);
             
-            this.updateElement('totalServices', services.results?.length || 0);
-            this.updateElement('servicesChange', `${services.results?.filter(s => s.active).length || 0} active`);
+            this.updateElement('totalServices', services.total || 0);
+            this.updateElement('servicesChange', `${services.active || 0} active`);
 
             // Load charts
             await this.loadCharts();
@@ -233,24 +233,15 @@ class AdminPanel {
         }
     }
 
-    async loadBookingsData() {
+    async loadServicesData(append = false) {
         try {
-            console.log('Loading bookings data...');
-            const response = await this.apiCall('/bookings/');
-            console.log('Bookings response:', response);
-            this.currentBookings = response.results || [];
-            console.log('Current bookings:', this.currentBookings);
-            this.renderBookingsTable();
-        } catch (error) {
-            console.error('Error loading bookings:', error);
-            this.showError('Failed to load bookings');
-        }
-    }
+            const params = new URLSearchParams({ limit: 50 });
+            if (append && this.servicesCursor) params.set('cursor', this.servicesCursor);
 
-    async loadServicesData() {
-        try {
-            const response = await this.apiCall('/services/');
-            this.currentServices = response.results || [];
+            const response = await this.apiCall(`/services/?${params}`);
+            const services = response.results || [];
+            this.currentServices = append ? this.currentServices.concat(services) : services;
+            this.servicesCursor = response.next_cursor || null;
             this.renderServicesTable();
         } catch (error) {
             console.error('Error loading services:', error);
@@ -258,10 +249,15 @@ class AdminPanel {
         }
     }
 
-    async loadUsersData() {
+    async loadUsersData(append = false) {
         try {
-            const response = await this.apiCall('/users/');
-            this.currentUsers = response.results || [];
+            const params = new URLSearchParams({ limit: 50 });
+            if (append && this.usersCursor) params.set('cursor', this.usersCursor);
+
+            const response = await this.apiCall(`/users/?${params}`);
+            const users = response.results || [];
+            this.currentUsers = append ? this.currentUsers.concat(users) : users;
+            this.usersCursor = response.next_cursor || null;
             this.renderUsersTable(this.currentUsers);
             this.updateLastRefreshTime('users');
         } catch (error) {
@@ -270,11 +266,17 @@ class AdminPanel {
         }
     }
 
-    async loadBookingsData() {
+    async loadBookingsData(append = false) {
         try {
-            const response = await this.apiCall('/bookings/');
-            this.currentBookings = response.results || [];
-            this.renderBookingsTable(this.currentBookings);
+            // One keyset page at a time; "Load more" follows next_cursor
+            const params = new URLSearchParams({ limit: 50 });
+            if (append && this.bookingsCursor) params.set('cursor', this.bookingsCursor);
+
+            const response = await this.apiCall(`/bookings/?${params}`);
+            const bookings = response.results || [];
+            this.currentBookings = append ? this.currentBookings.concat(bookings) : bookings;
+            this.bookingsCursor = response.next_cursor || null;
+            this.renderBookingsTable();
             this.updateLastRefreshTime('bookings');
         } catch (error) {
             console.error('Error loading bookings:', error);
@@ -504,8 +506,8 @@ class AdminPanel {
 
     async loadRecentBookings() {
         try {
-            const response = await this.apiCall('/bookings/');
-            const recentBookings = (response.results || []).slice(0, 5);
+            const response = await this.apiCall('/bookings/?limit=5');
+            const recentBookings = response.results || [];
             
             const container = document.getElementById('recentBookings');
             if (!container) return;
@@ -533,8 +535,8 @@ class AdminPanel {
 
     async loadRecentUsers() {
         try {
-            const response = await this.apiCall('/users/');
-            const recentUsers = (response.results || []).slice(0, 5);
+            const response = await this.apiCall('/users/?limit=5');
+            const recentUsers = response.results || [];
             
             const container = document.getElementById('recentUsers');
             if (!container) return;
@@ -648,7 +650,19 @@ class AdminPanel {
                     </div>
                 </td>
             </tr>
-        `).join('');
+        `).join('') + this.loadMoreRow('loadBookingsData', 9, this.bookingsCursor);
+    }
+
+    loadMoreRow(loader, colspan, cursor) {
+        // Table row that appends the next page of a keyset-paginated list
+        if (!cursor) return '';
+        return `
+            <tr>
+                <td colspan="${colspan}" class="text-center">
+                    <button class="btn btn-sm btn-outline-secondary" onclick="adminPanel.${loader}(true)">Load more</button>
+                </td>
+            </tr>
+        `;
     }
 
     renderServicesTable() {
@@ -686,7 +700,7 @@ class AdminPanel {
                     </div>
                 </td>
             </tr>
-        `).join('');
+        `).join('') + this.loadMoreRow('loadServicesData', 6, this.servicesCursor);
     }
 
     renderUsersTable(users) {
@@ -741,7 +755,7 @@ class AdminPanel {
                     </div>
                 </td>
             </tr>
-        `).join('');
+        `).join('') + this.loadMoreRow('loadUsersData', 8, this.usersCursor);
     }
 
     // CRUD Operations